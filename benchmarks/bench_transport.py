@@ -0,0 +1,56 @@
+"""Before/after benchmark: bare ``requests.post`` vs the pooled ``Transport``.
+
+Runs both clients against a local ``MockFramlServer`` with the same worker
+count and prints throughput and the number of TCP connections opened.
+
+    python benchmarks/bench_transport.py --calls 2000 --workers 50
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.transport import TXN_ENDPOINT, Transport, format_payload
+
+PAYLOAD = {"transaction_id": "bench", "sender_hashcode": "S_1", "receiver_hashcode": "R_1",
+           "sender_amount": 100.0, "txn_date_time": "2025-07-01T00:10:00Z"}
+
+
+def bare_send(base_url: str):
+    """The pre-pooling send path: a new connection per call."""
+    headers = {"Authorization": f"Token {MOCK_TOKEN}", "Content-Type": "application/json"}
+    response = requests.post(f"{base_url}{TXN_ENDPOINT}", headers=headers, json=format_payload(PAYLOAD))
+    response.raise_for_status()
+    return response.json()
+
+
+def run(label: str, send, server: MockFramlServer, calls: int, workers: int):
+    before = server.connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(lambda _: send(), range(calls)):
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {calls / elapsed:10.1f} TPS  {elapsed:7.2f} s  "
+          f"{server.connections - before:6d} connections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="server-side delay per call (s)")
+    args = parser.parse_args()
+
+    with MockFramlServer(latency=args.latency) as server:
+        run("bare", lambda: bare_send(server.url), server, args.calls, args.workers)
+        transport = Transport(server.url, pool_size=args.workers)
+        run("pooled", lambda: transport.send_transaction(PAYLOAD, MOCK_TOKEN), server, args.calls, args.workers)
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
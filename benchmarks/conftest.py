@@ -0,0 +1,47 @@
+"""Shared fixtures for the pytest-benchmark suite.
+
+    pytest benchmarks --benchmark-only
+    pytest benchmarks --benchmark-only --benchmark-autosave --benchmark-compare --benchmark-compare-fail=mean:15%
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from my_project.mock_server import MockFramlServer
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+ROWS = 20_000
+
+
+@pytest.fixture(scope="session")
+def large_csv(tmp_path_factory):
+    """sample.csv repeated to ``ROWS`` rows with unique ids, senders and times."""
+    sample = pd.read_csv(SAMPLE_CSV, dtype=str, keep_default_na=False)
+    repeats = -(-ROWS // len(sample))
+    df = pd.concat([sample] * repeats, ignore_index=True).head(ROWS)
+    n = pd.Series(range(ROWS)).astype(str)
+    df["transaction_id"] = "bench_" + n
+    df["sender_hashcode"] = "S_" + (pd.Series(range(ROWS)) % 1000).astype(str)
+    df["txn_date_time"] = (pd.Timestamp("2025-07-01") + pd.to_timedelta(range(ROWS), unit="s")).strftime(
+        "%Y-%m-%dT%H:%M:%S.000Z")
+    path = tmp_path_factory.mktemp("bench") / "large.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope="module")
+def mock_server():
+    """Mock API answering with realistic 30-rule alerts and no added latency."""
+    with MockFramlServer(rules="realistic", trigger_rate=0.05, seed=7) as server:
+        yield server
+
+
+@pytest.fixture
+def throughput(benchmark):
+    """Return ``record(name, count)``, storing ``count`` per second of mean time in extra_info."""
+    def record(name: str, count: int):
+        if benchmark.stats is not None:  # None under --benchmark-disable
+            benchmark.extra_info[name] = round(count / benchmark.stats.stats.mean)
+    return record
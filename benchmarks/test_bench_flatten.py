@@ -0,0 +1,91 @@
+"""Response flattening cost with realistic 30-rule alerts.
+
+``test_reference_flatten`` is the original one-dict-literal-per-rule
+implementation, kept as the baseline for the fast paths.
+"""
+
+import pytest
+
+from my_project.framl import process_framl_response
+from my_project.mock_server import build_alert, load_rules
+
+pytest.importorskip("pytest_benchmark")
+
+TXN = {"transaction_id": "bench", "txn_date_time": "2025-07-01T00:10:00Z", "txn_type": "credit-card",
+       "sender_hashcode": "S_1", "sender_amount": 6000.0, "receiver_hashcode": "R_1", "receiver_amount": 0.0}
+RESPONSES = 100
+
+
+def reference_flatten(json_response: dict) -> list:
+    txn_info = json_response["alert"]["txn"]
+    rows = []
+    for rule in json_response["alert"]["ruleAlert"]:
+        row = {
+            "transaction_id": txn_info.get("transaction_id"),
+            "txn_date_time": txn_info.get("txn_date_time"),
+            "txn_type": txn_info.get("txn_type"),
+            "sender_hashcode": txn_info.get("sender_hashcode"),
+            "sender_first_name": txn_info.get("sender_first_name"),
+            "sender_last_name": txn_info.get("sender_last_name"),
+            "sender_amount": txn_info.get("sender_amount"),
+            "sender_msisdn": txn_info.get("sender_msisdn"),
+            "sender_incorporation_date": txn_info.get("sender_incorporation_date"),
+            "receiver_incorporation_date": txn_info.get("receiver_incorporation_date"),
+            "receiver_hashcode": txn_info.get("receiver_hashcode"),
+            "receiver_first_name": txn_info.get("receiver_first_name"),
+            "receiver_last_name": txn_info.get("receiver_last_name"),
+            "receiver_amount": txn_info.get("receiver_amount"),
+            "receiver_msisdn": txn_info.get("receiver_msisdn"),
+            "ruleId": rule.get("ruleId"),
+            "ruleName": rule.get("ruleName"),
+            "typologyId": rule.get("typologyId"),
+            "typologyName": rule.get("typologyName"),
+            "ruleTriggered": rule.get("ruleTriggered"),
+            "messageType": rule.get("messageType")
+        }
+        for k, v in rule.get("functionValue", {}).items():
+            if isinstance(v, dict):
+                row[f"{k} (type)"] = v.get("type")
+                row[f"{k} (value)"] = v.get("field")
+            else:
+                row[f"{k} (value)"] = v
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture(scope="module")
+def alerts():
+    rules = load_rules("realistic")
+    return [build_alert(dict(TXN, transaction_id=f"bench_{i}"), rules) for i in range(RESPONSES)]
+
+
+def _rows(flatten, alerts):
+    rows = []
+    for alert in alerts:
+        rows.extend(flatten(alert))
+    return rows
+
+
+def test_reference_flatten(benchmark, throughput, alerts):
+    """Baseline: the original per-rule dict literal with f-string column names."""
+    rows = benchmark(_rows, reference_flatten, alerts)
+    assert len(rows) == 30 * RESPONSES
+    throughput("rules_per_s", len(rows))
+
+
+def test_process_framl_response(benchmark, throughput, alerts):
+    """Fast path: shared transaction prefix and interned column names."""
+    rows = benchmark(_rows, process_framl_response, alerts)
+    assert rows == _rows(reference_flatten, alerts)
+    throughput("rules_per_s", len(rows))
+
+
+def test_to_table(benchmark, throughput, alerts):
+    """Arrow table from flattened rows."""
+    from my_project.columnar import to_table
+
+    pytest.importorskip("pyarrow")
+    rows = _rows(process_framl_response, alerts)
+    table = benchmark(to_table, rows)
+    assert table.num_rows == len(rows)
+    throughput("rules_per_s", table.num_rows)
@@ -0,0 +1,44 @@
+"""Preprocessing throughput: CSV to send-ready payloads."""
+
+import pytest
+
+from my_project.ingest import count_rows, load_payloads
+from my_project.payload_store import PREFIX_PLACEHOLDER, PayloadStore, compile_store
+from my_project.schema import compile_schema
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_load_payloads(benchmark, throughput, large_csv):
+    """Whole-file read, sort and column-wise normalization."""
+    rows = count_rows(large_csv)
+    payloads = benchmark(lambda: load_payloads(large_csv, "bench")[0])
+    assert len(payloads) == rows
+    throughput("rows_per_s", rows)
+
+
+def test_load_payloads_validated(benchmark, throughput, large_csv):
+    """Same as ``test_load_payloads`` with the compiled schema check in front of normalization."""
+    rows = count_rows(large_csv)
+    payloads = benchmark(lambda: load_payloads(large_csv, "bench", validator=compile_schema())[0])
+    assert len(payloads) == rows
+    throughput("rows_per_s", rows)
+
+
+def test_load_payloads_streaming(benchmark, throughput, large_csv):
+    """Chunked read with the external merge sort."""
+    rows = count_rows(large_csv)
+    count = benchmark(lambda: sum(1 for _ in load_payloads(large_csv, "bench", chunksize=5_000)[0]))
+    assert count == rows
+    throughput("rows_per_s", rows)
+
+
+def test_payload_store_replay(benchmark, throughput, large_csv, tmp_path):
+    """Reading a compiled store back with the run prefix spliced in."""
+    rows = count_rows(large_csv)
+    path = str(tmp_path / "bench.store")
+    compile_store(load_payloads(large_csv, PREFIX_PLACEHOLDER)[0], path)
+    with PayloadStore(path) as store:
+        count = benchmark(lambda: sum(1 for _ in store.iter_payloads("bench")))
+    assert count == rows
+    throughput("rows_per_s", rows)
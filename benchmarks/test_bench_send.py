@@ -0,0 +1,72 @@
+"""End-to-end send TPS against the local mock (client-bound: no server latency)."""
+
+import threading
+
+import pytest
+
+from my_project.mock_server import MOCK_TOKEN
+from my_project.runner import run_threaded
+from my_project.transport import Transport
+
+pytest.importorskip("pytest_benchmark")
+
+CALLS = 2_000
+WORKERS = 32
+PAYLOADS = [{"transaction_id": f"bench{i}", "sender_hashcode": f"S_{i % 100}", "sender_amount": 100.0,
+             "txn_date_time": "2025-07-01T00:10:00Z"} for i in range(CALLS)]
+
+
+def test_send_threaded(benchmark, throughput, mock_server):
+    """Thread driver with the pooled transport, flattening included."""
+    transport = Transport(mock_server.url, pool_size=WORKERS)
+
+    def send():
+        return run_threaded(PAYLOADS, MOCK_TOKEN, transport, WORKERS, 0, threading.Event(), CALLS, [])
+
+    rows = benchmark.pedantic(send, rounds=3, iterations=1)
+    transport.close()
+    assert len(rows) == CALLS * 30
+    throughput("tps", CALLS)
+
+
+def test_send_async(benchmark, throughput, mock_server):
+    """asyncio driver over aiohttp."""
+    pytest.importorskip("aiohttp")
+    from my_project.async_engine import run_async
+
+    def send():
+        return run_async(PAYLOADS, MOCK_TOKEN, mock_server.url, WORKERS, 0, threading.Event(), CALLS, [])
+
+    rows = benchmark.pedantic(send, rounds=3, iterations=1)
+    assert len(rows) == CALLS * 30
+    throughput("tps", CALLS)
+
+
+@pytest.mark.parametrize("batch_size", [10, 50])
+def test_send_threaded_batched(benchmark, throughput, mock_server, batch_size):
+    """Thread driver posting ``batch_size`` transactions per request to the /batch endpoint."""
+    transport = Transport(mock_server.url, pool_size=WORKERS)
+
+    def send():
+        return run_threaded(PAYLOADS, MOCK_TOKEN, transport, WORKERS, 0, threading.Event(), CALLS, [],
+                            batch_size=batch_size)
+
+    rows = benchmark.pedantic(send, rounds=3, iterations=1)
+    transport.close()
+    assert len(rows) == CALLS * 30
+    throughput("tps", CALLS)
+
+
+@pytest.mark.parametrize("batch_size", [10, 50])
+def test_send_async_batched(benchmark, throughput, mock_server, batch_size):
+    """asyncio driver posting ``batch_size`` transactions per request."""
+    pytest.importorskip("aiohttp")
+    from my_project.async_engine import run_async
+
+    def send():
+        return run_async(PAYLOADS, MOCK_TOKEN, mock_server.url, WORKERS, 0, threading.Event(), CALLS, [],
+                         batch_size=batch_size)
+
+    rows = benchmark.pedantic(send, rounds=3, iterations=1)
+    assert len(rows) == CALLS * 30
+    throughput("tps", CALLS)
@@ -0,0 +1,343 @@
+"""asyncio replay driver.
+
+Runs every in-flight request as a coroutine on one event loop instead of one
+OS thread per request, so thousands of requests can be outstanding from a
+single process. In-flight requests are bounded by a semaphore. Requires the
+optional ``aiohttp`` dependency (``pip install my_project[async]``).
+"""
+
+import asyncio
+import threading
+import time
+
+from my_project.auth import TokenManager
+from my_project.batching import DEFAULT_LINGER, UNSUPPORTED_STATUSES, abatches, batch_body, demux, failed_batch
+from my_project.concurrency import congested
+from my_project.framl import process_framl_response, transaction_id_of
+from my_project.metrics import record_call, record_error, record_retry, watch_in_flight
+from my_project.pipeline import ACK, ALERT, PIPELINE, AsyncAckStage, split_by_transaction
+from my_project.retry import CircuitOpenError, failed
+from my_project.runner import report_progress
+from my_project.sinks import record_empty
+from my_project.transport import BASE_URL, BATCH_SUFFIX, FRAUD_ACK_ENDPOINT, TXN_ENDPOINT, request_body
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+async def _aiter(rows):
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+async def _read_text(response) -> str:
+    return (await response.text()).strip()
+
+
+class AsyncTransport:
+    """aiohttp counterpart of ``Transport`` for the async driver.
+
+    Args:
+        base_url: Scheme and host of the FRAML deployment
+        concurrency: Connection limit; match it to the semaphore size
+        timeout: Total per-request timeout in seconds, or None
+        retry: ``RetryPolicy`` for failed sends, or None to never retry
+        breaker: ``CircuitBreaker`` that holds sends back while the server is failing, or None
+    """
+
+    def __init__(self, base_url: str = BASE_URL, concurrency: int = 1000, timeout=None,
+                 retry=None, breaker=None):
+        if aiohttp is None:
+            raise ImportError("the async driver requires aiohttp: pip install my_project[async]")
+        self.txn_url = f"{base_url}{TXN_ENDPOINT}"
+        self.ack_url = f"{base_url}{FRAUD_ACK_ENDPOINT}"
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retry = retry
+        self.breaker = breaker
+        self.batch_supported = True
+        self.session = None
+        self._headers = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def headers_for(self, token: str) -> dict:
+        headers = self._headers.get(token)
+        if headers is None:
+            headers = self._headers[token] = {
+                "Authorization": f"Token {token}",
+                "Content-Type": "application/json",
+            }
+        return headers
+
+    async def _post(self, url: str, payload, token, read):
+        tokens = token if isinstance(token, TokenManager) else None
+        if self.retry is not None:
+            self.retry.started()
+        attempt = 1
+        while True:
+            ticket = None
+            if self.breaker is not None:
+                while not (ticket := self.breaker.allow()):  # hold the send until a probe may go out
+                    if self.breaker.stop_event.is_set():
+                        raise CircuitOpenError(f"circuit breaker open, not sending to {url}")
+                    await asyncio.sleep(self.breaker.retry_in())
+            value = tokens.get() if tokens is not None else token  # may have been refreshed during backoff
+            try:
+                result = await self._send(url, payload, tokens, value, read)
+            except aiohttp.ClientResponseError as e:
+                error, status = e, e.status
+                retry_after = e.headers.get("Retry-After") if e.headers else None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error, status, retry_after = e, None, None
+            except BaseException:
+                if self.breaker is not None:
+                    self.breaker.record(False, ticket)  # releases a half-open probe that failed unexpectedly
+                raise
+            else:
+                if self.breaker is not None:
+                    self.breaker.record(True, ticket)
+                return result
+            if self.breaker is not None:
+                self.breaker.record(not failed(status), ticket)
+            if self.retry is None or not self.retry.should_retry(status, attempt):
+                raise error
+            record_retry()
+            await asyncio.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    async def _send(self, url: str, payload, tokens, value, read):
+        async with self.session.post(url, headers=self.headers_for(value),
+                                     **request_body(payload)) as response:
+            if response.status != 401 or tokens is None:
+                response.raise_for_status()
+                return await read(response)
+        # Refresh off the event loop so other requests keep flowing
+        value = await asyncio.to_thread(tokens.invalidate, value)
+        async with self.session.post(url, headers=self.headers_for(value),
+                                     **request_body(payload)) as response:
+            response.raise_for_status()
+            return await read(response)
+
+    async def send_transaction(self, payload: dict, token) -> dict:
+        """Post a transaction to the fraud-alert endpoint and return the JSON body.
+
+        ``token`` may be a ``TokenManager``; a 401 then refreshes it and retries once.
+        Other failures are retried per ``retry``.
+        """
+        return await self._post(self.txn_url, payload, token,
+                                lambda response: response.json(content_type=None))
+
+    async def send_fraud_ack(self, payload: dict, token) -> str:
+        """Post a transaction to the fraud-ack endpoint and return the text body.
+
+        ``token`` may be a ``TokenManager``; a 401 then refreshes it and retries once.
+        Other failures are retried per ``retry``.
+        """
+        return await self._post(self.ack_url, payload, token, _read_text)
+
+    async def send_batch(self, body: bytes, token, ack: bool = False) -> list:
+        """Post a batch to the ``/batch`` variant of fraud-alert or fraud-ack; see ``Transport.send_batch``."""
+        url = (self.ack_url if ack else self.txn_url) + BATCH_SUFFIX
+        return await self._post(url, body, token, lambda response: response.json(content_type=None))
+
+
+async def process_single_row_async(payload: dict, token: str, transport: AsyncTransport,
+                                   ack_run: int = 0) -> list:
+    """Async counterpart of ``runner.process_single_row``."""
+    started = time.perf_counter()
+    try:
+        if ack_run == 1:
+            ack_response = await transport.send_fraud_ack(payload, token)
+            record_call(time.perf_counter() - started, ack=True)
+            return [{
+                "transaction_id": transaction_id_of(payload),
+                "ack_status": ack_response
+            }]
+        response_json = await transport.send_transaction(payload, token)
+        latency = time.perf_counter() - started
+        rows = process_framl_response(response_json)
+        record_call(latency, rules=len(rows))
+        return rows
+
+    except Exception as e:
+        record_error(time.perf_counter() - started)
+        return [{
+            "transaction_id": transaction_id_of(payload),
+            "error": str(e) or type(e).__name__
+        }]
+
+
+async def process_batch_async(payloads: list, token, transport: AsyncTransport, ack_run: int = 0) -> list:
+    """Async counterpart of ``runner.process_batch``."""
+    if transport.batch_supported:
+        try:
+            started = time.perf_counter()
+            results = await transport.send_batch(batch_body(payloads), token, ack=ack_run == 1)
+            return demux(payloads, results, ack_run, time.perf_counter() - started)
+        except aiohttp.ClientResponseError as e:
+            if e.status not in UNSUPPORTED_STATUSES:
+                return failed_batch(payloads, e, time.perf_counter() - started)
+            if transport.batch_supported:
+                transport.batch_supported = False
+                print(f"⚠️ Batch endpoint unavailable ({e.status}), sending one request per row")
+        except Exception as e:
+            return failed_batch(payloads, e, time.perf_counter() - started)
+    rows = await asyncio.gather(*(process_single_row_async(payload, token, transport, ack_run)
+                                  for payload in payloads))
+    return [row for item_rows in rows for row in item_rows]
+
+
+async def replay_async(rows, token: str, transport: AsyncTransport, concurrency: int = 1000,
+                       ack_run: int = 0, stop_event: threading.Event = None,
+                       total_calls: int = None, responses: list = None, controller=None,
+                       batch_size: int = 1, linger: float = DEFAULT_LINGER, ack_concurrency: int = None,
+                       ack_queue: int = None) -> list:
+    """Replay rows with at most ``concurrency`` requests in flight.
+
+    Rows are pulled lazily, so ``rows`` may be a generator or an async
+    iterable such as ``Pacer.apace``. With an ``AimdController`` the
+    in-flight limit follows ``controller.limit`` (capped at ``concurrency``).
+    With ``batch_size`` > 1 rows go out in batches (see ``batching``) and
+    the limits count batch requests. With ``ack_run=PIPELINE`` every alert is
+    followed by its ack on a stage with ``ack_concurrency`` workers and an
+    ``ack_queue`` bound (see ``pipeline``).
+
+    Returns:
+        Output rows in completion order
+    """
+    stop_event = stop_event or threading.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    responses = [] if responses is None else responses
+    pending = set()
+    done = 0
+    in_flight = 0
+    slot_freed = asyncio.Event()
+    start_time = time.time()
+
+    if batch_size > 1:
+        rows = abatches(rows, batch_size, linger)
+        send, calls_in = process_batch_async, len
+    else:
+        send, calls_in = process_single_row_async, lambda item: 1
+
+    stage = None
+    if ack_run == PIPELINE:
+        stage = AsyncAckStage(lambda payload: process_single_row_async(payload, token, transport, ACK), responses,
+                              ack_concurrency or concurrency, ack_queue, stop_event).start()
+
+    async def task(item):
+        nonlocal done, start_time, in_flight
+        started = time.perf_counter()
+        rows = []
+        try:
+            if stage is None:
+                rows = await send(item, token, transport, ack_run)
+                responses.extend(rows)
+                record_empty(responses, item if batch_size > 1 else [item], rows)
+            else:
+                # Pipeline: the ack stage writes the joined rows
+                rows = await send(item, token, transport, ALERT)
+                if batch_size > 1:
+                    for payload, alert_rows in zip(item, split_by_transaction(item, rows)):
+                        await stage.submit(payload, alert_rows)
+                else:
+                    await stage.submit(item, rows)
+        finally:
+            semaphore.release()
+            in_flight -= 1
+            if controller is not None:
+                controller.observe(time.perf_counter() - started, not congested(rows))
+                slot_freed.set()
+        calls = calls_in(item)
+        done += calls
+        start_time = report_progress(done, total_calls, start_time, calls)
+
+    watch_in_flight(lambda: in_flight)
+    iterator = _aiter(rows)
+    source_error = None
+    while True:
+        # Take a slot before pulling the row so a paced source sees back-pressure as lag
+        await semaphore.acquire()
+        while controller is not None and in_flight >= controller.limit:
+            controller.saturated()
+            slot_freed.clear()
+            await slot_freed.wait()
+        if stop_event.is_set():
+            semaphore.release()
+            break
+        try:
+            row_dict = await iterator.__anext__()
+        except StopAsyncIteration:
+            semaphore.release()
+            break
+        except Exception as e:
+            semaphore.release()
+            source_error = e  # finish what is in flight, then fail the run
+            break
+        in_flight += 1
+        future = asyncio.ensure_future(task(row_dict))
+        pending.add(future)
+        future.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    if stage is not None:
+        await stage.close()
+    watch_in_flight(None)
+    if source_error is not None:
+        raise source_error
+    return responses
+
+
+def run_async(rows, token: str, base_url: str = BASE_URL, concurrency: int = 1000,
+              ack_run: int = 0, stop_event: threading.Event = None,
+              total_calls: int = None, responses: list = None, controller=None,
+              retry=None, breaker=None, batch_size: int = 1, linger: float = DEFAULT_LINGER,
+              ack_concurrency: int = None, ack_queue: int = None, pool_size: int = None) -> list:
+    """Run ``replay_async`` on a fresh event loop.
+
+    Args:
+        rows: Iterable of normalized payload dicts
+        token: API token or ``TokenManager``
+        base_url: Scheme and host of the FRAML deployment
+        concurrency: Maximum number of in-flight requests
+        ack_run: 1 to call fraud-ack instead of fraud-alert, 2 (``PIPELINE``)
+            to call fraud-alert then fraud-ack for every row
+        stop_event: Set to stop dispatching new rows
+        total_calls: Row count for progress output, if known
+        responses: List to append output rows to
+        controller: Optional ``AimdController`` adapting the in-flight limit
+        retry: Optional ``RetryPolicy`` for failed sends
+        breaker: Optional ``CircuitBreaker``
+        batch_size: Rows per request; 1 sends each row on its own
+        linger: Seconds a partial batch waits for more rows
+        ack_concurrency: In-flight acks in pipeline mode; defaults to ``concurrency``
+        ack_queue: Bound on alerts waiting for their ack in pipeline mode
+        pool_size: Connection limit; defaults to ``concurrency`` (plus
+            ``ack_concurrency`` in pipeline mode)
+
+    Returns:
+        Output rows in completion order, same shape as ``run_threaded``
+    """
+    connections = pool_size or concurrency + ((ack_concurrency or concurrency) if ack_run == PIPELINE else 0)
+
+    async def main():
+        async with AsyncTransport(base_url, connections, retry=retry, breaker=breaker) as transport:
+            return await replay_async(rows, token, transport, concurrency, ack_run,
+                                      stop_event, total_calls, responses, controller, batch_size, linger,
+                                      ack_concurrency, ack_queue)
+
+    return asyncio.run(main())
@@ -0,0 +1,153 @@
+"""Shared API token cache with proactive refresh.
+
+``TokenManager`` hands the current token to every worker without blocking.
+A background thread re-authenticates shortly before the token expires. A
+worker that still gets a 401 calls ``invalidate``, which refreshes once on
+behalf of every worker holding the same stale token. Tokens can be persisted
+to disk so short back-to-back runs reuse them instead of re-authenticating.
+"""
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL = 30 * 60
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "my_project", "tokens.json")
+
+
+def _expires_in(auth_response: dict, default: float) -> float:
+    for key in ("expires_in", "expiresIn", "ttl"):
+        value = auth_response.get(key)
+        if value:
+            return float(value)
+    return default
+
+
+class TokenManager:
+    """Cache an API token with its TTL and refresh it before it expires.
+
+    Args:
+        authenticate: Callable returning the auth endpoint's JSON body (a dict
+            with ``"token"`` and optionally ``"expires_in"``), e.g.
+            ``Transport.authenticate``
+        ttl: Token lifetime in seconds when the server does not report one
+        refresh_margin: Refresh this many seconds before expiry
+        cache_path: JSON file to persist tokens in, or None to disable
+        cache_key: Entry in the cache file, e.g. ``"<base_url>|<tenant>"``
+    """
+
+    def __init__(self, authenticate, ttl: float = DEFAULT_TTL, refresh_margin: float = 60.0,
+                 cache_path: str = None, cache_key: str = "default"):
+        self.authenticate = authenticate
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl / 2)
+        self.cache_path = cache_path
+        self.cache_key = cache_key
+        self.token = None
+        self.expires_at = 0.0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    # ----------- cache file -----------
+    def _load(self) -> bool:
+        if not self.cache_path:
+            return False
+        try:
+            with open(self.cache_path) as f:
+                entry = json.load(f).get(self.cache_key)
+        except (OSError, ValueError):
+            return False
+        if not entry or entry.get("expires_at", 0) - self.refresh_margin <= time.time():
+            return False
+        self.token, self.expires_at = entry["token"], entry["expires_at"]
+        return True
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        entries[self.cache_key] = {"token": self.token, "expires_at": self.expires_at}
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"  # shard processes may save at once
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp, self.cache_path)
+
+    # ----------- token lifecycle -----------
+    def refresh(self) -> str:
+        """Authenticate now and return the new token."""
+        with self._lock:
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> str:
+        response = self.authenticate()
+        self.token = response.get("token")
+        self.expires_at = time.time() + _expires_in(response, self.ttl)
+        self.refreshes += 1
+        self._save()
+        self._wake.set()  # reschedule the background refresh
+        return self.token
+
+    def get(self) -> str:
+        """Return a valid token, authenticating only if none is cached or it has expired."""
+        token = self.token
+        if token is not None and time.time() < self.expires_at:
+            return token
+        with self._lock:
+            if self.token is None and self._load():
+                return self.token
+            if self.token is None or time.time() >= self.expires_at:
+                return self._refresh_locked()
+            return self.token
+
+    def invalidate(self, stale_token: str) -> str:
+        """Handle a 401 for ``stale_token`` and return the token to retry with.
+
+        Only the first caller holding the stale token re-authenticates; the
+        others wait for that refresh and get its result.
+        """
+        with self._lock:
+            if self.token != stale_token:
+                return self.token
+            return self._refresh_locked()
+
+    # ----------- background refresh -----------
+    def start(self) -> "TokenManager":
+        """Fetch or load the token and start the background refresher."""
+        self.get()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            delay = self.expires_at - self.refresh_margin - time.time()
+            if delay > 0:
+                self._wake.clear()
+                self._wake.wait(delay)
+                continue
+            try:
+                self.refresh()
+                backoff = 1.0
+            except Exception as e:
+                # Keep serving the current token until it really expires
+                print(f"⚠️ Token refresh failed, retrying in {backoff:.0f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def stop(self):
+        """Stop the background refresher."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
@@ -0,0 +1,192 @@
+"""Batch submission: several payloads per HTTP request.
+
+At high TPS the per-request overhead (headers, auth, framing, one
+round trip per transaction) costs more than the payloads. In batch mode the
+drivers group up to ``batch_size`` payloads and post them together to the
+``/batch`` variant of the endpoint.
+
+The request body is a JSON array of the usual ``tt_json`` envelopes.
+Pre-encoded payloads are spliced in as-is. The response is a JSON array
+with one entry per payload, in order: the fraud-alert response (or fraud-ack
+text), or ``{"error": ..., "status": ...}`` when that item failed.
+``demux`` turns the entries back into output rows through
+``process_framl_response``, exactly as if each payload had gone alone.
+
+A batch is sent once ``batch_size`` payloads are waiting, or ``linger``
+seconds after its first payload arrived, whichever comes first. On a fast
+source batches fill at once, while on a paced source (``--rate``) linger
+bounds the extra latency batching adds.
+
+If the server answers the batch endpoint with 404/405/501, the drivers fall
+back to one request per payload over their keep-alive pool. HTTP/2
+multiplexing is not an option, as neither ``requests`` nor ``aiohttp``
+speaks it.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+from my_project.framl import process_framl_response, transaction_id_of
+from my_project.metrics import record_call, record_error
+from my_project.payload_store import encode_payload
+
+UNSUPPORTED_STATUSES = (404, 405, 501)  # server has no batch endpoint
+DEFAULT_LINGER = 0.01
+
+_END = object()
+
+
+def batch_body(payloads: list) -> bytes:
+    """Encode payloads (dicts or ``EncodedPayload``) as one batch request body."""
+    parts = []
+    for payload in payloads:
+        body = getattr(payload, "body", None)
+        parts.append(body if body is not None else encode_payload(payload))
+    return b"[" + b",".join(parts) + b"]"
+
+
+def demux(payloads: list, results: list, ack_run: int, latency: float) -> list:
+    """Turn a batch response back into output rows, one transaction at a time.
+
+    Every transaction, failed or not, is recorded in the metrics with the
+    batch round trip as its latency.
+
+    Args:
+        payloads: The payloads of the batch, in request order
+        results: Decoded batch response, one entry per payload
+        ack_run: 1 if the batch went to fraud-ack
+        latency: Round trip of the batch request in seconds
+
+    Raises:
+        ValueError: If the response does not have one entry per payload
+    """
+    if not isinstance(results, list) or len(results) != len(payloads):
+        size = len(results) if isinstance(results, list) else type(results).__name__
+        raise ValueError(f"batch of {len(payloads)} payloads got {size} results")
+    rows = []
+    for payload, result in zip(payloads, results):
+        if isinstance(result, dict) and "error" in result:
+            record_error(latency)
+            status = result.get("status")
+            error = f"{status} {result['error']}" if status else str(result["error"])
+            rows.append({"transaction_id": transaction_id_of(payload), "error": error})
+            continue
+        try:
+            if ack_run == 1:
+                item_rows = [{"transaction_id": transaction_id_of(payload), "ack_status": str(result).strip()}]
+                record_call(latency, ack=True)
+            else:
+                item_rows = process_framl_response(result)
+                record_call(latency, rules=len(item_rows))
+        except Exception as e:
+            record_error(latency)
+            item_rows = [{"transaction_id": transaction_id_of(payload), "error": str(e) or type(e).__name__}]
+        rows.extend(item_rows)
+    return rows
+
+
+def failed_batch(payloads: list, error: Exception, latency: float = None) -> list:
+    """Error rows (and error counts) for every payload of a batch that failed as a whole.
+
+    ``latency`` is the time until the batch failed, recorded for each payload.
+    """
+    rows = []
+    for payload in payloads:
+        record_error(latency)
+        rows.append({"transaction_id": transaction_id_of(payload), "error": str(error) or type(error).__name__})
+    return rows
+
+
+def batches(rows, size: int, linger: float = DEFAULT_LINGER, stop_event: threading.Event = None):
+    """Group an iterable into lists of up to ``size`` rows.
+
+    A batch is yielded when full, or ``linger`` seconds after its first row
+    if the source is slower than that (None waits until full). Rows are
+    pulled by a background thread so a slow or paced source cannot hold a
+    partial batch back. At most ``size`` rows are read ahead. If reading
+    the source fails, the rows read before the failure are still yielded,
+    then the error is raised here.
+    """
+    stop_event = stop_event or threading.Event()
+    buffer = queue.Queue(maxsize=size)
+    failure = []
+
+    def feed():
+        try:
+            for row in rows:
+                while not stop_event.is_set():
+                    try:
+                        buffer.put(row, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop_event.is_set():
+                    break
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            buffer.put(_END)
+
+    threading.Thread(target=feed, name="batch-feeder", daemon=True).start()
+    while True:
+        row = buffer.get()
+        if row is _END:
+            break
+        batch = [row]
+        deadline = time.monotonic() + linger if linger is not None else None
+        while len(batch) < size:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            try:
+                row = buffer.get(timeout=timeout) if timeout is None or timeout > 0 else buffer.get_nowait()
+            except queue.Empty:
+                break
+            if row is _END:
+                break
+            batch.append(row)
+        yield batch
+        if row is _END:
+            break
+    if failure:
+        raise failure[0]
+
+
+async def abatches(rows, size: int, linger: float = DEFAULT_LINGER):
+    """Async counterpart of ``batches`` for an iterable or async iterable of rows."""
+    if hasattr(rows, "__aiter__"):
+        iterator = rows.__aiter__()
+    else:
+        async def sync_rows():
+            for row in rows:
+                yield row
+        iterator = sync_rows()
+    loop = asyncio.get_running_loop()
+    pending = None
+    try:
+        while True:
+            batch, deadline = [], None
+            while len(batch) < size:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                finished, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not finished:
+                    break
+                task, pending = pending, None
+                try:
+                    batch.append(task.result())
+                except StopAsyncIteration:
+                    if batch:
+                        yield batch
+                    return
+                except Exception:
+                    if batch:
+                        yield batch  # the rows read before the source failed still go out
+                    raise
+                if deadline is None and linger is not None:
+                    deadline = loop.time() + linger
+            yield batch
+    finally:
+        if pending is not None:
+            pending.cancel()
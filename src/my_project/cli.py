@@ -0,0 +1,398 @@
+"""Command-line entry point for FRAML replay runs.
+
+    python -m my_project.cli --input sample.csv --driver async --concurrency 2000
+    python -m my_project.cli --input sample.csv --shards 4 --max-workers 50
+    python -m my_project.cli --input sample.csv --batch-size 50 --batch-linger 5
+    python -m my_project.cli --input sample.csv --pipeline --ack-workers 20
+    python -m my_project.cli --input sample.csv --rejects bad_rows.csv
+    my_project --profile profiles/rcbc01.toml --sweep max_workers=10,50,100 --report sweep.csv
+"""
+
+import argparse
+import ast
+import threading
+import time
+
+from my_project import metrics
+from my_project.auth import DEFAULT_CACHE, DEFAULT_TTL, TokenManager
+from my_project.batching import DEFAULT_LINGER
+from my_project.columnar import LAYOUTS
+from my_project.concurrency import AimdController
+from my_project.framl import PRE_FIX
+from my_project.histogram import format_summary
+from my_project.ingest import load_payloads
+from my_project.journal import Journal
+from my_project.pacing import Pacer
+from my_project.payload_store import PREFIX_PLACEHOLDER, PayloadStore, compile_store
+from my_project.pipeline import ACK, ALERT, PIPELINE
+from my_project.profiles import load_profile, normalize_options, run_sweep
+from my_project.replay import TimestampPacer
+from my_project.retry import DEFAULT_RULES, CircuitBreaker, RetryPolicy
+from my_project.runner import run_threaded
+from my_project.schema import compile_schema
+from my_project.sinks import FORMATS, PayloadLog, open_sink
+from my_project.transport import BASE_URL, TENANT_ID, Transport
+
+DRIVERS = ("thread", "async")
+RETRY_STATUSES = tuple(status for status in DEFAULT_RULES if status is not None)
+
+# Command-line destinations whose run_replay argument has another name
+_DEST_OPTIONS = {"input": "input_csv", "output": "output_csv", "prefix": "pre_fix", "journal": "journal_path",
+                 "rejects": "reject_path", "ack": "ack_run", "pipeline": "ack_run"}
+
+
+def run(input_csv: str, output_csv: str, driver: str = "thread", max_workers: int = 50,
+        concurrency: int = 1000, base_url: str = BASE_URL, tenant_id: str = TENANT_ID,
+        pre_fix: str = PRE_FIX, party_prefix: str = "", ack_run: int = 0, chunksize: int = None,
+        sort: bool = True,
+        payload_store: str = None, recompile: bool = False, token_ttl: float = DEFAULT_TTL,
+        token_cache: str = None, rate: str = None, replay_speed: float = None,
+        max_gap: float = None, output_format: str = None, function_values: str = "nested",
+        resume: bool = False, journal_path: str = None, adaptive: bool = False,
+        latency_target: float = None, retries: int = 0, retry_statuses=RETRY_STATUSES,
+        retry_budget: float = 0.1, circuit_breaker: bool = False, payload_index: str = None,
+        monitor: bool = True, batch_size: int = 1, batch_linger: float = DEFAULT_LINGER,
+        metrics_log: str = metrics.TPS_LOG, metrics_port: int = None, ack_workers: int = None,
+        ack_queue: int = None, validate: bool = True, reject_path: str = None,
+        pool_size: int = None, formatted_payloads: str = None) -> int:
+    """Replay a CSV against the FRAML API and write the flattened responses.
+
+    Args:
+        input_csv: Transactions to replay
+        output_csv: Where the output rows are written, streamed as they arrive
+        driver: ``"thread"`` for the thread pool, ``"async"`` for asyncio
+        max_workers: Thread-pool size for the thread driver
+        concurrency: In-flight request limit for the async driver
+        base_url: Scheme and host of the FRAML deployment
+        tenant_id: Tenant passed to the auth endpoint
+        pre_fix: Run prefix for ``transaction_id``
+        party_prefix: Prefix for ``sender_hashcode`` / ``receiver_hashcode``
+            so every run sees fresh customers; with ``payload_store`` it is
+            applied when the store is compiled
+        ack_run: 1 to call fraud-ack instead of fraud-alert, 2 (``PIPELINE``)
+            to call fraud-alert then fraud-ack for every transaction in one
+            pass, writing one joined alert+ack result per transaction
+        chunksize: Stream the input this many rows at a time instead of
+            loading it whole; memory then stays flat regardless of file size
+        sort: Replay in ``txn_date_time`` order (external merge sort when
+            streaming) rather than file order
+        payload_store: Compiled payload store to replay from; it is built
+            from ``input_csv`` first if missing. Payloads are then encoded once
+            per dataset and only the run prefix is patched in per replay
+        recompile: Rebuild ``payload_store`` even if it exists
+        token_ttl: Token lifetime in seconds if the auth response has none;
+            the token is refreshed in the background before it runs out
+        token_cache: File to persist the token in so the next run reuses it,
+            or None to authenticate every run
+        rate: Open-loop rate schedule such as ``"200"`` or ``"100-500:60,500"``
+            (see ``pacing``); requests then go out at the scheduled rate
+            regardless of response times. None runs closed-loop
+        replay_speed: Replay at the original ``txn_date_time`` spacing sped up
+            by this factor (1, 10, 100, ...) instead of as fast as possible
+        max_gap: With ``replay_speed``, cap idle gaps between transactions at
+            this many source seconds
+        output_format: ``"csv"``, ``"jsonl"``, ``"parquet"`` or ``"arrow"``;
+            inferred from the ``output_csv`` extension if None
+        function_values: ``functionValue`` layout for Parquet/Arrow output,
+            ``"nested"`` or ``"long"`` (see ``columnar``)
+        resume: Skip transactions already completed according to the journal
+            and append to the existing output instead of starting over
+        journal_path: Completed-transaction journal; defaults to
+            ``output_csv + ".journal"``
+        adaptive: Let an AIMD controller pick the in-flight limit, up to
+            ``max_workers`` (thread) or ``concurrency`` (async)
+        latency_target: p99 latency in seconds the adaptive controller
+            backs off above; derived from the observed baseline if None
+        retries: Extra attempts for a send failing with a connection error,
+            timeout or one of ``retry_statuses``; 0 disables retries
+        retry_statuses: HTTP statuses worth retrying
+        retry_budget: Retries allowed as a fraction of all sends, so retries
+            cannot multiply the load on a failing server
+        circuit_breaker: Pause sends while most recent calls fail,
+            probing again after a cool-off
+        payload_index: Replay only the records in this index of
+            ``payload_store`` (a shard from ``payload_store.partition``)
+        monitor: Print and log the per-second TPS line
+        batch_size: Send up to this many transactions per request to the
+            ``/batch`` endpoints (falling back to one per request if the
+            server has none); 1 disables batching
+        batch_linger: Seconds a partial batch waits for more transactions
+        metrics_log: Per-second metrics records (TPS, in-flight, latency
+            percentiles, errors, client CPU/RSS) as ``.jsonl``, ``.csv`` or
+            plain text; None to only print them
+        metrics_port: Serve the latest record on ``/metrics`` on this local
+            port for Prometheus-style scrapers
+        ack_workers: Pipeline mode: ack-stage threads (thread driver) or
+            in-flight acks (async driver); defaults to ``max_workers`` /
+            ``concurrency``
+        ack_queue: Pipeline mode: bound on alerts waiting for their ack
+        validate: Check rows against ``schema.PAYLOAD_SCHEMA`` before they
+            are normalized; invalid rows are never sent
+        reject_path: CSV the invalid rows are written to, with a
+            ``reject_reason`` column; defaults to ``output_csv + ".rejects.csv"``
+        pool_size: HTTP connections kept open; defaults to the worker count
+            (plus ``ack_workers`` in pipeline mode)
+        formatted_payloads: CSV to record each request envelope in as it is
+            dispatched, one JSON document per row; None to skip it
+
+    Returns:
+        Number of output rows written
+    """
+    if driver not in DRIVERS:
+        raise ValueError(f"unknown driver {driver!r}, expected one of {DRIVERS}")
+    if rate and replay_speed:
+        raise ValueError("rate and replay_speed are mutually exclusive")
+
+    retry = RetryPolicy.from_statuses(retries + 1, retry_statuses, budget_ratio=retry_budget) if retries else None
+    stop_event = threading.Event()
+    breaker = CircuitBreaker(stop_event=stop_event) if circuit_breaker else None
+    if pool_size is None:
+        pool_size = max_workers + ((ack_workers or max_workers) if ack_run == PIPELINE else 0)
+    transport = Transport(base_url, tenant_id, pool_size=pool_size, retry=retry, breaker=breaker)
+    token = TokenManager(transport.authenticate, ttl=token_ttl, cache_path=token_cache,
+                         cache_key=f"{base_url}|{tenant_id}").start()
+    store = None
+    validator = compile_schema(reject_path=reject_path or f"{output_csv}.rejects.csv") if validate else None
+    if payload_store:
+        if recompile or not PayloadStore.exists(payload_store):
+            payloads, _ = load_payloads(input_csv, PREFIX_PLACEHOLDER, chunksize, sort, party_prefix, validator)
+            print(f"Compiled {compile_store(payloads, payload_store)} payloads into '{payload_store}'")
+        store = PayloadStore(payload_store, payload_index)
+        rows, total_calls = store.iter_payloads(pre_fix), len(store)
+    else:
+        rows, total_calls = load_payloads(input_csv, pre_fix, chunksize, sort, party_prefix, validator)
+
+    journal = Journal(journal_path or f"{output_csv}.journal", resume=resume)
+    if resume:
+        print(f"↩️ Resuming: {len(journal)} transactions already completed")
+        rows = journal.skip_done(rows)
+        if total_calls is not None:
+            total_calls = max(total_calls - len(journal), 0)
+    payload_log = None
+    if formatted_payloads:
+        payload_log = PayloadLog(formatted_payloads, append=resume)
+        rows = payload_log.tap(rows)
+
+    responses = open_sink(output_csv, output_format, layout=function_values,
+                          journal=journal, append=resume)
+    pacer = None
+    queue_depth = None
+    if rate or replay_speed:
+        if rate:
+            pacer = Pacer.from_spec(rate, stop_event=stop_event)
+        else:
+            pacer = TimestampPacer(replay_speed, max_gap=max_gap, stop_event=stop_event)
+        rows = pacer.apace(rows) if driver == "async" else pacer.pace(rows)
+        queue_depth = max_workers  # submit only when a worker is free, so saturation shows as lag
+    controller = None
+    if adaptive:
+        controller = AimdController(concurrency if driver == "async" else max_workers,
+                                    latency_target=latency_target)
+        controller.publish()
+    start_time = time.time()
+    metrics.reset()
+    monitor_thread = None
+    if monitor:  # ✅ Start TPS tracking thread
+        monitor_thread = metrics.start_tps_monitoring(stop_event, metrics_log, metrics_port)
+    try:
+        if driver == "async":
+            from my_project.async_engine import run_async
+            run_async(rows, token, base_url, concurrency, ack_run,
+                      stop_event, total_calls, responses, controller, retry, breaker, batch_size, batch_linger,
+                      ack_workers, ack_queue, pool_size)
+        else:
+            run_threaded(rows, token, transport, max_workers, ack_run,
+                         stop_event, total_calls, responses, queue_depth, controller, batch_size, batch_linger,
+                         ack_workers, ack_queue)
+    except KeyboardInterrupt:
+        print("\n⛔ Interrupt received. Saving collected results so far...")
+        stop_event.set()
+    finally:
+        responses.close()
+        journal.close()
+        if payload_log is not None:
+            payload_log.close()
+        print(f"\n✅ Done. {len(responses)} responses saved to '{responses.path}'.")
+        if journal.skipped:
+            print(f"↩️ Skipped {journal.skipped} transactions completed by an earlier run")
+        if validator is not None and validator.checked:
+            print(f"🧾 Schema check: {validator.summary()}")
+        totals = metrics.registry.totals()
+        print(f"\n📊 Final TPS (whole-run average): {metrics.average_tps():.2f} | "
+              f"ok {totals['success']} | errors {totals['error']} | acks {totals['ack']} | "
+              f"alert rules {totals['alert_rules']} | retries {totals['retry']}")
+        latency = metrics.latency_summary()
+        print(f"⏲️ Latency over {latency['count']} calls: {format_summary(latency)}")
+        if retry is not None and retry.exhausted:
+            print(f"🔁 Retry budget exhausted {retry.exhausted} times")
+        if breaker is not None and breaker.opened:
+            print(f"⚡ Circuit breaker opened {breaker.opened} times, sends held back {breaker.rejected} times")
+        if pacer is not None:
+            pacer.stats.report()
+        if controller is not None:
+            controller.unpublish()
+            print(f"🎛️ Adaptive concurrency: {controller.summary()}")
+        print(f"⏱️ {total_calls} rows in {time.time() - start_time:.2f} sec ({driver} driver)")
+        stop_event.set()
+        if monitor_thread is not None:
+            monitor_thread.join(timeout=2)  # ⏳ waits for TPS monitor to exit cleanly
+        token.stop()
+        transport.close()
+        if store is not None:
+            store.close()
+    return len(responses)
+
+
+def run_replay(input_csv: str, output_csv: str, shards: int = 1, **options) -> int:
+    """Replay in this process, or across ``shards`` processes (see ``sharding``).
+
+    Takes the same options as ``run`` and returns the number of output rows.
+    """
+    if shards > 1:
+        from my_project.sharding import run_sharded
+        return run_sharded(input_csv, output_csv, shards, **options)
+    return run(input_csv, output_csv, **options)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="my_project", description="Replay transactions against the FRAML API.")
+    parser.add_argument("--input", default="sample.csv", help="input CSV")
+    parser.add_argument("--output", default="output_responses.csv", help="output file (.csv, .jsonl, .parquet or .arrows)")
+    parser.add_argument("--output-format", choices=FORMATS, help="output format (default: from the --output extension)")
+    parser.add_argument("--function-values", choices=LAYOUTS, default="nested",
+                        help="functionValue layout for parquet/arrow output")
+    parser.add_argument("--driver", choices=DRIVERS, default="thread", help="replay engine")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="worker processes, partitioned by sender_hashcode (each runs its own pool)")
+    parser.add_argument("--max-workers", type=int, default=50, help="thread-pool size (thread driver)")
+    parser.add_argument("--concurrency", type=int, default=1000, help="in-flight requests (async driver)")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--tenant-id", default=TENANT_ID)
+    parser.add_argument("--prefix", default=PRE_FIX, help="run prefix for transaction_id")
+    parser.add_argument("--party-prefix", default="", help="prefix for sender/receiver hashcodes (fresh customers per run)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--ack", action="store_true", help="call fraud-ack instead of fraud-alert")
+    mode.add_argument("--pipeline", action="store_true",
+                      help="call fraud-alert then fraud-ack for every transaction, one joined row set each")
+    parser.add_argument("--ack-workers", type=int,
+                        help="--pipeline ack threads / in-flight acks (default: --max-workers / --concurrency)")
+    parser.add_argument("--ack-queue", type=int, help="--pipeline bound on alerts waiting for their ack")
+    parser.add_argument("--chunksize", type=int, help="stream the input N rows at a time")
+    parser.add_argument("--no-sort", dest="sort", action="store_false",
+                        help="replay in file order instead of txn_date_time order")
+    parser.add_argument("--payload-store", help="compiled payload store to replay from (built if missing)")
+    parser.add_argument("--recompile", action="store_true", help="rebuild --payload-store from --input")
+    parser.add_argument("--token-ttl", type=float, default=DEFAULT_TTL,
+                        help="token lifetime in seconds when the server does not report one")
+    parser.add_argument("--token-cache", default=DEFAULT_CACHE, help="file to persist the API token in")
+    parser.add_argument("--no-token-cache", dest="token_cache", action="store_const", const=None,
+                        help="authenticate on every run")
+    parser.add_argument("--rate", help='open-loop rate schedule, e.g. "200" or "100-500:60,500" (TPS[:seconds])')
+    parser.add_argument("--replay-speed", type=float,
+                        help="replay at the original txn_date_time spacing, sped up by this factor")
+    parser.add_argument("--max-gap", type=float, help="cap idle gaps at N source seconds (with --replay-speed)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip transactions completed by an earlier run and append to its output")
+    parser.add_argument("--journal", help="completed-transaction journal (default: <output>.journal)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt the in-flight limit with AIMD (up to --max-workers / --concurrency)")
+    parser.add_argument("--latency-target", type=float,
+                        help="p99 latency in ms the adaptive limit backs off above (default: 2x baseline)")
+    parser.add_argument("--retries", type=int, default=0,
+                        help="extra attempts for connection errors, timeouts and --retry-statuses")
+    parser.add_argument("--retry-statuses", type=lambda text: tuple(int(s) for s in text.split(",")),
+                        default=RETRY_STATUSES, help="comma-separated HTTP statuses to retry")
+    parser.add_argument("--retry-budget", type=float, default=0.1,
+                        help="retries allowed as a fraction of all sends")
+    parser.add_argument("--circuit-breaker", action="store_true",
+                        help="pause sends while most recent calls fail")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="transactions per request to the /batch endpoints (1: no batching)")
+    parser.add_argument("--batch-linger", type=float, default=DEFAULT_LINGER * 1000,
+                        help="ms a partial batch waits for more transactions")
+    parser.add_argument("--metrics-log", default=metrics.TPS_LOG,
+                        help="per-second metrics records (.jsonl, .csv or text)")
+    parser.add_argument("--no-metrics-log", dest="metrics_log", action="store_const", const=None,
+                        help="only print the per-second metrics")
+    parser.add_argument("--metrics-port", type=int, help="serve live metrics on localhost:PORT/metrics")
+    parser.add_argument("--rejects", help="CSV for rows failing the payload schema check (default: <output>.rejects.csv)")
+    parser.add_argument("--no-validate", dest="validate", action="store_false",
+                        help="send every row without the payload schema check")
+    parser.add_argument("--pool-size", type=int,
+                        help="HTTP connections kept open (default: workers, plus --ack-workers with --pipeline)")
+    parser.add_argument("--formatted-payloads", metavar="CSV",
+                        help="record each request envelope sent, one JSON document per row")
+    parser.add_argument("--profile", help="TOML/YAML run profile; command-line flags override it")
+    parser.add_argument("--sweep", action="append", type=_sweep_arg, metavar="OPTION=V1,V2",
+                        help="run once per value (repeat to combine options), e.g. max_workers=10,50,100")
+    parser.add_argument("--report", default="sweep_report.csv", help="comparative report of a sweep")
+    return parser
+
+
+def options_from_args(args) -> dict:
+    """Map parsed command-line arguments to ``run_replay`` keyword arguments."""
+    return dict(
+        input_csv=args.input, output_csv=args.output, shards=args.shards,
+        driver=args.driver, max_workers=args.max_workers,
+        concurrency=args.concurrency, base_url=args.base_url, tenant_id=args.tenant_id,
+        pre_fix=args.prefix, party_prefix=args.party_prefix,
+        ack_run=PIPELINE if args.pipeline else ACK if args.ack else ALERT,
+        chunksize=args.chunksize, sort=args.sort,
+        payload_store=args.payload_store, recompile=args.recompile, token_ttl=args.token_ttl,
+        token_cache=args.token_cache, rate=args.rate,
+        replay_speed=args.replay_speed, max_gap=args.max_gap, output_format=args.output_format,
+        function_values=args.function_values, resume=args.resume, journal_path=args.journal,
+        adaptive=args.adaptive,
+        latency_target=args.latency_target / 1000 if args.latency_target else None,
+        retries=args.retries, retry_statuses=args.retry_statuses, retry_budget=args.retry_budget,
+        circuit_breaker=args.circuit_breaker, batch_size=args.batch_size,
+        batch_linger=args.batch_linger / 1000, metrics_log=args.metrics_log, metrics_port=args.metrics_port,
+        ack_workers=args.ack_workers, ack_queue=args.ack_queue, validate=args.validate,
+        reject_path=args.rejects, pool_size=args.pool_size, formatted_payloads=args.formatted_payloads)
+
+
+def _given_options(argv) -> set:
+    # Parse again with every default suppressed: only flags on the command line remain
+    parser = build_parser()
+    for action in parser._actions:
+        action.default = argparse.SUPPRESS
+    return {_DEST_OPTIONS.get(dest, dest) for dest in vars(parser.parse_args(argv))}
+
+
+def _sweep_arg(text: str):
+    key, sep, values = text.partition("=")
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"expected OPTION=V1,V2,... not {text!r}")
+    return key, [_literal(value) for value in values.split(",")]
+
+
+def _literal(text: str):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def main(argv=None):
+    """Parse arguments and run the replay, or the sweep given by --profile / --sweep.
+
+    Options set in ``--profile`` override the built-in defaults, and flags
+    given on the command line override the profile.
+    """
+    args = build_parser().parse_args(argv)
+    options = options_from_args(args)
+    sweep = {}
+    if args.profile:
+        profile, sweep = load_profile(args.profile)
+        given = _given_options(argv)
+        options.update((key, value) for key, value in profile.items() if key not in given)
+    if args.sweep:
+        sweep.update(normalize_options(dict(args.sweep), sweep=True))
+    if sweep:
+        run_sweep(options, sweep, args.report)
+    else:
+        run_replay(**options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Fixed-schema Arrow tables for rule-alert output.
+
+``process_framl_response`` spreads every ``functionValue`` entry over its own
+``"<name> (type)"`` / ``"<name> (value)"`` column pair, so a CSV of a real
+run has dozens of mostly empty columns. This module folds those back into a
+typed structure with one schema for every run:
+
+``nested``
+    One row per rule alert; ``functionValue`` is a list of
+    ``{name, type, value, text}`` structs.
+``long``
+    One row per rule alert and function value, with ``function_name``,
+    ``function_type``, ``function_value`` and ``function_text`` columns
+    (rules without function values keep one row with nulls). This is the
+    layout to load straight into a ``groupby``.
+
+Low-cardinality strings (``ruleId``, ``ruleName``, ``typologyName``, ...)
+are dictionary-encoded. Requires the optional ``pyarrow`` dependency.
+"""
+
+from my_project.flatten import COLUMN_NAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = None
+
+LAYOUTS = ("nested", "long")
+
+STRING, DICT, FLOAT, INT, BOOL, TIME = "string", "dict", "float", "int", "bool", "time"
+
+# Output columns of process_framl_response (plus ack and error rows) and their types
+COLUMNS = {
+    "transaction_id": STRING,
+    "txn_date_time": TIME,
+    "txn_type": DICT,
+    "sender_hashcode": STRING,
+    "sender_first_name": STRING,
+    "sender_last_name": STRING,
+    "sender_amount": FLOAT,
+    "sender_msisdn": STRING,
+    "sender_incorporation_date": TIME,
+    "receiver_incorporation_date": TIME,
+    "receiver_hashcode": STRING,
+    "receiver_first_name": STRING,
+    "receiver_last_name": STRING,
+    "receiver_amount": FLOAT,
+    "receiver_msisdn": STRING,
+    "ruleId": DICT,
+    "ruleName": DICT,
+    "typologyId": INT,
+    "typologyName": DICT,
+    "ruleTriggered": BOOL,
+    "messageType": DICT,
+    "ack_status": DICT,
+    "error": STRING,
+}
+
+FUNCTION_FIELDS = {"name": DICT, "type": DICT, "value": FLOAT, "text": STRING}
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("columnar output requires pyarrow: pip install my_project[parquet]")
+
+
+def _arrow_type(kind: str):
+    return {
+        STRING: pa.string(),
+        DICT: pa.dictionary(pa.int32(), pa.string()),
+        FLOAT: pa.float64(),
+        INT: pa.int64(),
+        BOOL: pa.bool_(),
+        TIME: pa.timestamp("s", tz="UTC"),
+    }[kind]
+
+
+def schema(layout: str = "nested"):
+    """Return the Arrow schema for a ``functionValue`` layout."""
+    _require_pyarrow()
+    fields = [(name, _arrow_type(kind)) for name, kind in COLUMNS.items()]
+    if layout == "nested":
+        item = pa.struct([(name, _arrow_type(kind)) for name, kind in FUNCTION_FIELDS.items()])
+        fields.append(("functionValue", pa.list_(item)))
+    elif layout == "long":
+        fields += [(f"function_{name}", _arrow_type(kind)) for name, kind in FUNCTION_FIELDS.items()]
+    else:
+        raise ValueError(f"unknown layout {layout!r}, expected one of {LAYOUTS}")
+    return pa.schema(fields)
+
+
+def _float(value):
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value):
+    number = _float(value)
+    return int(number) if number is not None and number.is_integer() else None
+
+
+def _bool(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    text = str(value).strip().lower()
+    return True if text == "true" else False if text == "false" else None
+
+
+def _text(value):
+    return None if value is None or value == "" else str(value)
+
+
+def _entry(name: str, kind, field) -> dict:
+    return {"name": name, "type": _text(kind), "value": _float(field), "text": _text(field)}
+
+
+def function_values(row: dict) -> list:
+    """Collect a flattened row's ``"<name> (type)"`` / ``"<name> (value)"`` columns.
+
+    Returns:
+        ``[{"name", "type", "value", "text"}, ...]`` in column order; ``value``
+        is the numeric field (None if not numeric) and ``text`` the raw field
+    """
+    entries = {}
+    for key, field in row.items():
+        if key in COLUMNS:
+            continue
+        name, slot = COLUMN_NAMES.parse(key)
+        entries.setdefault(name, {})[slot] = field
+    return [_entry(name, entry.get("type"), entry.get("field")) for name, entry in entries.items()]
+
+
+def _column(values: list, kind: str):
+    if kind == FLOAT:
+        return pa.array([_float(v) for v in values], pa.float64())
+    if kind == INT:
+        return pa.array([_int(v) for v in values], pa.int64())
+    if kind == BOOL:
+        return pa.array([_bool(v) for v in values], pa.bool_())
+    strings = pa.array([_text(v) for v in values], pa.string())
+    if kind == DICT:
+        return strings.dictionary_encode()
+    if kind == TIME:
+        parsed = pc.strptime(strings, format=TIME_FORMAT, unit="s", error_is_null=True)
+        return parsed.cast(pa.timestamp("s", tz="UTC"))
+    return strings
+
+
+def to_table(rows: list, layout: str = "nested"):
+    """Convert flattened output rows into a table with the fixed ``schema(layout)``.
+
+    Args:
+        rows: Rows from ``process_framl_response`` (or ack / error rows)
+        layout: ``"nested"`` or ``"long"``
+    """
+    target = schema(layout)
+    functions = [function_values(row) for row in rows]
+    if layout == "long":
+        # Repeat the rule's columns for each function value; rules without any keep one row
+        index, flat = [], []
+        for i, entries in enumerate(functions):
+            for entry in entries or [{}]:
+                index.append(i)
+                flat.append(entry)
+        columns = []
+        for name, kind in COLUMNS.items():
+            columns.append(_column([rows[i].get(name) for i in index], kind))
+        for name, kind in FUNCTION_FIELDS.items():
+            columns.append(_column([entry.get(name) for entry in flat], kind))
+    else:
+        columns = [_column([row.get(name) for row in rows], kind) for name, kind in COLUMNS.items()]
+        columns.append(pa.array(functions, target.field("functionValue").type))
+    return pa.Table.from_arrays(columns, schema=target)
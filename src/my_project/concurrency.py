@@ -0,0 +1,159 @@
+"""AIMD adaptive concurrency control.
+
+Rather than a fixed worker or in-flight count, ``AimdController`` finds the
+concurrency the server can absorb. It starts low and adds ``increase`` to
+the limit after every interval in which the limit was the bottleneck, with
+no congestion errors and p99 latency on target. When the p99 or the share
+of throttled (429) and server-error (5xx) calls shows congestion, it
+multiplies the limit by ``decrease``. That is the additive-increase /
+multiplicative-decrease rule TCP uses for its congestion window. Other
+errors, such as client errors, bad responses or an open circuit breaker,
+say nothing about load and are ignored.
+
+Both drivers feed it from their single completion path (the dispatcher loop
+for threads, the event loop for asyncio), so it needs no locking. Its limit
+and latest decision are published as monitor gauges.
+"""
+
+import re
+import time
+from typing import NamedTuple
+
+from my_project import metrics
+
+
+class Decision(NamedTuple):
+    """One control step."""
+
+    time: float
+    limit: int
+    reason: str
+    p99_ms: float
+    error_rate: float
+
+
+# Error rows of calls the server answered start with the status:
+# "503 Server Error: ..." (requests), "503, message=..." (aiohttp), "503 ..." (batch items)
+_STATUS = re.compile(r"(\d{3})\b")
+
+
+def congested(rows) -> bool:
+    """True if a call failed outright with a throttling (429) or server-error (5xx) status.
+
+    Args:
+        rows: The call's output rows; a batch only counts when every item failed
+    """
+    if not rows or not all(row.get("error") for row in rows):
+        return False
+    match = _STATUS.match(str(rows[0]["error"]))
+    return match is not None and (match[1] == "429" or match[1].startswith("5"))
+
+
+class AimdController:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    Args:
+        max_limit: Upper bound, e.g. the thread-pool size or connection limit
+        initial: Starting limit
+        min_limit: Lower bound
+        increase: Added to the limit after a healthy, saturated interval
+        decrease: Factor applied to the limit on congestion
+        latency_target: p99 latency in seconds above which the server counts
+            as congested; None derives it as ``tolerance`` times the best
+            p99 seen in an error-free interval
+        tolerance: Multiple of the baseline p99 used when deriving the target
+        error_threshold: Fraction of throttled or server-error calls in an
+            interval that counts as congestion
+        interval: Seconds between control decisions
+    """
+
+    def __init__(self, max_limit: int, initial: int = None, min_limit: int = 1, increase: int = 1,
+                 decrease: float = 0.5, latency_target: float = None, tolerance: float = 2.0,
+                 error_threshold: float = 0.01, interval: float = 1.0):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = min(max(initial or min(10, max_limit), min_limit), max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.tolerance = tolerance
+        self.error_threshold = error_threshold
+        self.interval = interval
+        self.baseline = None
+        self.history = []
+        self._reset_interval(time.monotonic())
+
+    def _reset_interval(self, now: float):
+        self._started = now
+        self._latencies = []
+        self._errors = 0
+        self._saturated = False
+
+    @property
+    def target(self):
+        """Current p99 latency target in seconds, or None before a baseline exists."""
+        if self.latency_target is not None:
+            return self.latency_target
+        return self.baseline * self.tolerance if self.baseline is not None else None
+
+    @property
+    def last_reason(self) -> str:
+        return self.history[-1].reason if self.history else "start"
+
+    def saturated(self):
+        """Note that the dispatcher had work waiting on the limit."""
+        self._saturated = True
+
+    def observe(self, latency: float, ok: bool):
+        """Record one completed call.
+
+        Args:
+            latency: Seconds from dispatch to completion
+            ok: False if the call was throttled or hit a server error
+                (see ``congested``)
+        """
+        self._latencies.append(latency)
+        if not ok:
+            self._errors += 1
+        now = time.monotonic()
+        if now - self._started >= self.interval:
+            self.update(now)
+
+    def update(self, now: float = None) -> Decision:
+        """Close the current interval and adjust the limit."""
+        now = time.monotonic() if now is None else now
+        latencies = sorted(self._latencies)
+        count = len(latencies)
+        p99 = latencies[min(count - 1, int(count * 0.99))] if count else 0.0
+        error_rate = self._errors / count if count else 0.0
+        if count and self._errors == 0 and (self.baseline is None or p99 < self.baseline):
+            self.baseline = p99
+
+        target = self.target
+        if count and error_rate > self.error_threshold:
+            self.limit, reason = max(self.min_limit, int(self.limit * self.decrease)), "errors"
+        elif count and target is not None and p99 > target:
+            self.limit, reason = max(self.min_limit, int(self.limit * self.decrease)), "latency"
+        elif self._saturated and self.limit < self.max_limit:
+            self.limit, reason = min(self.max_limit, self.limit + self.increase), "increase"
+        else:
+            reason = "hold"
+        decision = Decision(time.time(), self.limit, reason, round(p99 * 1000, 3), round(error_rate, 4))
+        self.history.append(decision)
+        self._reset_interval(now)
+        return decision
+
+    def publish(self):
+        """Show the limit and last decision in the TPS monitor."""
+        metrics.gauges["limit"] = lambda: f"{self.limit} ({self.last_reason})"
+
+    def unpublish(self):
+        metrics.gauges.pop("limit", None)
+
+    def summary(self) -> dict:
+        """Return the final limit and how often each decision was taken."""
+        counts = {}
+        for decision in self.history:
+            counts[decision.reason] = counts.get(decision.reason, 0) + 1
+        return {"limit": self.limit, "max_limit": self.max_limit, "decisions": counts,
+                "latency_target_ms": round(self.target * 1000, 3) if self.target is not None else None}
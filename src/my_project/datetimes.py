@@ -0,0 +1,136 @@
+"""Format-sniffing datetime parsing for CSV columns.
+
+Instead of trying every format on every cell, ``DatetimeParser`` samples a
+column, detects the dominant format and parses the whole column with it in
+one vectorized ``pd.to_datetime`` call. Only cells that format rejects (the
+residue) are retried with the other formats, and only what is still left goes
+to pandas' per-cell inference. The detected format is cached per column, so
+later chunks of a streamed file skip detection.
+
+The supported formats are mutually exclusive (no string matches two of
+them), so the result is the same as trying them in order per cell.
+"""
+
+import threading
+
+import pandas as pd
+
+FORMATS = [
+    "%Y-%m-%dT%H:%M:%S.%fZ",  # ISO format with milliseconds: 2025-07-01T00:10:00.000Z
+    "%Y-%m-%dT%H:%M:%SZ",     # ISO format without milliseconds: 2025-07-01T00:10:00Z
+    "%Y-%m-%dT%H:%M:%S",      # ISO format without Z: 2025-07-01T00:10:00
+    "%m/%d/%Y %I:%M %p",      # Original format: 7/1/2025 12:10 AM
+    "%Y-%m-%d %H:%M:%S",      # Standard format: 2025-07-01 00:10:00
+    "%d/%m/%Y %H:%M:%S",      # European format: 01/07/2025 00:10:00
+]
+
+MISSING = ("", "NA", "nan", "NaN", "None")
+
+
+def _to_naive(parsed: pd.Series) -> pd.Series:
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+    return parsed.astype("datetime64[ns]")
+
+
+def _try_format(values: pd.Series, fmt: str) -> pd.Series:
+    return pd.to_datetime(values, format=fmt, errors="coerce")
+
+
+def sniff_format(values: pd.Series, formats=FORMATS, sample_size: int = 200):
+    """Return the format matching most of a sample of ``values``.
+
+    Args:
+        values: Non-blank string cells
+        formats: Candidate ``strptime`` formats
+        sample_size: Cells sampled from the head of the column
+
+    Returns:
+        The best format, or None if no format matches any sampled cell
+    """
+    sample = values.head(sample_size)
+    best, best_hits = None, 0
+    for fmt in formats:
+        hits = int(_try_format(sample, fmt).notna().sum())
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+    return best
+
+
+class DatetimeParser:
+    """Vectorized column parser with a per-column format cache.
+
+    Args:
+        formats: Candidate ``strptime`` formats
+        infer: Fall back to pandas' per-cell inference for cells no format
+            matches; otherwise they become NaT
+        sample_size: Cells sampled when detecting a column's format
+    """
+
+    def __init__(self, formats=FORMATS, infer: bool = True, sample_size: int = 200):
+        self.formats = list(formats)
+        self.infer = infer
+        self.sample_size = sample_size
+        self.cache = {}
+        self._lock = threading.Lock()
+
+    def _format_for(self, column, values: pd.Series):
+        fmt = self.cache.get(column) if column is not None else None
+        if fmt is None:
+            fmt = sniff_format(values, self.formats, self.sample_size)
+            if column is not None and fmt is not None:
+                with self._lock:
+                    self.cache[column] = fmt
+        return fmt
+
+    def parse(self, series: pd.Series, column=None) -> pd.Series:
+        """Parse a column to naive datetimes.
+
+        Args:
+            series: Column of date strings; blank and ``"NA"`` cells give NaT
+            column: Cache key, normally the column name; None disables caching
+
+        Returns:
+            datetime64 column aligned with ``series``
+        """
+        result = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+        values = series.astype(str).str.strip()
+        values = values[series.notna() & ~values.isin(MISSING)]
+        if values.empty:
+            return result
+
+        fmt = self._format_for(column, values)
+        remaining = values
+        if fmt is not None:
+            parsed = _try_format(remaining, fmt)
+            hit = parsed.notna()
+            result.loc[hit.index[hit]] = _to_naive(parsed[hit])
+            remaining = remaining[~hit]
+            # The cached format stopped fitting (e.g. a new file layout): re-detect next time
+            if column is not None and hit.sum() * 2 < len(values):
+                with self._lock:
+                    self.cache.pop(column, None)
+
+        for other in self.formats:
+            if remaining.empty:
+                break
+            if other == fmt:
+                continue
+            parsed = _try_format(remaining, other)
+            hit = parsed.notna()
+            result.loc[hit.index[hit]] = _to_naive(parsed[hit])
+            remaining = remaining[~hit]
+
+        if self.infer:
+            for idx, value in remaining.items():
+                try:
+                    parsed = pd.Timestamp(pd.to_datetime(value))
+                except (ValueError, TypeError, OverflowError):
+                    print(f"Warning: Could not parse datetime: {value}")
+                    continue
+                if parsed.tzinfo is not None:
+                    parsed = parsed.tz_convert("UTC").tz_localize(None)
+                result.loc[idx] = parsed
+        return result
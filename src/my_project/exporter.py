@@ -0,0 +1,256 @@
+"""Structured metrics time series and a live scrape endpoint.
+
+The TPS monitor produces one record per second: rates, totals, interval
+latency percentiles, in-flight requests and the client's own CPU and RSS.
+``MetricsExporter`` appends those records to a JSONL, CSV or plain-text
+file. It keeps one file handle open for the whole run, and a background
+thread writes and flushes it, so a slow disk never holds up the monitor.
+
+``MetricsServer`` serves the latest record in the Prometheus text format on
+``/metrics``, for a live dashboard during a load test:
+
+    python -m my_project.cli --input sample.csv --metrics-port 9108
+    curl localhost:9108/metrics
+
+CPU and RSS come from ``psutil`` when installed, and otherwise from
+``os.times`` and ``/proc/self/statm`` (peak RSS from ``resource`` where
+there is no ``/proc``).
+"""
+
+import csv
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not on Windows
+    resource = None
+
+FORMATS = ("jsonl", "csv", "text")
+FLUSH_INTERVAL = 5.0
+
+_EXTENSIONS = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv"}
+_CLOSE = object()
+
+
+def format_for(path: str) -> str:
+    """Infer the metrics log format from a file extension (plain text if unknown)."""
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), "text")
+
+
+class ProcessStats:
+    """CPU and memory use of the current process between samples."""
+
+    def __init__(self):
+        self._process = psutil.Process() if psutil is not None else None
+        if self._process is not None:
+            self._process.cpu_percent(None)  # first call only sets the baseline
+        self._cpu = self._cpu_seconds()
+        self._wall = time.monotonic()
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        times = os.times()
+        return times.user + times.system
+
+    def rss_bytes(self):
+        """Current resident set size, or the peak where only that is known (None if unknown)."""
+        if self._process is not None:
+            return self._process.memory_info().rss
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError, AttributeError):
+            pass
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+        return None
+
+    def sample(self) -> dict:
+        """Return ``cpu_percent`` (since the previous sample; 100 = one core) and ``rss_mb``."""
+        if self._process is not None:
+            cpu = self._process.cpu_percent(None)
+        else:
+            now, cpu_seconds = time.monotonic(), self._cpu_seconds()
+            elapsed = now - self._wall
+            cpu = 100 * (cpu_seconds - self._cpu) / elapsed if elapsed > 0 else 0.0
+            self._wall, self._cpu = now, cpu_seconds
+        rss = self.rss_bytes()
+        return {"cpu_percent": round(cpu, 1), "rss_mb": round(rss / 2**20, 1) if rss is not None else None}
+
+
+class MetricsExporter:
+    """Append metrics records to a file from a background writer thread.
+
+    Args:
+        path: Output file, appended to if it exists
+        fmt: ``"jsonl"``, ``"csv"`` or ``"text"``; inferred from ``path`` if None
+        flush_interval: Seconds between flushes to disk
+        format_line: Renders a record as one line for the ``text`` format
+    """
+
+    def __init__(self, path: str, fmt: str = None, flush_interval: float = FLUSH_INTERVAL,
+                 format_line=None):
+        self.path = path
+        self.fmt = fmt or format_for(path)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"unknown metrics format {self.fmt!r}, expected one of {FORMATS}")
+        self.flush_interval = flush_interval
+        self.format_line = format_line or (lambda record: " | ".join(f"{k} {v}" for k, v in record.items()))
+        self.written = 0
+        self._fieldnames = self._existing_header() if self.fmt == "csv" else None
+        self._file = open(path, "a", newline="" if self.fmt == "csv" else None, buffering=1 << 16)
+        self._csv = None
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_loop, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def _existing_header(self):
+        try:
+            with open(self.path, newline="") as f:
+                return next(csv.reader(f), None)
+        except OSError:
+            return None
+
+    def write(self, record: dict):
+        """Queue a record; never blocks on the disk."""
+        self._queue.put(record)
+
+    def _write_record(self, record: dict):
+        if self.fmt == "jsonl":
+            self._file.write(json.dumps(record, default=str) + "\n")
+        elif self.fmt == "csv":
+            if self._csv is None:
+                header = self._fieldnames is None
+                self._fieldnames = self._fieldnames or list(record)
+                self._csv = csv.DictWriter(self._file, self._fieldnames, extrasaction="ignore")
+                if header:
+                    self._csv.writeheader()
+            self._csv.writerow(record)
+        else:
+            self._file.write(f"{record.get('time', '')} - {self.format_line(record)}\n")
+        self.written += 1
+
+    def _write_loop(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                record = self._queue.get(timeout=max(next_flush - time.monotonic(), 0.01))
+            except queue.Empty:
+                record = None
+            if record is _CLOSE:
+                break
+            if record is not None:
+                try:
+                    self._write_record(record)
+                except Exception as e:
+                    print(f"⚠️ Metrics log write failed: {e}")
+            if time.monotonic() >= next_flush:
+                self._file.flush()
+                next_flush = time.monotonic() + self.flush_interval
+        self._file.flush()
+
+    def close(self):
+        """Write out every queued record and close the file."""
+        if self._file.closed:
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _metric_name(key: str) -> str:
+    return "framl_" + re.sub(r"[^a-zA-Z0-9_]", "_", key)
+
+
+def render_prometheus(record: dict, counters=()) -> str:
+    """Render the numeric fields of a record in the Prometheus text exposition format.
+
+    Fields named in ``counters`` become ``framl_<name>_total`` counters; the
+    rest are gauges. Non-numeric fields (time, gauge strings) are skipped.
+    """
+    lines = []
+    for key, value in record.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if key in counters:
+            name, kind = _metric_name(key) + "_total", "counter"
+        else:
+            name, kind = _metric_name(key), "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_prometheus(self.server.latest, self.server.counters).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Serve the latest metrics record on ``/metrics`` for Prometheus-style scrapers.
+
+    Args:
+        port: Port to bind; 0 picks a free port
+        host: Interface to bind; local only by default
+        counters: Record fields exported as monotonically increasing counters
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int, host: str = "127.0.0.1", counters=()):
+        super().__init__((host, port), _MetricsHandler)
+        self.counters = tuple(counters)
+        self.latest = {}
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def update(self, record: dict):
+        """Publish a new record to scrapers."""
+        self.latest = record
+
+    def start(self) -> "MetricsServer":
+        """Serve in a background thread and return self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
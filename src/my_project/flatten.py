@@ -0,0 +1,108 @@
+"""Fast flattening of fraud-alert responses.
+
+A fraud-alert response has one transaction and dozens of rule alerts. The
+original flattening rebuilt the same 15 transaction fields for every rule and
+formatted ``"<name> (type)"`` / ``"<name> (value)"`` strings for every
+``functionValue`` entry. This module does the transaction part once per
+response and interns the function-value column names. The set of names is
+small and fixed per deployment, so each name is formatted only once per
+process.
+
+``flatten_response`` returns the same row dicts as before, and
+``COLUMN_NAMES`` lets ``columnar`` map the interned columns back to their
+function values without suffix-parsing every key.
+"""
+
+import sys
+
+TXN_FIELDS = (
+    "transaction_id", "txn_date_time", "txn_type", "sender_hashcode", "sender_first_name",
+    "sender_last_name", "sender_amount", "sender_msisdn", "sender_incorporation_date",
+    "receiver_incorporation_date", "receiver_hashcode", "receiver_first_name", "receiver_last_name",
+    "receiver_amount", "receiver_msisdn",
+)
+RULE_FIELDS = ("ruleId", "ruleName", "typologyId", "typologyName", "ruleTriggered", "messageType")
+BASE_COLUMNS = TXN_FIELDS + RULE_FIELDS
+
+TYPE_SUFFIX = " (type)"
+VALUE_SUFFIX = " (value)"
+
+
+class ColumnNames:
+    """Interned ``functionValue`` column names, both directions.
+
+    ``pair(name)`` gives the ``(type, value)`` columns of a function value,
+    and ``parse(column)`` maps a column back to ``(name, slot)``, with slot
+    ``"type"`` or ``"field"``.
+    """
+
+    def __init__(self):
+        self._pairs = {}
+        self._parsed = {name: None for name in BASE_COLUMNS}
+
+    def pair(self, name: str) -> tuple:
+        pair = self._pairs.get(name)
+        if pair is None:
+            pair = self._pairs[name] = (sys.intern(name + TYPE_SUFFIX), sys.intern(name + VALUE_SUFFIX))
+            self._parsed[pair[0]] = (name, "type")
+            self._parsed[pair[1]] = (name, "field")
+        return pair
+
+    def parse(self, column: str):
+        """Return ``(name, slot)`` for a function-value column, or None for any other column."""
+        try:
+            return self._parsed[column]
+        except KeyError:
+            pass
+        if column.endswith(TYPE_SUFFIX):
+            self.pair(column[:-len(TYPE_SUFFIX)])
+        else:
+            # A bare value column (non-dict functionValue entry) is the field itself
+            name = column[:-len(VALUE_SUFFIX)] if column.endswith(VALUE_SUFFIX) else column
+            self.pair(name)
+            self._parsed[column] = (name, "field")
+        return self._parsed[column]
+
+    def mark_plain(self, column: str):
+        """Register a non-function column such as ``error`` or ``ack_status``."""
+        self._parsed.setdefault(column, None)
+
+
+COLUMN_NAMES = ColumnNames()
+for _column in ("ack_status", "error"):
+    COLUMN_NAMES.mark_plain(_column)
+
+
+def flatten_response(json_response: dict) -> list:
+    """Flatten a fraud-alert response into one row dict per rule alert.
+
+    Same output as the original ``process_framl_response``: transaction
+    fields, rule fields, then ``"<name> (type)"`` / ``"<name> (value)"``
+    columns per ``functionValue`` entry.
+    """
+    alert = json_response["alert"]
+    txn_info = alert["txn"]
+    get = txn_info.get
+    prefix = {field: get(field) for field in TXN_FIELDS}
+    pair = COLUMN_NAMES.pair
+    rows = []
+    for rule in alert["ruleAlert"]:
+        row = prefix.copy()
+        rule_get = rule.get
+        row["ruleId"] = rule_get("ruleId")
+        row["ruleName"] = rule_get("ruleName")
+        row["typologyId"] = rule_get("typologyId")
+        row["typologyName"] = rule_get("typologyName")
+        row["ruleTriggered"] = rule_get("ruleTriggered")
+        row["messageType"] = rule_get("messageType")
+        functions = rule_get("functionValue")
+        if functions:
+            for name, value in functions.items():
+                type_column, value_column = pair(name)
+                if isinstance(value, dict):
+                    row[type_column] = value.get("type")
+                    row[value_column] = value.get("field")
+                else:
+                    row[value_column] = value
+        rows.append(row)
+    return rows
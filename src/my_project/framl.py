@@ -0,0 +1,161 @@
+"""FRAML payload normalization and response flattening.
+
+Shared by every driver so thread, async and later runs produce identical
+payloads and output rows.
+"""
+
+import ast
+from datetime import datetime, timedelta
+
+from my_project.flatten import flatten_response
+
+PRE_FIX = "rcbc01"
+
+# Fields from sample.csv that should be set to "NA" if missing/empty
+# (excluding transaction_id as specified)
+STRING_FIELDS_TO_CHECK = [
+    'source_of_funds', 'txn_type_code', 'txn_type', 'sender_currency',
+    'sender_country', 'sender_city', 'receiver_type',
+    'receiver_currency', 'receiver_country', 'external_id',
+    'sender_advance_hashcode', 'txn_status', 'receiver_advance_hashcode', 'sender_first_name',
+    'sender_last_name', 'sender_address', 'receiver_first_name', 'receiver_last_name',
+    'receiver_address', 'external_code', 'sending_partner_code', 'receiving_partner_code',
+    'receiver_msisdn', 'sender_msisdn'
+]
+
+NUMERICAL_FIELDS_TO_CHECK = [
+    'sender_amount', 'sender_amount_usd', 'receiver_amount'
+]
+
+DATE_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S.%fZ",  # ISO with milliseconds
+    "%Y-%m-%dT%H:%M:%SZ",     # ISO without milliseconds
+    "%Y-%m-%dT%H:%M:%S",      # ISO without Z
+    "%m/%d/%Y %I:%M %p",      # Original format
+    "%Y-%m-%d %H:%M:%S",      # Standard format
+]
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _is_missing(payload: dict, field: str) -> bool:
+    return field not in payload or payload[field] == "" or payload[field] is None or str(payload[field]).strip() == ""
+
+
+# Last format that worked per column, tried first next time: a file almost
+# always uses one format per column, so most cells parse on the first
+# strptime attempt. Workers share it, but it only orders the attempts, so a
+# stale entry costs a retry, never a wrong date.
+_last_format = {}
+
+
+def _parse_date(value: str, field: str):
+    first = _last_format.get(field, DATE_FORMATS[0])
+    for fmt in [first] + [f for f in DATE_FORMATS if f != first]:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt != first:
+            _last_format[field] = fmt
+        return parsed
+    return None
+
+
+def prepare_payload(row_dict: dict, pre_fix: str = PRE_FIX, party_prefix: str = "") -> dict:
+    """Normalize one preprocessed CSV row into a fraud-alert payload.
+
+    Args:
+        row_dict: Row from ``read_and_preprocess_csv``
+        pre_fix: Run prefix prepended to ``transaction_id``
+        party_prefix: Prefix for ``sender_hashcode`` / ``receiver_hashcode``,
+            so each run sees fresh customers
+
+    Returns:
+        New payload dict; ``row_dict`` is left untouched
+    """
+    payload = row_dict.copy()
+
+    # Handle missing data for all string fields (set to "NA" if empty/missing)
+    for field in STRING_FIELDS_TO_CHECK:
+        if _is_missing(payload, field):
+            payload[field] = "NA"
+
+    # Handle missing data for all numerical fields (set to 0 if empty/missing)
+    for field in NUMERICAL_FIELDS_TO_CHECK:
+        if _is_missing(payload, field):
+            payload[field] = 0.0
+
+    # Special handling for transaction_id and external_code (string conversion)
+    for field in ["transaction_id", "external_code"]:
+        if field in payload and payload[field] != "":
+            payload[field] = f'{payload[field]}'
+
+    # Handle transaction_id prefix
+    if payload.get("transaction_id") and payload["transaction_id"] != "NA":
+        payload["transaction_id"] = pre_fix + "Txn" + str(payload["transaction_id"])
+
+    # Handle sender_hashcode / receiver_hashcode or set to NA
+    for field in ["sender_hashcode", "receiver_hashcode"]:
+        if not (payload.get(field) and payload[field] != "NA" and payload[field] != ""):
+            payload[field] = "NA"
+        elif party_prefix:
+            payload[field] = party_prefix + str(payload[field])
+
+    # Handle datetime fields - set to "NA" if missing, otherwise parse and format
+    incorporation_date = "NA"  # Default fallback
+
+    if "txn_date_time" in payload and payload["txn_date_time"] != "NA" and payload["txn_date_time"] != "":
+        parsed_dt = _parse_date(payload["txn_date_time"], "txn_date_time")
+        if parsed_dt:
+            payload["txn_date_time"] = parsed_dt.strftime(ISO_FORMAT)
+            incorporation_date = (parsed_dt - timedelta(days=7)).strftime(ISO_FORMAT)
+        else:
+            print(f"Could not parse txn_date_time for transaction {payload.get('transaction_id')}: {payload['txn_date_time']}")
+            payload["txn_date_time"] = "NA"
+    else:
+        payload["txn_date_time"] = "NA"
+
+    for field in ["sender_incorporation_date", "receiver_incorporation_date"]:
+        if field in payload and payload[field] != "NA" and payload[field] != "":
+            parsed_dt = _parse_date(payload[field], field)
+            if parsed_dt:
+                payload[field] = parsed_dt.strftime(ISO_FORMAT)
+            else:
+                print(f"Could not parse {field} for transaction {payload.get('transaction_id')}")
+                payload[field] = incorporation_date
+        else:
+            payload[field] = incorporation_date
+
+    # Handle intermediary field - set to default structure if missing
+    if "intermediary" not in payload or payload["intermediary"] == "NA" or payload["intermediary"] == "":
+        payload["intermediary"] = [{"hashcode": ""}]
+    elif isinstance(payload.get("intermediary"), str):
+        try:
+            payload["intermediary"] = ast.literal_eval(payload["intermediary"])
+        except Exception as e:
+            print(f"Error parsing intermediary for {payload.get('transaction_id')}: {e}")
+            payload["intermediary"] = [{"hashcode": ""}]
+
+    return payload
+
+
+def transaction_id_of(payload, default: str = "UNKNOWN") -> str:
+    """Return the transaction id of a payload dict or pre-encoded payload."""
+    if isinstance(payload, dict):
+        return payload.get("transaction_id", default)
+    return getattr(payload, "transaction_id", None) or default
+
+
+# Extract rule alerts
+def process_framl_response(json_response: dict) -> list:
+    """Flatten a fraud-alert response into one row per rule alert.
+
+    Args:
+        json_response: Decoded fraud-alert response
+
+    Returns:
+        List of row dicts; ``functionValue`` entries become
+        ``"<name> (type)"`` / ``"<name> (value)"`` columns (see ``flatten``)
+    """
+    return flatten_response(json_response)
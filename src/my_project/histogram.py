@@ -0,0 +1,160 @@
+"""HDR-style latency histograms.
+
+``Histogram`` uses the HdrHistogram bucket layout: values (integer
+microseconds) below 256 get their own bucket, and above that every power of
+two is split into 128 linear sub-buckets, so any recorded value is known to
+within 1% whatever its magnitude. Recording is an index computation and a
+list increment, and two histograms merge by adding their counts.
+
+``LatencyRecorder`` gives every recording thread its own histogram, so
+workers never contend on a lock. Readers merge the per-thread histograms.
+Interval views are the difference between two cumulative snapshots, which
+loses no samples however the recording and reporting threads interleave.
+"""
+
+import math
+import threading
+
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS   # 256
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1  # 128
+MAX_SHIFT = 29                           # covers up to ~2**37 us (about 38 hours)
+BUCKETS = SUB_BUCKET_COUNT + MAX_SHIFT * SUB_BUCKET_HALF
+MAX_VALUE = (SUB_BUCKET_COUNT << MAX_SHIFT) - 1
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _index(value: int) -> int:
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def _highest_equivalent(index: int) -> int:
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift, sub = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+    shift += 1
+    return ((sub + SUB_BUCKET_HALF + 1) << shift) - 1
+
+
+class Histogram:
+    """Latency histogram with ~1% value precision, in microseconds."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds: float):
+        """Record one latency given in seconds."""
+        value = min(max(int(seconds * 1_000_000), 0), MAX_VALUE)
+        self.counts[_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def copy(self) -> "Histogram":
+        other = Histogram()
+        other.counts = list(self.counts)  # a single C-level copy; safe against concurrent record()
+        other.count, other.total, other.max = sum(other.counts), self.total, self.max
+        return other
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """Add ``other``'s samples to this histogram and return it."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    def subtract(self, earlier: "Histogram") -> "Histogram":
+        """Return the samples recorded since the ``earlier`` snapshot."""
+        diff = Histogram()
+        diff.counts = [a - b for a, b in zip(self.counts, earlier.counts)]
+        diff.count = self.count - earlier.count
+        diff.total = self.total - earlier.total
+        top = next((i for i in range(BUCKETS - 1, -1, -1) if diff.counts[i]), None)
+        diff.max = min(_highest_equivalent(top), self.max) if top is not None else 0
+        return diff
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Return the value (microseconds) at or below which ``percentile``% of samples fall."""
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(self.count * percentile / 100.0))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(_highest_equivalent(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Return count, mean, p50/p90/p99/p99.9 and max in milliseconds."""
+        result = {"count": self.count,
+                  "mean_ms": round(self.total / self.count / 1000, 3) if self.count else 0.0}
+        for p in PERCENTILES:
+            result[f"p{p:g}_ms"] = round(self.value_at_percentile(p) / 1000, 3)
+        result["max_ms"] = round(self.max / 1000, 3)
+        return result
+
+
+def format_summary(summary: dict) -> str:
+    """Render ``Histogram.summary`` as a single log line."""
+    return " ".join(f"{key[:-3]}={value}ms" for key, value in summary.items() if key.endswith("_ms"))
+
+
+class LatencyRecorder:
+    """Per-thread latency histograms that merge on read."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._histograms = []
+        self._lock = threading.Lock()
+        self._last = Histogram()
+
+    def _histogram(self) -> Histogram:
+        histogram = getattr(self._local, "histogram", None)
+        if histogram is None:
+            histogram = self._local.histogram = Histogram()
+            with self._lock:
+                self._histograms.append(histogram)
+        return histogram
+
+    def record(self, seconds: float):
+        """Record one latency on the calling thread's histogram."""
+        self._histogram().record(seconds)
+
+    def snapshot(self) -> Histogram:
+        """Return all samples recorded so far, merged across threads."""
+        with self._lock:
+            histograms = list(self._histograms)
+        merged = Histogram()
+        for histogram in histograms:
+            merged.merge(histogram.copy())
+        return merged
+
+    def merge(self, histogram: Histogram):
+        """Add samples recorded elsewhere, e.g. in another process, to the calling thread's histogram."""
+        self._histogram().merge(histogram)
+
+    def interval(self) -> Histogram:
+        """Return the samples recorded since the previous ``interval`` call."""
+        current = self.snapshot()
+        diff = current.subtract(self._last)
+        self._last = current
+        return diff
+
+    def reset(self):
+        """Drop all samples (e.g. between runs in one process)."""
+        with self._lock:
+            self._histograms = []
+            self._local = threading.local()
+            self._last = Histogram()
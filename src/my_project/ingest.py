@@ -0,0 +1,207 @@
+"""CSV ingestion for replay runs.
+
+``read_and_preprocess_csv`` loads and sorts the whole file in memory.
+``iter_preprocessed_rows`` streams it in chunks instead, so memory stays flat
+regardless of file size; with ``sort=True`` it orders rows by
+``txn_date_time`` through an external merge sort over temporary run files.
+"""
+
+import heapq
+import os
+import pickle
+import tempfile
+from functools import partial
+
+import pandas as pd
+
+from my_project.datetimes import DatetimeParser
+from my_project.normalize import normalize_frame
+
+SORT_COLUMN = "txn_date_time_sortable"
+
+# Detected txn_date_time format is cached here for the whole run
+SORT_PARSER = DatetimeParser()
+
+
+def add_sort_key(df):
+    """Add the ``txn_date_time_sortable`` helper column used for ordering."""
+    df[SORT_COLUMN] = SORT_PARSER.parse(df["txn_date_time"], "txn_date_time")
+    return df
+
+
+def preprocess_frame(df):
+    """
+    Clean a raw CSV frame (or chunk) for API consumption.
+
+    Args:
+        df (pandas.DataFrame): Frame as returned by ``pd.read_csv``
+
+    Returns:
+        pandas.DataFrame: Frame with NaN filled, duplicate columns dropped and
+        string columns stripped
+    """
+    # Replace NaN with empty strings
+    df = df.fillna("")
+
+    # Handle duplicate column names (like receiver_incorporation_date appearing twice)
+    # Remove duplicate columns by keeping the last occurrence
+    df = df.loc[:, ~df.columns.duplicated(keep='last')]
+
+    # Strip whitespace from all string columns
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        df[col] = df[col].astype(str).str.strip()
+
+    # Replace empty strings back to actual empty strings (not "nan")
+    return df.replace(['nan', 'NaN', 'None'], '')
+
+
+def read_and_preprocess_csv(csv_file_path):
+    """
+    Read CSV file and preprocess the data for API consumption.
+
+    Args:
+        csv_file_path (str): Path to the input CSV file
+
+    Returns:
+        pandas.DataFrame: Preprocessed DataFrame ready for API calls
+    """
+    # Read the CSV file
+    df = pd.read_csv(csv_file_path)
+
+    # Step 1: Convert to datetime using flexible parsing for sorting
+    df = add_sort_key(df.fillna(""))
+
+    # Step 2: Sort by the datetime (NaT values will be placed at the end)
+    df = df.sort_values(by=SORT_COLUMN, na_position='last').reset_index(drop=True)
+
+    # Step 3: Drop the helper column after sorting
+    df = preprocess_frame(df.drop(columns=[SORT_COLUMN]))
+
+    print(f"Successfully preprocessed {len(df)} rows from {csv_file_path}")
+    print(f"Columns found: {list(df.columns)}")
+
+    return df
+
+
+def _row_key(timestamp, seq: int) -> tuple:
+    # NaT sorts last; seq keeps equal timestamps in file order
+    if timestamp is None or pd.isna(timestamp):
+        return (1, 0, seq)
+    return (0, pd.Timestamp(timestamp).value, seq)
+
+
+def _write_run(chunk, start_seq: int, run_dir: str, run_index: int, transform) -> str:
+    keys = [_row_key(ts, start_seq + i) for i, ts in enumerate(chunk[SORT_COLUMN])]
+    records = transform(preprocess_frame(chunk.drop(columns=[SORT_COLUMN]))).to_dict("records")
+    path = os.path.join(run_dir, f"run-{run_index:05d}.pkl")
+    with open(path, "wb") as run_file:
+        for key, record in sorted(zip(keys, records), key=lambda item: item[0]):
+            pickle.dump((key, record), run_file, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path: str):
+    with open(path, "rb") as run_file:
+        while True:
+            try:
+                yield pickle.load(run_file)
+            except EOFError:
+                return
+
+
+def _identity(df):
+    return df
+
+
+def iter_preprocessed_rows(csv_file_path, chunksize: int = 50_000, sort: bool = False,
+                           tmp_dir: str = None, transform=None):
+    """Stream preprocessed rows from a CSV without loading the whole file.
+
+    Args:
+        csv_file_path: Path to the input CSV file
+        chunksize: Rows read (and, when sorting, sorted in memory) per chunk
+        sort: Order rows by ``txn_date_time`` (NaT last) with an external
+            merge sort; otherwise rows are yielded in file order
+        tmp_dir: Directory for sorted run files; defaults to the system
+            temp directory
+        transform: Optional frame-to-frame function applied to each
+            preprocessed chunk, e.g. ``normalize_frame``
+
+    Yields:
+        Row dicts, the same values ``read_and_preprocess_csv`` would give
+    """
+    transform = transform or _identity
+    reader = pd.read_csv(csv_file_path, chunksize=chunksize)
+    if not sort:
+        for chunk in reader:
+            yield from transform(preprocess_frame(chunk)).to_dict("records")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="framl-sort-", dir=tmp_dir) as run_dir:
+        runs = []
+        seq = 0
+        for chunk in reader:
+            chunk = add_sort_key(chunk.fillna(""))
+            runs.append(_write_run(chunk, seq, run_dir, len(runs), transform))
+            seq += len(chunk)
+        for _, record in heapq.merge(*(_read_run(path) for path in runs), key=lambda item: item[0]):
+            yield record
+
+
+def _validate_and_normalize(validate, normalize, df):
+    return normalize(validate(df))
+
+
+def load_payloads(csv_file_path, pre_fix: str, chunksize: int = None, sort: bool = True,
+                  party_prefix: str = "", validator=None):
+    """Read, preprocess and normalize a CSV into send-ready payload dicts.
+
+    Normalization happens column-wise per frame (or per chunk) so workers only
+    serialize and send.
+
+    Args:
+        csv_file_path: Path to the input CSV file
+        pre_fix: Run prefix for ``transaction_id``
+        chunksize: Stream this many rows at a time instead of loading the
+            whole file; memory then stays flat regardless of file size
+        sort: Order by ``txn_date_time`` (external merge sort when
+            streaming) rather than file order
+        party_prefix: Prefix for ``sender_hashcode`` / ``receiver_hashcode``
+        validator: ``schema.Validator`` run over each preprocessed frame
+            before normalization; rejected rows never become payloads
+
+    Returns:
+        ``(payloads, total)``: an iterable of payload dicts and the row count
+        (approximate when streaming)
+    """
+    normalize = partial(normalize_frame, pre_fix=pre_fix, party_prefix=party_prefix)
+    if validator is not None:
+        normalize = partial(_validate_and_normalize, validator.filter, normalize)
+    if chunksize:
+        payloads = iter_preprocessed_rows(csv_file_path, chunksize, sort=sort, transform=normalize)
+        return payloads, count_rows(csv_file_path)
+    if sort:
+        payloads = normalize(read_and_preprocess_csv(csv_file_path)).to_dict("records")
+    else:
+        payloads = list(iter_preprocessed_rows(csv_file_path, sort=False, transform=normalize))
+    return payloads, len(payloads)
+
+
+def count_rows(csv_file_path) -> int:
+    """Count data rows by scanning for newlines (quoted newlines are counted too).
+
+    Args:
+        csv_file_path: Path to the input CSV file
+
+    Returns:
+        Approximate number of data rows, for progress reporting
+    """
+    lines = 0
+    last = b"\n"
+    with open(csv_file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
@@ -0,0 +1,147 @@
+"""Completed-transaction journal for resumable runs.
+
+The journal is an append-only text file with one finished ``transaction_id``
+per line. The result sink's writer thread appends to it right after each
+checkpoint has made the matching output rows durable, so a journalled id
+always has its output on disk and senders never touch the journal.
+Transactions that ended in an error row are not journalled, so ``--resume``
+retries them.
+
+On close, the journal is compacted into ``<journal>.idx``: a sorted array of
+64-bit hashes of every id plus the journal length it covers. Resuming loads
+that index and hashes only the journal tail written after it, so startup
+does not re-read millions of ids, and the skip check is a binary search over
+8 bytes per finished transaction.
+
+Delivery is at-least-once: rows written after the last checkpoint of a
+crashed run are sent again, so deduplicate output on ``transaction_id`` if
+that matters.
+"""
+
+import hashlib
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from my_project.framl import transaction_id_of
+
+INDEX_MAGIC = b"FRAMLJNL"
+INDEX_VERSION = 1
+_HEADER = struct.Struct("<8sIQQ")  # magic, version, journal bytes covered, id count
+
+
+def id_hash(transaction_id: str) -> int:
+    """Return the 64-bit hash stored in the index for a transaction id."""
+    return int.from_bytes(hashlib.blake2b(transaction_id.encode(), digest_size=8).digest(), "little")
+
+
+def _hash_lines(data: bytes, hashes: array) -> int:
+    # Returns the number of bytes consumed; a torn last line (no newline) is ignored
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        if line:
+            hashes.append(id_hash(line.decode()))
+    return end
+
+
+class Journal:
+    """Append-only journal of completed transaction ids.
+
+    Args:
+        path: Journal file; the index goes to ``path + ".idx"``
+        resume: Load the existing journal; otherwise start a new, empty one
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.recorded = 0
+        self.skipped = 0
+        self._done = array("Q")
+        if resume:
+            self._load()
+        else:
+            for stale in (path, self.index_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        self._new = array("Q")
+        self._file = open(path, "ab")
+
+    def _load(self):
+        covered = 0
+        hashes = array("Q")
+        try:
+            with open(self.index_path, "rb") as index:
+                magic, version, covered, count = _HEADER.unpack(index.read(_HEADER.size))
+                if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                    raise ValueError
+                hashes.frombytes(index.read(count * 8))
+                if len(hashes) != count:
+                    raise ValueError
+        except (OSError, ValueError, struct.error):
+            covered, hashes = 0, array("Q")  # no usable index: rebuild from the journal
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as journal:
+                if covered > os.fstat(journal.fileno()).st_size:
+                    covered, hashes = 0, array("Q")  # index is newer than the journal
+                journal.seek(covered)
+                tail = journal.read()
+            valid = covered + _hash_lines(tail, hashes)
+            if valid < covered + len(tail):
+                # Drop a torn final line so new ids start on a fresh line
+                with open(self.path, "rb+") as journal:
+                    journal.truncate(valid)
+        self._done = array("Q", sorted(set(hashes)))
+
+    def __len__(self) -> int:
+        return len(self._done) + len(self._new)
+
+    def __contains__(self, transaction_id: str) -> bool:
+        """True if the id was journalled by an earlier run (ids from this run are not checked)."""
+        h = id_hash(transaction_id)
+        i = bisect_left(self._done, h)
+        return i < len(self._done) and self._done[i] == h
+
+    def skip_done(self, rows):
+        """Yield the rows whose transaction id is not in the journal."""
+        if not self._done:
+            yield from rows
+            return
+        for row in rows:
+            if transaction_id_of(row, "") in self:
+                self.skipped += 1
+                continue
+            yield row
+
+    def record(self, transaction_ids):
+        """Append ids whose output is durable and fsync the journal."""
+        lines = [str(txn_id) for txn_id in transaction_ids if txn_id]
+        if not lines:
+            return
+        self._file.write(("\n".join(lines) + "\n").encode())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._new.extend(id_hash(txn_id) for txn_id in lines)
+        self.recorded += len(lines)
+
+    def compact(self):
+        """Rewrite the index to cover the whole journal."""
+        self._file.flush()
+        covered = self._file.tell()
+        merged = array("Q", sorted(set(self._done) | set(self._new)))
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "wb") as index:
+            index.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, covered, len(merged)))
+            merged.tofile(index)
+            index.flush()
+            os.fsync(index.fileno())
+        os.replace(tmp, self.index_path)
+        self._done, self._new = merged, array("Q")
+
+    def close(self):
+        """Compact the index and close the journal."""
+        if self._file.closed:
+            return
+        self.compact()
+        self._file.close()
@@ -0,0 +1,277 @@
+"""Real-time TPS and latency tracking for replay runs.
+
+Senders never take a lock. Each thread counts into its own shard: whole-run
+totals plus a fixed ring of one-second buckets, each slot tagged with the
+second it holds. Only the owning thread writes to a shard, so the only
+synchronisation is registering the shard the first time a thread records.
+The monitor sums the shards to get per-second rates and run totals, and
+hands one record per second to an ``exporter.MetricsExporter``.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from my_project.exporter import MetricsExporter, MetricsServer, ProcessStats
+from my_project.histogram import LatencyRecorder, format_summary
+
+TPS_LOG = "tps_log.jsonl"
+
+COUNTERS = ("success", "error", "ack", "alert_rules", "retry")
+SUCCESS, ERROR, ACK, ALERT_RULES, RETRY = range(len(COUNTERS))
+
+RING_SECONDS = 60
+
+
+class _Shard:
+    __slots__ = ("totals", "slots", "epochs")
+
+    def __init__(self, size: int):
+        self.totals = [0] * len(COUNTERS)
+        self.slots = [[0] * len(COUNTERS) for _ in range(size)]
+        self.epochs = [-1] * size
+
+
+class MetricsRegistry:
+    """Per-thread counters with a ring of one-second buckets.
+
+    Args:
+        ring_seconds: Seconds of history kept for rate queries
+    """
+
+    def __init__(self, ring_seconds: int = RING_SECONDS):
+        self.ring_seconds = ring_seconds
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all counts and restart the run clock."""
+        with self._lock:
+            self._shards = []
+            self._local = threading.local()
+            self.start_time = time.time()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(self.ring_seconds)
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def increment(self, counter: int, n: int = 1):
+        """Add ``n`` to ``counter`` (e.g. ``SUCCESS``) for the current second."""
+        shard = self._shard()
+        second = int(time.time())
+        slot = second % self.ring_seconds
+        if shard.epochs[slot] != second:
+            shard.slots[slot] = [0] * len(COUNTERS)
+            shard.epochs[slot] = second
+        shard.slots[slot][counter] += n
+        shard.totals[counter] += n
+
+    def totals(self) -> dict:
+        """Return whole-run totals per counter name."""
+        sums = [0] * len(COUNTERS)
+        for shard in list(self._shards):
+            for i, value in enumerate(shard.totals):
+                sums[i] += value
+        return dict(zip(COUNTERS, sums))
+
+    def rate(self, counter: int = SUCCESS, window: int = 1) -> float:
+        """Return the per-second rate of ``counter`` over the last ``window`` complete seconds."""
+        window = max(1, min(window, self.ring_seconds - 1))
+        now = int(time.time())
+        seconds = range(now - window, now)
+        count = 0
+        for shard in list(self._shards):
+            for second in seconds:
+                slot = second % self.ring_seconds
+                if shard.epochs[slot] == second:
+                    count += shard.slots[slot][counter]
+        return count / window
+
+    def average_rate(self, counter: int = SUCCESS) -> float:
+        """Return the whole-run average per-second rate of ``counter``."""
+        elapsed = time.time() - self.start_time
+        return self.totals()[COUNTERS[counter]] / elapsed if elapsed > 0 else 0.0
+
+
+registry = MetricsRegistry()
+
+# Per-request latencies of all completed calls, failed ones included, one histogram per worker thread
+latencies = LatencyRecorder()
+
+# Extra monitor fields: name -> callable returning the current value
+gauges = {}
+
+# Callable returning the driver's in-flight request count, set by the running driver
+_in_flight = None
+
+
+def reset():
+    """Start a new run: clear counters and latencies."""
+    registry.reset()
+    latencies.reset()
+
+
+def record_call(latency: float = None, rules: int = 0, ack: bool = False):
+    """Record one successful API call.
+
+    Args:
+        latency: Request latency in seconds, if measured
+        rules: Number of ``ruleAlert`` rows in a fraud-alert response
+        ack: True for a fraud-ack call
+    """
+    registry.increment(SUCCESS)
+    if ack:
+        registry.increment(ACK)
+    if rules:
+        registry.increment(ALERT_RULES, rules)
+    if latency is not None:
+        latencies.record(latency)
+
+
+def record_error(latency: float = None):
+    """Record one failed API call.
+
+    Args:
+        latency: Time until the call failed in seconds, if measured. It goes
+            into the same histogram as successes, so timeouts and slow
+            failures show up in the tail percentiles.
+    """
+    registry.increment(ERROR)
+    if latency is not None:
+        latencies.record(latency)
+
+
+def record_retry():
+    """Record one retried attempt (counted apart from successes and errors)."""
+    registry.increment(RETRY)
+
+
+def merge(totals: dict, latency=None):
+    """Add counts and latencies recorded in other processes (e.g. shards) to this run.
+
+    Args:
+        totals: Counter name -> count, as returned by ``registry.totals()``
+        latency: ``histogram.Histogram`` of their calls, or None
+    """
+    for name, value in totals.items():
+        if value:
+            registry.increment(COUNTERS.index(name), value)
+    if latency is not None:
+        latencies.merge(latency)
+
+
+def watch_in_flight(source):
+    """Report ``source()`` as the in-flight request count (None to stop)."""
+    global _in_flight
+    _in_flight = source
+
+
+def in_flight() -> int:
+    """Return the running driver's in-flight request count (0 if none is running)."""
+    source = _in_flight
+    return source() if source is not None else 0
+
+
+def current_tps() -> int:
+    """Return the number of successful calls in the last complete second."""
+    return int(registry.rate(SUCCESS))
+
+
+def average_tps() -> float:
+    """Return successful calls per second averaged over the whole run."""
+    return registry.average_rate(SUCCESS)
+
+
+def latency_summary() -> dict:
+    """Return latency percentiles over the whole run so far."""
+    return latencies.snapshot().summary()
+
+
+def sample(process: ProcessStats = None) -> dict:
+    """Return one metrics record for the monitor.
+
+    The record holds the TPS, in-flight count and run totals, then the
+    latency percentiles of the calls completed since the previous sample,
+    then the process CPU/RSS if ``process`` is given, then the ``gauges``.
+    """
+    record = {"time": datetime.now().isoformat(timespec="milliseconds"),
+              "elapsed_s": round(time.time() - registry.start_time, 3),
+              "tps": current_tps(), "in_flight": in_flight()}
+    record.update(registry.totals())
+    interval = latencies.interval().summary()
+    record["calls"] = interval.pop("count")
+    record.update(interval)
+    if process is not None:
+        record.update(process.sample())
+    for name, gauge in list(gauges.items()):
+        record[name] = gauge()
+    return record
+
+
+def format_record(record: dict) -> str:
+    """Render a ``sample`` record as the one-line real-time monitor output."""
+    line = f"TPS: {record['tps']} | ok {record['success']} err {record['error']}"
+    if record.get("retry"):
+        line += f" retry {record['retry']}"
+    if record.get("in_flight"):
+        line += f" | in-flight {record['in_flight']}"
+    if record.get("calls"):
+        line += f" | {format_summary(record)}"
+    if record.get("cpu_percent") is not None:
+        line += f" | cpu {record['cpu_percent']}%"
+    if record.get("rss_mb") is not None:
+        line += f" rss {record['rss_mb']}MB"
+    for name in gauges:
+        if name in record:
+            line += f" | {name} {record[name]}"
+    return line
+
+
+def start_tps_monitoring(stop_event: threading.Event, log_path: str = TPS_LOG, metrics_port: int = None,
+                         log_format: str = None) -> threading.Thread:
+    """Print and export the real-time TPS, latency percentiles and client load once per second.
+
+    Runs until ``stop_event`` is set. Percentiles cover the calls completed
+    during each one-second interval. Records go to ``log_path`` through a
+    buffered ``MetricsExporter``, and to a ``MetricsServer`` if
+    ``metrics_port`` is given.
+
+    Args:
+        stop_event: Event that ends the monitor loop
+        log_path: Metrics log, appended to; None to only print
+        metrics_port: Serve the latest record on ``/metrics`` on this local port
+        log_format: ``"jsonl"``, ``"csv"`` or ``"text"``; inferred from
+            ``log_path`` if None
+
+    Returns:
+        The started daemon thread
+    """
+    exporter = MetricsExporter(log_path, log_format, format_line=format_record) if log_path else None
+    server = MetricsServer(metrics_port, counters=COUNTERS).start() if metrics_port is not None else None
+    if server is not None:
+        print(f"📡 Metrics endpoint on {server.url}")
+
+    def monitor():
+        process = ProcessStats()
+        try:
+            while not stop_event.is_set():
+                record = sample(process)
+                print(f"📈 Real-time {format_record(record)}")
+                if exporter is not None:
+                    exporter.write(record)
+                if server is not None:
+                    server.update(record)
+                stop_event.wait(1)  # update every second
+        finally:
+            if exporter is not None:
+                exporter.close()
+            if server is not None:
+                server.stop()
+
+    thread = threading.Thread(target=monitor, daemon=True)
+    thread.start()
+    return thread  # return the thread object
@@ -0,0 +1,391 @@
+"""Local stand-in for the FRAML realtime API.
+
+Used by the tests and benchmarks so the client can be exercised without a
+network or the shared pilot environment. It serves the auth, fraud-alert and
+fraud-ack routes, plus their ``/batch`` variants (see ``batching``).
+Server-side latency can follow a distribution (``LatencyModel``), and
+failures can be injected at random (``errors``) or on demand
+(``fail_next``). With ``rules="realistic"`` every alert carries the 30 rules
+of a real pilot response (``mock_rules.json``, taken from an
+``output_responses.csv`` run), so flattening and output costs match
+production.
+
+Run it standalone to point a replay at it:
+
+    python -m my_project.mock_server --port 8080 --latency lognormal:20,0.5 --errors 503:0.01
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from my_project.transport import AUTH_ENDPOINT, BATCH_SUFFIX, FRAUD_ACK_ENDPOINT, TXN_ENDPOINT
+
+MOCK_TOKEN = "mock-token"
+ACK_BODY = "request_fraud_transaction_pilot"
+RESET = "reset"  # error kind: drop the connection without answering
+
+BASIC_RULES = [
+    {
+        "ruleId": "Typology1319_clone1",
+        "ruleName": "Unusual outward forex transaction",
+        "typologyId": 59,
+        "typologyName": "TypologyUnusual Transaction Amount",
+        "ruleTriggered": True,
+        "messageType": "RuleTriggeredResponse",
+        "functionValue": {
+            "Sum of Transactions": {"type": "number", "field": 0.0},
+            "Count of Transactions": {"type": "number", "field": 0.0},
+        },
+    },
+]
+RULESETS = ("basic", "realistic", "empty")
+
+_RULES_FILE = os.path.join(os.path.dirname(__file__), "mock_rules.json")
+
+
+def load_rules(ruleset: str = "basic") -> list:
+    """Return the rule alerts of a ruleset (``"basic"``: one rule, ``"realistic"``: 30, ``"empty"``: none)."""
+    if ruleset == "basic":
+        return BASIC_RULES
+    if ruleset == "empty":
+        return []
+    if ruleset == "realistic":
+        with open(_RULES_FILE) as f:
+            return json.load(f)
+    raise ValueError(f"unknown ruleset {ruleset!r}, expected one of {RULESETS}")
+
+
+def build_alert(payload: dict, rules: list = None) -> dict:
+    """Build a fraud-alert response body echoing the submitted transaction.
+
+    Args:
+        payload: The ``payload`` field of the request
+        rules: ``ruleAlert`` entries; defaults to ``BASIC_RULES``
+
+    Returns:
+        Response body with ``alert.txn`` and ``alert.ruleAlert``
+    """
+    return {"alert": {"txn": payload, "ruleAlert": BASIC_RULES if rules is None else rules}}
+
+
+class LatencyModel:
+    """Server-side delay distribution.
+
+    Specs are in milliseconds: ``"5"`` or ``"fixed:5"``, ``"uniform:2-10"``,
+    ``"normal:10,2"`` (mean, standard deviation), ``"lognormal:10,0.5"``
+    (median, sigma of the log) and ``"exponential:10"`` (mean).
+
+    Args:
+        kind: One of ``KINDS``
+        a: First parameter in seconds (fixed delay, low bound, mean or median)
+        b: Second parameter (high bound or standard deviation in seconds,
+            sigma for lognormal)
+        seed: Seed for reproducible runs
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0, seed: int = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"unknown latency distribution {kind!r}, expected one of {self.KINDS}")
+        self.kind, self.a, self.b = kind, a, b
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec, seed: int = None) -> "LatencyModel":
+        """Build a model from a spec string, a number of seconds or a model."""
+        if isinstance(spec, LatencyModel):
+            return spec
+        if spec is None or isinstance(spec, (int, float)):
+            return cls("fixed", float(spec or 0.0), seed=seed)
+        kind, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        numbers = [float(v) for v in params.replace("-", ",").split(",") if v] + [0.0, 0.0]
+        a = numbers[0] / 1000
+        b = numbers[1] if kind == "lognormal" else numbers[1] / 1000  # lognormal sigma is unitless
+        return cls(kind, a, b, seed=seed)
+
+    def sample(self) -> float:
+        """Draw one delay in seconds (never negative)."""
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return self._random.uniform(self.a, self.b)
+        if self.kind == "normal":
+            return max(0.0, self._random.gauss(self.a, self.b))
+        if self.kind == "lognormal":
+            return self._random.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        return self._random.expovariate(1 / self.a) if self.a > 0 else 0.0
+
+
+def parse_errors(spec) -> dict:
+    """Parse ``"503:0.01,429:0.005,reset:0.001"`` into ``{503: 0.01, ..., "reset": 0.001}``."""
+    if not spec:
+        return {}
+    if isinstance(spec, dict):
+        return dict(spec)
+    errors = {}
+    for item in spec.split(","):
+        kind, _, probability = item.partition(":")
+        kind = kind.strip()
+        errors[kind if kind == RESET else int(kind)] = float(probability)
+    return errors
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def setup(self):
+        super().setup()
+        self.server.count_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes, content_type: str = "application/json", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        server.count_request()
+        delay = server.latency.sample()
+        if delay:
+            time.sleep(delay)
+
+        path = self.path.split("?", 1)[0]
+        if path == AUTH_ENDPOINT:
+            self._reply(200, json.dumps(server.issue_token()).encode())
+            return
+        if self.headers.get("Authorization") != f"Token {server.token}":
+            self._reply(401, b'{"error": "unauthorized"}')
+            return
+        batch = server.batch and path in (TXN_ENDPOINT + BATCH_SUFFIX, FRAUD_ACK_ENDPOINT + BATCH_SUFFIX)
+        failure = server.next_failure(draw=not batch)
+        if failure is not None:
+            status, headers = failure
+            if status == RESET:
+                self.close_connection = True  # client sees the connection drop mid-request
+                return
+            self._reply(status, b'{"error": "injected failure"}', headers=headers)
+            return
+        if batch:
+            self._reply(200, server.batch_body(json.loads(raw), ack=path.startswith(FRAUD_ACK_ENDPOINT)))
+        elif path == TXN_ENDPOINT:
+            body = json.loads(raw)
+            self._reply(200, server.alert_body(body["payload"]))
+        elif path == FRAUD_ACK_ENDPOINT:
+            self._reply(200, ACK_BODY.encode(), "text/plain")
+        else:
+            self._reply(404, b'{"error": "not found"}')
+
+
+class MockFramlServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering the auth, fraud-alert and fraud-ack routes.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind; 0 picks a free port
+        latency: Server-side delay per request: seconds, a ``LatencyModel``
+            spec such as ``"lognormal:20,0.5"``, or a ``LatencyModel``
+        token_ttl: ``expires_in`` reported by the auth route, or None to
+            omit it
+        errors: Probability per fraud-alert/fraud-ack request of answering
+            with a status (or ``"reset"``), e.g. ``{503: 0.01}`` or
+            ``"503:0.01,reset:0.001"``
+        rules: ``"basic"`` (one rule per alert) or ``"realistic"``
+        trigger_rate: With ``"realistic"``, fraction of alerts in which one
+            random rule comes back triggered
+        seed: Seed for latency, error and trigger draws
+        batch: Serve the ``/batch`` routes; when False they answer 404 like
+            a deployment without batch support
+        item_latency: Extra server time per payload of a batch after the
+            first, in seconds
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency=0.0,
+                 token_ttl: float = None, errors=None, rules: str = "basic",
+                 trigger_rate: float = 0.0, seed: int = None, batch: bool = True,
+                 item_latency: float = 0.0):
+        super().__init__((host, port), _Handler)
+        self.latency = LatencyModel.parse(latency, seed)
+        self.token_ttl = token_ttl
+        self.errors = parse_errors(errors)
+        self.trigger_rate = trigger_rate
+        self.batch = batch
+        self.item_latency = item_latency
+        self._random = random.Random(seed)
+        self._encode_rules(load_rules(rules))
+        self.token = MOCK_TOKEN
+        self.auth_calls = 0
+        self._generation = 0
+        self.requests = 0
+        self.batch_items = 0
+        self.connections = 0
+        self.injected = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _encode_rules(self, rules: list):
+        # Pre-encode ruleAlert once, plus one variant per rule with that rule triggered
+        self._rules = json.dumps(rules).encode()
+        self._triggered = []
+        for i, rule in enumerate(rules):
+            variant = [dict(r) for r in rules]
+            variant[i].update(ruleTriggered=True, messageType="RuleTriggeredResponse")
+            self._triggered.append(json.dumps(variant).encode())
+
+    def alert_body(self, payload: dict) -> bytes:
+        """Encoded fraud-alert response for a submitted payload."""
+        rules = self._rules
+        if self.trigger_rate and self._triggered and self._random.random() < self.trigger_rate:
+            rules = self._random.choice(self._triggered)
+        return b'{"alert": {"txn": ' + json.dumps(payload).encode() + b', "ruleAlert": ' + rules + b"}}"
+
+    def batch_body(self, envelopes: list, ack: bool = False) -> bytes:
+        """Encoded batch response: one entry per envelope, in order.
+
+        Random ``errors`` are drawn per payload and fail only that entry
+        (a ``"reset"`` draw fails it with 502).
+        """
+        with self._lock:
+            self.batch_items += len(envelopes)
+        if self.item_latency and len(envelopes) > 1:
+            time.sleep(self.item_latency * (len(envelopes) - 1))
+        entries = []
+        for envelope in envelopes:
+            failure = self._draw_failure()
+            if failure is not None:
+                status = 502 if failure == RESET else failure
+                entries.append(json.dumps({"error": "injected failure", "status": status}).encode())
+            elif ack:
+                entries.append(json.dumps(ACK_BODY).encode())
+            else:
+                entries.append(self.alert_body(envelope["payload"]))
+        return b"[" + b",".join(entries) + b"]"
+
+    @property
+    def url(self) -> str:
+        """Base URL to hand to ``Transport``."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def issue_token(self) -> dict:
+        """Body of an auth response for the current token."""
+        with self._lock:
+            self.auth_calls += 1
+            body = {"token": self.token}
+        if self.token_ttl is not None:
+            body["expires_in"] = self.token_ttl
+        return body
+
+    def rotate_token(self):
+        """Expire the current token; requests using it get 401 from now on."""
+        with self._lock:
+            self._generation += 1
+            self.token = f"{MOCK_TOKEN}-{self._generation}"
+
+    def fail_next(self, status, count: int = 1, retry_after: float = None):
+        """Answer the next ``count`` fraud-alert/fraud-ack requests with ``status`` (or ``"reset"``)."""
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        with self._lock:
+            self._failures.extend([(status, headers)] * count)
+
+    def next_failure(self, draw: bool = True):
+        """Return the ``(status, headers)`` to fail the current request with, or None.
+
+        Failures queued by ``fail_next`` come first; ``draw`` False skips the
+        random ``errors`` draw.
+        """
+        with self._lock:
+            if self._failures:
+                self.injected += 1
+                return self._failures.pop(0)
+        status = self._draw_failure() if draw else None
+        return (status, {}) if status is not None else None
+
+    def _draw_failure(self):
+        with self._lock:
+            draw = self._random.random()
+            for status, probability in self.errors.items():
+                if draw < probability:
+                    self.injected += 1
+                    return status
+                draw -= probability
+        return None
+
+    def start(self) -> "MockFramlServer":
+        """Serve in a background thread and return self."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    """Serve the mock API in the foreground until interrupted."""
+    parser = argparse.ArgumentParser(description="Local mock of the FRAML realtime API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", default="0", help='delay in ms or a distribution, e.g. "lognormal:20,0.5"')
+    parser.add_argument("--errors", help='injected failure rates, e.g. "503:0.01,429:0.005,reset:0.001"')
+    parser.add_argument("--rules", choices=RULESETS, default="realistic", help="ruleAlert set per alert")
+    parser.add_argument("--trigger-rate", type=float, default=0.05, help="fraction of alerts with a triggered rule")
+    parser.add_argument("--token-ttl", type=float, help="expires_in reported by the auth route")
+    parser.add_argument("--no-batch", dest="batch", action="store_false", help="answer the /batch routes with 404")
+    parser.add_argument("--item-latency", type=float, default=0.0,
+                        help="extra ms per payload of a batch after the first")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    server = MockFramlServer(args.host, args.port, latency=args.latency, token_ttl=args.token_ttl,
+                             errors=args.errors, rules=args.rules, trigger_rate=args.trigger_rate,
+                             seed=args.seed, batch=args.batch, item_latency=args.item_latency / 1000)
+    print(f"🧪 Mock FRAML API on {server.url} (latency {args.latency}, errors {args.errors or 'none'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {server.requests} requests, {server.injected} injected failures")
+
+
+if __name__ == "__main__":
+    main()
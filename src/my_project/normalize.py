@@ -0,0 +1,125 @@
+"""Column-wise payload normalization.
+
+``normalize_frame`` applies the same rules as ``framl.prepare_payload`` to a
+whole preprocessed frame at once (NA/0.0 fill, prefixing, date parsing, ISO
+formatting, incorporation-date defaults, intermediary parsing), so send
+workers only have to serialize and post the resulting records.
+"""
+
+import ast
+
+import pandas as pd
+
+from my_project.datetimes import DatetimeParser
+from my_project.framl import (DATE_FORMATS, ISO_FORMAT, NUMERICAL_FIELDS_TO_CHECK, PRE_FIX,
+                              STRING_FIELDS_TO_CHECK)
+
+DEFAULT_INTERMEDIARY = [{"hashcode": ""}]
+INCORPORATION_OFFSET = pd.Timedelta(days=7)
+
+# Same formats as the row path and no inference fallback: unmatched cells
+# become "NA" (or the incorporation default) just like prepare_payload.
+PAYLOAD_PARSER = DatetimeParser(DATE_FORMATS, infer=False)
+
+
+def _blank(series: pd.Series) -> pd.Series:
+    # Mirrors the per-row check: missing, None or "". String cells are
+    # already stripped by ``preprocess_frame``, so no per-cell strip here.
+    if pd.api.types.is_numeric_dtype(series):
+        return series.isna()
+    return series.isna() | (series == "")
+
+
+def _falsy(series: pd.Series) -> pd.Series:
+    # Mirrors ``not payload.get(field)``
+    return series.isna() | ~series.astype(bool)
+
+
+def parse_dates(series: pd.Series, column=None) -> pd.Series:
+    """Parse a payload date column with the run's cached per-column format.
+
+    Args:
+        series: String column; blank and ``"NA"`` cells are skipped
+        column: Format cache key, normally the column name
+
+    Returns:
+        datetime64 column, NaT where no format in ``DATE_FORMATS`` matched
+    """
+    return PAYLOAD_PARSER.parse(series, column)
+
+
+def _parse_intermediary(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return ast.literal_eval(value)
+    except Exception as e:
+        print(f"Error parsing intermediary {value!r}: {e}")
+        return list(DEFAULT_INTERMEDIARY)
+
+
+def normalize_frame(df: pd.DataFrame, pre_fix: str = PRE_FIX, party_prefix: str = "") -> pd.DataFrame:
+    """Normalize a preprocessed frame into fraud-alert payload columns.
+
+    Args:
+        df: Frame from ``read_and_preprocess_csv`` or ``preprocess_frame``
+        pre_fix: Run prefix prepended to ``transaction_id``
+        party_prefix: Prefix for ``sender_hashcode`` / ``receiver_hashcode``
+
+    Returns:
+        New frame whose records equal ``prepare_payload`` applied row by row
+    """
+    df = df.copy()
+    n = len(df)
+
+    for field in STRING_FIELDS_TO_CHECK:
+        df[field] = df[field].mask(_blank(df[field]), "NA") if field in df else "NA"
+    for field in NUMERICAL_FIELDS_TO_CHECK:
+        df[field] = df[field].mask(_blank(df[field]), 0.0) if field in df else 0.0
+
+    for field in ["transaction_id", "external_code"]:
+        if field in df:
+            df[field] = df[field].mask(df[field] != "", df[field].astype(str))
+
+    if "transaction_id" in df:
+        txn_id = df["transaction_id"]
+        prefix = ~_falsy(txn_id) & (txn_id != "NA")
+        df["transaction_id"] = txn_id.mask(prefix, pre_fix + "Txn" + txn_id.astype(str))
+
+    for field in ["sender_hashcode", "receiver_hashcode"]:
+        if field in df:
+            missing = _falsy(df[field]) | (df[field] == "NA")
+            df[field] = df[field].mask(missing, "NA")
+            if party_prefix:
+                df[field] = df[field].mask(~missing, party_prefix + df[field].astype(str))
+        else:
+            df[field] = "NA"
+
+    txn_dt = parse_dates(df["txn_date_time"], "txn_date_time") if "txn_date_time" in df else pd.Series(pd.NaT, index=df.index)
+    if "txn_date_time" in df:
+        attempted = ~(_blank(df["txn_date_time"]) | (df["txn_date_time"] == "NA"))
+        failed = attempted & txn_dt.isna()
+        if failed.any():
+            print(f"Could not parse txn_date_time for {int(failed.sum())} of {n} rows")
+    incorporation_date = (txn_dt - INCORPORATION_OFFSET).dt.strftime(ISO_FORMAT).fillna("NA")
+    df["txn_date_time"] = txn_dt.dt.strftime(ISO_FORMAT).fillna("NA")
+
+    for field in ["sender_incorporation_date", "receiver_incorporation_date"]:
+        if field in df:
+            parsed = parse_dates(df[field], field)
+            df[field] = parsed.dt.strftime(ISO_FORMAT).where(parsed.notna(), incorporation_date)
+        else:
+            df[field] = incorporation_date
+
+    if "intermediary" in df:
+        column = df["intermediary"]
+        default = column.isna() | (column == "NA") | (column == "")
+        parsed = {value: _parse_intermediary(value) for value in column[~default].astype(str).unique()}
+        df["intermediary"] = [
+            list(DEFAULT_INTERMEDIARY) if is_default else (parsed[value] if isinstance(value, str) else value)
+            for value, is_default in zip(column, default)
+        ]
+    else:
+        df["intermediary"] = [list(DEFAULT_INTERMEDIARY) for _ in range(n)]
+
+    return df
@@ -0,0 +1,191 @@
+"""Open-loop pacing for target-rate load generation.
+
+The default drivers are closed-loop: a new request goes out as soon as a
+worker frees up, so the measured TPS is whatever server latency allows. A
+``Pacer`` instead releases rows at times fixed by a rate schedule, whatever
+the response times are. That makes the applied load the independent variable,
+which is what a capacity test needs.
+
+Schedules are written as comma-separated steps:
+
+    "200"              constant 200 TPS until the input runs out
+    "100:30,500:60"    100 TPS for 30 s, then 500 TPS for 60 s, then stop
+    "100-500:60,500"   ramp linearly from 100 to 500 TPS over 60 s, then hold
+
+Every row is tagged with its scheduled send time. A row that leaves later
+than scheduled (workers saturated, or the dispatcher itself too slow) counts
+as late, so the run reports when the client cannot keep up instead of
+quietly applying less load than asked.
+"""
+
+import asyncio
+import threading
+import time
+from typing import NamedTuple
+
+# Sleep until this close to the deadline, then wait out the rest with
+# sleep(0) yields: time.sleep overshoots by up to a scheduler tick, which is
+# most of the gap at high rates, while a bare spin would hold the GIL the
+# send workers need.
+SPIN_THRESHOLD = 0.002
+
+
+class RateStep(NamedTuple):
+    """One step of a rate schedule; ``duration`` None means until the input ends."""
+
+    start_rate: float
+    end_rate: float
+    duration: float = None
+
+
+def parse_rate_schedule(spec: str) -> list:
+    """Parse a schedule such as ``"100-500:60,500"`` into ``RateStep`` entries.
+
+    Raises:
+        ValueError: If a rate is not positive or only the last step omits its duration
+    """
+    steps = []
+    parts = [part.strip() for part in str(spec).split(",") if part.strip()]
+    for i, part in enumerate(parts):
+        rates, _, duration = part.partition(":")
+        start, _, end = rates.partition("-")
+        step = RateStep(float(start), float(end or start), float(duration) if duration else None)
+        if step.start_rate <= 0 or step.end_rate <= 0:
+            raise ValueError(f"rates must be positive: {part!r}")
+        if step.duration is None and i != len(parts) - 1:
+            raise ValueError(f"only the last step may omit its duration: {part!r}")
+        steps.append(step)
+    if not steps:
+        raise ValueError("empty rate schedule")
+    return steps
+
+
+def schedule_offsets(steps):
+    """Yield send times in seconds from the start of the run for a schedule."""
+    t = 0.0
+    for step in steps:
+        begin, sent = t, 0
+        end = begin + step.duration - 1e-9 if step.duration is not None else None
+        while end is None or t < end:
+            yield t
+            sent += 1
+            if step.start_rate == step.end_rate:
+                t = begin + sent / step.end_rate  # no float drift on long constant steps
+            else:
+                elapsed = (t - begin) / step.duration
+                t += 1.0 / (step.start_rate + (step.end_rate - step.start_rate) * elapsed)
+
+
+class PacingStats:
+    """Schedule adherence of a paced run.
+
+    Args:
+        tolerance: Lag in seconds after which a send counts as late
+    """
+
+    def __init__(self, tolerance: float = 0.01):
+        self.tolerance = tolerance
+        self.sent = 0
+        self.late = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.scheduled_span = 0.0
+        self.actual_span = 0.0
+        self.start = None
+        self._warned = False
+
+    def record(self, offset: float, lag: float):
+        self.sent += 1
+        self.scheduled_span = offset
+        self.actual_span = offset + lag
+        self.total_lag += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        if lag > self.tolerance:
+            self.late += 1
+            if not self._warned and lag > 1.0:
+                self._warned = True
+                print(f"⚠️ Client cannot keep up: {lag:.2f}s behind schedule "
+                      f"(add workers/concurrency or lower the rate)")
+
+    @property
+    def keeping_up(self) -> bool:
+        """True if at most 1% of sends were late."""
+        return self.late <= 0.01 * self.sent
+
+    def summary(self) -> dict:
+        """Return target and achieved rates, lateness and lag figures."""
+        intervals = self.sent - 1
+        return {
+            "sent": self.sent,
+            "target_tps": round(intervals / self.scheduled_span, 2) if self.scheduled_span else None,
+            "achieved_tps": round(intervals / self.actual_span, 2) if self.actual_span else None,
+            "late": self.late,
+            "mean_lag_ms": round(1000 * self.total_lag / self.sent, 3) if self.sent else 0.0,
+            "max_lag_ms": round(1000 * self.max_lag, 3),
+        }
+
+    def report(self):
+        """Print the summary, flagging runs where the client fell behind."""
+        s = self.summary()
+        print(f"🎯 Paced {s['sent']} sends | target {s['target_tps']} TPS | achieved {s['achieved_tps']} TPS | "
+              f"late {s['late']} | mean lag {s['mean_lag_ms']} ms | max lag {s['max_lag_ms']} ms")
+        if not self.keeping_up:
+            print("⚠️ Client could not sustain the target rate; results understate the intended load")
+
+
+class Pacer:
+    """Release rows at scheduled times.
+
+    Args:
+        offsets: Send times in seconds from the start, e.g. ``schedule_offsets(steps)``
+        stop_event: Set to stop releasing rows
+        tolerance: Lag in seconds after which a send counts as late
+    """
+
+    def __init__(self, offsets, stop_event: threading.Event = None, tolerance: float = 0.01):
+        self.offsets = offsets
+        self.stop_event = stop_event or threading.Event()
+        self.stats = PacingStats(tolerance)
+
+    @classmethod
+    def from_spec(cls, spec: str, **kwargs) -> "Pacer":
+        """Build a pacer from a rate schedule string."""
+        return cls(schedule_offsets(parse_rate_schedule(spec)), **kwargs)
+
+    def pairs(self, rows):
+        """Yield ``(offset, row)``; the schedule ending stops the run."""
+        return zip(self.offsets, rows)
+
+    def pace(self, rows):
+        """Yield rows at their scheduled times (blocking; for the thread driver).
+
+        The consumer must only pull the next row once it can send it at
+        once, so back-pressure shows up as lag rather than as queueing.
+        """
+        stats = self.stats
+        start = stats.start = time.perf_counter()
+        for offset, row in self.pairs(rows):
+            due = start + offset
+            remaining = due - time.perf_counter()
+            if remaining > SPIN_THRESHOLD:
+                time.sleep(remaining - SPIN_THRESHOLD)
+            while time.perf_counter() < due:
+                time.sleep(0)  # releases the GIL between checks
+            if self.stop_event.is_set():
+                return
+            stats.record(offset, time.perf_counter() - due)
+            yield row
+
+    async def apace(self, rows):
+        """Async counterpart of ``pace`` for the async driver."""
+        stats = self.stats
+        start = stats.start = time.perf_counter()
+        for offset, row in self.pairs(rows):
+            remaining = start + offset - time.perf_counter()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            if self.stop_event.is_set():
+                return
+            stats.record(offset, time.perf_counter() - start - offset)
+            yield row
@@ -0,0 +1,234 @@
+"""Compiled, pre-serialized payload store.
+
+Normalized payloads are wrapped in the ``tt_json`` envelope and encoded to
+JSON bytes once, then appended to a data file with a fixed-width offset
+index next to it (``<path>.idx``). Replays read the bytes back through
+``mmap`` and post them as-is; only the run prefix changes between replays,
+so the store records where the prefix goes in each record and splices it in
+instead of re-encoding.
+
+Records are compiled with ``PREFIX_PLACEHOLDER`` as the run prefix (pass it
+as ``pre_fix`` to ``normalize_frame``).
+
+``partition`` splits a store into shards by writing one extra index per
+shard over the same data file, so sharded runs share the encoded bytes.
+"""
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import NamedTuple
+
+from my_project.transport import format_payload
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+PREFIX_PLACEHOLDER = "__PRE_FIX__"
+_PLACEHOLDER_BYTES = PREFIX_PLACEHOLDER.encode()
+_TXN_KEY = b'"transaction_id":"'
+
+INDEX_MAGIC = b"FRAMLIDX"
+INDEX_VERSION = 1
+_HEADER = struct.Struct("<8sIQ")  # magic, version, record count
+_ENTRY = struct.Struct("<QIi")    # data offset, length, prefix position (-1: none)
+
+
+class EncodedPayload(NamedTuple):
+    """A request body ready to post, plus its transaction id for output rows."""
+
+    body: bytes
+    transaction_id: str
+
+
+def encode_payload(payload: dict) -> bytes:
+    """Encode a payload in the ``tt_json`` envelope to compact JSON bytes.
+
+    Uses ``orjson`` when installed, the standard library otherwise.
+    """
+    envelope = format_payload(payload)
+    if orjson is not None:
+        return orjson.dumps(envelope)
+    return json.dumps(envelope, separators=(",", ":")).encode()
+
+
+def _json_fragment(text: str) -> bytes:
+    # The prefix is spliced into a JSON string, so escape it the same way
+    return json.dumps(text)[1:-1].encode()
+
+
+def _transaction_id(body: bytes, position: int) -> str:
+    # position is where the transaction_id string value starts
+    if position < 0:
+        key = body.find(_TXN_KEY)
+        if key < 0:
+            return ""
+        position = key + len(_TXN_KEY)
+    return _string_at(body, position)
+
+
+def _string_at(body: bytes, position: int) -> str:
+    # Decode the JSON string whose contents start at position
+    end = body.index(b'"', position)
+    while True:
+        slashes = 0
+        while body[end - 1 - slashes] == 0x5C:  # backslash
+            slashes += 1
+        if slashes % 2 == 0:
+            break
+        end = body.index(b'"', end + 1)  # escaped quote, keep looking
+    return json.loads(b'"' + body[position:end] + b'"')
+
+
+def compile_store(payloads, path: str) -> int:
+    """Encode payloads once and write them to a store.
+
+    Args:
+        payloads: Normalized payload dicts, compiled with
+            ``PREFIX_PLACEHOLDER`` as the run prefix
+        path: Data file; the index is written to ``path + ".idx"``
+
+    Returns:
+        Number of records written
+
+    Raises:
+        ValueError: If a record contains the placeholder more than once
+    """
+    count = 0
+    offset = 0
+    tmp_data, tmp_index = f"{path}.tmp", f"{path}.idx.tmp"
+    with open(tmp_data, "wb") as data, open(tmp_index, "wb") as index:
+        index.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0))
+        for payload in payloads:
+            encoded = encode_payload(payload)
+            position = encoded.find(_PLACEHOLDER_BYTES)
+            if position >= 0:
+                if encoded.find(_PLACEHOLDER_BYTES, position + 1) >= 0:
+                    raise ValueError(f"run prefix placeholder appears twice in record {count}")
+                encoded = encoded[:position] + encoded[position + len(_PLACEHOLDER_BYTES):]
+            data.write(encoded)
+            index.write(_ENTRY.pack(offset, len(encoded), position))
+            offset += len(encoded)
+            count += 1
+        index.seek(0)
+        index.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, count))
+    # Publish both files only once they are complete
+    os.replace(tmp_data, path)
+    os.replace(tmp_index, f"{path}.idx")
+    return count
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Return the shard for a partition key; stable across processes and runs."""
+    return zlib.crc32(key.encode()) % shards
+
+
+def _field_text(body: bytes, name: str) -> str:
+    # Text of a top-level payload field in compact JSON ("" if absent)
+    key = f'"{name}":'.encode()
+    start = body.find(key)
+    if start < 0:
+        return ""
+    start += len(key)
+    if body[start:start + 1] == b'"':
+        return _string_at(body, start + 1)
+    end = start
+    while end < len(body) and body[end] not in b",}":
+        end += 1
+    return body[start:end].decode()
+
+
+def partition(path: str, shards: int, field: str = "sender_hashcode") -> list:
+    """Split a store into ``shards`` shard indexes by the value of ``field``.
+
+    Records keep their order within a shard, so every sender's transactions
+    are replayed in the original order by a single shard.
+
+    Args:
+        path: Data file written by ``compile_store``
+        shards: Number of shards
+        field: Top-level payload field to partition on
+
+    Returns:
+        Index paths (``<path>.shardK-of-N.idx``), one per shard; open them
+        with ``PayloadStore(path, index_path)``
+    """
+    index_paths = [f"{path}.shard{k}-of-{shards}.idx" for k in range(shards)]
+    entries = [[] for _ in range(shards)]
+    with PayloadStore(path) as store:
+        for entry in _ENTRY.iter_unpack(store._index):
+            offset, length, _ = entry
+            entries[shard_of(_field_text(store._data[offset:offset + length], field), shards)].append(entry)
+    for index_path, shard_entries in zip(index_paths, entries):
+        tmp = f"{index_path}.tmp"
+        with open(tmp, "wb") as index:
+            index.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(shard_entries)))
+            for entry in shard_entries:
+                index.write(_ENTRY.pack(*entry))
+        os.replace(tmp, index_path)
+    return index_paths
+
+
+class PayloadStore:
+    """Read side of a compiled store.
+
+    Args:
+        path: Data file written by ``compile_store``
+        index_path: Index to read; defaults to ``path + ".idx"`` (pass a
+            shard index from ``partition`` to read one shard)
+    """
+
+    def __init__(self, path: str, index_path: str = None):
+        self.path = path
+        index_path = index_path or f"{path}.idx"
+        with open(index_path, "rb") as index:
+            magic, version, count = _HEADER.unpack(index.read(_HEADER.size))
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise ValueError(f"{index_path} is not a version {INDEX_VERSION} payload index")
+            self._index = index.read(count * _ENTRY.size)
+        self.count = count
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Return True if both the data file and its index are present."""
+        return os.path.exists(path) and os.path.exists(f"{path}.idx")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, i: int, pre_fix: str) -> EncodedPayload:
+        """Return record ``i`` with ``pre_fix`` spliced in as the run prefix."""
+        offset, length, position = _ENTRY.unpack_from(self._index, i * _ENTRY.size)
+        body = self._data[offset:offset + length]
+        if position >= 0:
+            body = body[:position] + _json_fragment(pre_fix) + body[position:]
+        return EncodedPayload(body, _transaction_id(body, position))
+
+    def iter_payloads(self, pre_fix: str, start: int = 0):
+        """Yield every record from ``start`` on, patched with ``pre_fix``."""
+        fragment = _json_fragment(pre_fix)
+        data = self._data
+        for offset, length, position in _ENTRY.iter_unpack(self._index[start * _ENTRY.size:]):
+            body = data[offset:offset + length]
+            if position >= 0:
+                body = body[:position] + fragment + body[position:]
+            yield EncodedPayload(body, _transaction_id(body, position))
+
+    def close(self):
+        """Release the mapping and file handle."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
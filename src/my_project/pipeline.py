@@ -0,0 +1,160 @@
+"""Alert-then-ack pipeline over a single pass of the input.
+
+With ``ack_run=PIPELINE`` each transaction goes to fraud-alert and then
+fraud-ack in the same run. An alert that finishes hands its payload and
+output rows to the ack stage. The ack stage has its own bounded queue and
+its own workers (threads, or coroutines in the async driver), so acks for
+earlier transactions run while later alerts are still in flight. A full
+ack queue blocks the alert stage, so a slow ack endpoint throttles the
+whole run instead of filling memory.
+
+The result is one joined set of rows per transaction: the alert's rule rows,
+each carrying the ``ack_status``. An alert without rule alerts yields one
+row holding just the ``transaction_id`` and the ack. If the alert failed,
+its error row is passed through and no ack is sent. If the ack failed, or
+the run stopped before it was sent, the rows get an ``error`` so the journal
+leaves the transaction for ``--resume`` to redo.
+"""
+
+import asyncio
+import queue
+import threading
+
+from my_project.framl import transaction_id_of
+
+ALERT, ACK, PIPELINE = 0, 1, 2  # ack_run modes
+
+_STOP = object()
+
+
+def join_ack(alert_rows: list, ack_rows: list, transaction_id: str = None) -> list:
+    """Join a transaction's alert rows with its ack row.
+
+    Args:
+        alert_rows: Rows of the fraud-alert call (rule rows or one error
+            row); empty when the alert had no rule alerts
+        ack_rows: The single row of the fraud-ack call (ack or error row)
+        transaction_id: Id for the joined row when ``alert_rows`` is empty;
+            taken from the ack row if None
+
+    Returns:
+        The alert rows (or one row with just the ``transaction_id``), each
+        with ``ack_status`` set, plus an ``error`` if the ack failed
+    """
+    ack = ack_rows[0] if ack_rows else {"error": "no ack result"}
+    error = ack.get("error")
+    joined = []
+    for row in alert_rows or [{"transaction_id": transaction_id or ack.get("transaction_id")}]:
+        row = dict(row, ack_status=ack.get("ack_status"))
+        if error and not row.get("error"):
+            row["error"] = f"ack failed: {error}"
+        joined.append(row)
+    return joined
+
+
+def _not_acked(alert_rows: list, transaction_id: str) -> list:
+    return [dict(row, error=row.get("error") or "ack not sent: run stopped")
+            for row in alert_rows or [{"transaction_id": transaction_id}]]
+
+
+def split_by_transaction(payloads: list, rows: list) -> list:
+    """Split the rows of a batch back into one list per payload, in payload order."""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.get("transaction_id"), []).append(row)
+    return [grouped.pop(transaction_id_of(payload), []) for payload in payloads]
+
+
+class AckStage:
+    """Thread-pool ack stage fed through a bounded queue.
+
+    Args:
+        send: ``send(payload) -> rows`` calling fraud-ack for one payload
+        responses: Where joined rows go (a list or result sink)
+        workers: Number of ack threads
+        queue_size: Bound on alerts waiting for their ack; defaults to
+            twice ``workers``
+        stop_event: Once set, queued alerts are written out without an ack
+    """
+
+    def __init__(self, send, responses, workers: int = 50, queue_size: int = None,
+                 stop_event: threading.Event = None):
+        self.send = send
+        self.responses = responses
+        self.stop_event = stop_event or threading.Event()
+        self._queue = queue.Queue(queue_size or 2 * workers)
+        self._threads = [threading.Thread(target=self._work, name=f"ack-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, payload, alert_rows: list):
+        """Hand over a finished alert; blocks while the ack queue is full."""
+        if alert_rows and all(row.get("error") for row in alert_rows):
+            self.responses.extend(alert_rows)  # alert failed: nothing to ack
+            return
+        self._queue.put((payload, alert_rows))
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            payload, alert_rows = item
+            if self.stop_event.is_set():
+                self.responses.extend(_not_acked(alert_rows, transaction_id_of(payload)))
+                continue
+            self.responses.extend(join_ack(alert_rows, self.send(payload), transaction_id_of(payload)))
+
+    def close(self):
+        """Wait for every queued ack, then stop the workers."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+
+class AsyncAckStage:
+    """asyncio counterpart of ``AckStage``; ``send`` is a coroutine function.
+
+    Call ``start`` from the event loop before submitting.
+    """
+
+    def __init__(self, send, responses, concurrency: int = 1000, queue_size: int = None,
+                 stop_event: threading.Event = None):
+        self.send = send
+        self.responses = responses
+        self.concurrency = concurrency
+        self.queue_size = queue_size or 2 * concurrency
+        self.stop_event = stop_event or threading.Event()
+        self._queue = None
+        self._workers = []
+
+    def start(self) -> "AsyncAckStage":
+        self._queue = asyncio.Queue(self.queue_size)
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+        return self
+
+    async def submit(self, payload, alert_rows: list):
+        """Hand over a finished alert; waits while the ack queue is full."""
+        if alert_rows and all(row.get("error") for row in alert_rows):
+            self.responses.extend(alert_rows)
+            return
+        await self._queue.put((payload, alert_rows))
+
+    async def _work(self):
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            payload, alert_rows = item
+            if self.stop_event.is_set():
+                self.responses.extend(_not_acked(alert_rows, transaction_id_of(payload)))
+                continue
+            self.responses.extend(join_ack(alert_rows, await self.send(payload), transaction_id_of(payload)))
+
+    async def close(self):
+        """Wait for every queued ack, then stop the workers."""
+        for _ in self._workers:
+            await self._queue.put(_STOP)
+        await asyncio.gather(*self._workers)
@@ -0,0 +1,237 @@
+"""Run profiles and parameter sweeps.
+
+A profile is a TOML (or, with PyYAML installed, YAML) file holding the
+options of ``cli.run``. It replaces the module globals that each tuning
+script used to edit by hand. Keys may be grouped into tables, such as
+``[concurrency]`` or ``[batching]``. The group names are only there for
+the reader, since every key is checked against ``cli.run``.
+
+    input = "sample.csv"
+    output = "out/responses.parquet"
+    base_url = "https://caas-pilot-tdss.tookitaki.ai"
+    pre_fix = "r7"
+    ack_run = "pipeline"           # or "alert" / "ack" (0 / 1 / 2)
+
+    [concurrency]
+    driver = "thread"
+    max_workers = 50
+
+    [batching]
+    batch_size = 20
+    batch_linger = 0.005           # seconds, like cli.run
+
+    [results]
+    output_format = "parquet"
+    token_cache = false            # false stands in for None (TOML has no null)
+
+    [sweep]                        # every combination, run one after another
+    max_workers = [10, 50, 100]
+    batch_size = [1, 20]
+
+Each sweep configuration replays with its own ``pre_fix`` suffix (``_s0``,
+``_s1``, ...), so its transactions are new to the server, and writes its
+own output file. ``run_sweep`` then writes a throughput and latency row
+per configuration to a CSV report and prints the ranking:
+
+    my_project --profile tuning.toml --report sweep.csv
+"""
+
+import csv
+import inspect
+import itertools
+import os
+import time
+
+from my_project import metrics
+from my_project.framl import PRE_FIX
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover - Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - optional dependency
+    yaml = None
+
+SWEEP_KEY = "sweep"
+ACK_MODES = {"alert": 0, "ack": 1, "pipeline": 2}
+REPORT_FIELDS = ("calls", "errors", "error_rate", "rows", "elapsed_s", "tps", "p50_ms", "p90_ms", "p99_ms")
+
+# Path options TOML cannot set to None; ``false`` turns them off instead
+_NULLABLE = ("token_cache", "metrics_log", "journal_path", "reject_path", "payload_store", "formatted_payloads")
+
+# Profile spellings of run() arguments, as on the command line
+_ALIASES = {"input": "input_csv", "output": "output_csv", "prefix": "pre_fix", "journal": "journal_path",
+            "rejects": "reject_path"}
+
+
+def _read(path: str) -> dict:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".yaml", ".yml"):
+        if yaml is None:
+            raise ImportError("YAML profiles need PyYAML: pip install pyyaml")
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    if ext != ".toml":
+        raise ValueError(f"unknown profile format {ext!r}, expected .toml, .yaml or .yml")
+    if tomllib is None:
+        raise ImportError("TOML profiles need Python 3.11+ or tomli: pip install tomli")
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def option_names() -> set:
+    """Every key a profile may set: the ``cli.run_replay`` arguments."""
+    from my_project.cli import run
+    return set(inspect.signature(run).parameters) | {"shards"}
+
+
+def _value(key: str, value):
+    if key == "ack_run" and isinstance(value, str):
+        if value not in ACK_MODES:
+            raise ValueError(f"unknown ack_run {value!r}, expected one of {tuple(ACK_MODES)}")
+        return ACK_MODES[value]
+    if key == "retry_statuses":
+        return tuple(value)
+    if key in _NULLABLE and value is False:
+        return None
+    return value
+
+
+def normalize_options(options: dict, sweep: bool = False) -> dict:
+    """Resolve aliases and ``ack_run`` names and reject unknown keys.
+
+    Args:
+        options: Profile keys and values
+        sweep: Values are lists of candidates, each converted on its own
+    """
+    known = option_names()
+    resolved = {}
+    for key, value in options.items():
+        key = _ALIASES.get(key.replace("-", "_"), key.replace("-", "_"))
+        if key not in known:
+            raise ValueError(f"unknown profile option {key!r}")
+        if sweep:
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"sweep option {key!r} needs a non-empty list of values")
+            resolved[key] = [_value(key, item) for item in value]
+        else:
+            resolved[key] = _value(key, value)
+    return resolved
+
+
+def load_profile(path: str):
+    """Read a profile file.
+
+    Args:
+        path: ``.toml``, ``.yaml`` or ``.yml`` file
+
+    Returns:
+        ``(options, sweep)``: ``cli.run_replay`` keyword arguments and the
+        swept options (``{name: [values]}``, empty if the profile has none)
+    """
+    data = _read(path)
+    options, sweep = {}, {}
+    for key, value in data.items():
+        if key == SWEEP_KEY:
+            sweep = value
+        elif isinstance(value, dict):
+            options.update(value)  # a group table
+        else:
+            options[key] = value
+    return normalize_options(options), normalize_options(sweep, sweep=True)
+
+
+def expand_sweep(options: dict, sweep: dict) -> list:
+    """Return one ``run_replay`` option dict per combination of the swept values."""
+    keys = list(sweep)
+    return [dict(options, **dict(zip(keys, values))) for values in itertools.product(*(sweep[k] for k in keys))]
+
+
+def _sweep_output(output_csv: str, index: int) -> str:
+    stem, ext = os.path.splitext(output_csv)
+    return f"{stem}.sweep{index}{ext}"
+
+
+def measure(options: dict, replay=None) -> dict:
+    """Run one configuration and return its report row.
+
+    Args:
+        options: ``cli.run_replay`` keyword arguments, including
+            ``input_csv`` and ``output_csv``
+        replay: Function taking those arguments; ``cli.run_replay`` by default
+
+    Returns:
+        Calls, errors, output rows, wall time, TPS and latency percentiles
+        (sharded runs merge their shards' counts into ``metrics``)
+    """
+    if replay is None:
+        from my_project.cli import run_replay as replay
+    metrics.reset()
+    start = time.perf_counter()
+    rows = replay(**options)
+    elapsed = time.perf_counter() - start
+    totals = metrics.registry.totals()
+    calls = totals["success"] + totals["error"]
+    result = {"rows": rows, "elapsed_s": round(elapsed, 3)}
+    if calls:
+        latency = metrics.latency_summary()
+        result.update(calls=calls, errors=totals["error"], error_rate=round(totals["error"] / calls, 4),
+                      tps=round(calls / elapsed, 2), p50_ms=latency["p50_ms"], p90_ms=latency["p90_ms"],
+                      p99_ms=latency["p99_ms"])
+    return result
+
+
+def run_sweep(options: dict, sweep: dict, report_path: str = None, replay=None) -> list:
+    """Run every combination of ``sweep`` over ``options`` and report on them.
+
+    Args:
+        options: Shared ``cli.run_replay`` keyword arguments
+        sweep: ``{option: [values]}`` to combine
+        report_path: CSV to write one row per configuration to, or None
+        replay: Passed to ``measure``
+
+    Returns:
+        The report rows, in run order: the swept values, then the
+        ``REPORT_FIELDS``
+    """
+    configs = expand_sweep(options, sweep)
+    pre_fix = options.get("pre_fix", PRE_FIX)
+    report = []
+    for index, config in enumerate(configs):
+        swept = {key: config[key] for key in sweep}
+        print(f"\n🧪 Sweep {index + 1}/{len(configs)}: " + ", ".join(f"{k}={v}" for k, v in swept.items()))
+        config = dict(config, pre_fix=f"{pre_fix}_s{index}", output_csv=_sweep_output(config["output_csv"], index))
+        if config.get("formatted_payloads"):
+            config["formatted_payloads"] = _sweep_output(config["formatted_payloads"], index)
+        report.append(dict(swept, **measure(config, replay)))
+    if report_path:
+        write_report(report, report_path)
+    print(format_report(report, list(sweep)))
+    return report
+
+
+def write_report(report: list, path: str):
+    """Write sweep report rows to a CSV."""
+    fieldnames = list(dict.fromkeys(key for row in report for key in row))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames)
+        writer.writeheader()
+        writer.writerows(report)
+
+
+def format_report(report: list, swept: list) -> str:
+    """Render the sweep report as a table ranked by TPS (best first)."""
+    columns = list(swept) + [field for field in REPORT_FIELDS if any(field in row for row in report)]
+    ranked = sorted(report, key=lambda row: -(row.get("tps") or 0))
+    cells = [[str(row.get(column, "")) for column in columns] for row in ranked]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    lines = ["📈 Sweep report (best TPS first)",
+             "  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(line, widths)) for line in cells]
+    return "\n".join(lines)
@@ -0,0 +1,110 @@
+"""Timestamp-faithful replay driven by ``txn_date_time``.
+
+``TimestampPacer`` schedules every row at its original ``txn_date_time``
+offset from the first transaction, divided by a speed-up factor. Gaps in the
+source become idle time and bursts become bursts against the API. Rows pass
+through a bounded min-heap keyed on their timestamp, so input that is only
+roughly ordered (``--no-sort``, or several files interleaved) still goes out
+in time order. The pacing, lag accounting and back-pressure are the same as
+for ``--rate`` (see ``pacing``).
+"""
+
+import calendar
+import heapq
+import json
+import time
+
+from my_project.framl import ISO_FORMAT
+from my_project.pacing import Pacer
+
+_TIME_KEY = b'"txn_date_time":"'
+
+
+def txn_time_of(payload):
+    """Return a payload's ``txn_date_time`` as epoch seconds, or None if missing.
+
+    Accepts normalized payload dicts and pre-encoded ``EncodedPayload`` records.
+    """
+    if isinstance(payload, dict):
+        value = payload.get("txn_date_time")
+    else:
+        body = getattr(payload, "body", b"")
+        start = body.find(_TIME_KEY)
+        if start < 0:
+            return None
+        start += len(_TIME_KEY)
+        value = json.loads(b'"' + body[start:body.index(b'"', start)] + b'"')
+    if not value or value == "NA":
+        return None
+    try:
+        return calendar.timegm(time.strptime(value, ISO_FORMAT))
+    except (TypeError, ValueError):
+        return None
+
+
+def timestamp_pairs(rows, speed: float = 1.0, window: int = 1024, max_gap: float = None):
+    """Yield ``(offset, row)`` with offsets taken from the rows' timestamps.
+
+    Args:
+        rows: Normalized payloads, ideally sorted by ``txn_date_time``
+        speed: Speed-up factor; 10 replays an hour of traffic in six minutes
+        window: Rows buffered in the reorder heap; rows later than this are
+            sent immediately instead of being reordered
+        max_gap: Cap on idle time between transactions, in source seconds;
+            None keeps every gap
+
+    Rows without a usable timestamp are sent right after the row before them.
+    """
+    if speed <= 0:
+        raise ValueError(f"speed must be positive, got {speed}")
+    heap = []
+    seq = 0
+    latest = None  # newest timestamp read so far
+    last = None    # timestamp of the last row released
+    offset = 0.0
+
+    def release(entry):
+        nonlocal last, offset
+        ts, _, row = entry
+        if ts != float("-inf"):
+            if last is not None:
+                gap = max(0.0, ts - last)
+                if max_gap is not None:
+                    gap = min(gap, max_gap)
+                offset += gap / speed
+            last = ts if last is None else max(last, ts)
+        return offset, row
+
+    for row in rows:
+        ts = txn_time_of(row)
+        if ts is None:
+            ts = latest if latest is not None else float("-inf")
+        elif latest is None or ts > latest:
+            latest = ts
+        heapq.heappush(heap, (ts, seq, row))
+        seq += 1
+        if len(heap) > window:
+            yield release(heapq.heappop(heap))
+    while heap:
+        yield release(heapq.heappop(heap))
+
+
+class TimestampPacer(Pacer):
+    """Pacer whose schedule comes from the rows' ``txn_date_time``.
+
+    Args:
+        speed: Speed-up factor (1, 10, 100, ...)
+        window: Reorder heap size in rows
+        max_gap: Cap on idle time between transactions in source seconds
+        stop_event: Set to stop releasing rows
+        tolerance: Lag in seconds after which a send counts as late
+    """
+
+    def __init__(self, speed: float = 1.0, window: int = 1024, max_gap: float = None, **kwargs):
+        super().__init__(None, **kwargs)
+        self.speed = speed
+        self.window = window
+        self.max_gap = max_gap
+
+    def pairs(self, rows):
+        return timestamp_pairs(rows, self.speed, self.window, self.max_gap)
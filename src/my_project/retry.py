@@ -0,0 +1,198 @@
+"""Retry policy and circuit breaker for the transports.
+
+``RetryPolicy`` decides whether a failed attempt is retried. The decision
+depends on the status (``rules`` maps status codes to a maximum attempt
+count; ``None`` stands for connection errors and timeouts). Backoff is
+exponential with full jitter, and ``Retry-After`` is honoured. A global
+budget caps retries at a fraction of all requests, so a struggling server
+does not get its load multiplied by the retry count.
+
+``CircuitBreaker`` holds calls back once the recent failure ratio crosses
+a threshold: senders wait in ``wait`` instead of sending, so no rows are
+used up while it is open. After a cool-off it lets a single probe through
+(half-open) and closes again when the probe succeeds. Outcome counts are
+updated without a lock and may be slightly approximate under heavy
+contention; state changes are locked.
+"""
+
+import itertools
+import random
+import threading
+import time
+
+DEFAULT_RULES = {429: 5, 502: 3, 503: 3, 504: 3, None: 3}
+PROBE_POLL = 0.05  # seconds between checks while a half-open probe is out
+
+
+def failed(status) -> bool:
+    """True if a response status (None for no response) counts as a server failure."""
+    return status is None or status == 429 or status >= 500
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending when the run stops while the circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Per-status retry rules with exponential backoff and a retry budget.
+
+    Args:
+        rules: Status code (None for connection errors/timeouts) -> maximum
+            attempts, including the first
+        base_delay: Backoff cap in seconds for the first retry
+        max_delay: Upper bound on any single backoff
+        budget_ratio: Retries allowed as a fraction of all requests
+        min_budget: Retries always allowed on top of the ratio
+    """
+
+    def __init__(self, rules: dict = None, base_delay: float = 0.1, max_delay: float = 5.0,
+                 budget_ratio: float = 0.1, min_budget: int = 10):
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.min_budget = min_budget
+        self._requests = itertools.count()
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_statuses(cls, attempts: int, statuses, **kwargs) -> "RetryPolicy":
+        """Build a policy allowing ``attempts`` attempts for each status (and connection errors)."""
+        rules = {int(status): attempts for status in statuses}
+        rules[None] = attempts
+        return cls(rules, **kwargs)
+
+    def started(self):
+        """Count a new request (first attempt) toward the budget."""
+        self.requests = next(self._requests) + 1
+
+    def should_retry(self, status, attempt: int) -> bool:
+        """Return True if attempt number ``attempt`` failing with ``status`` may be retried.
+
+        Takes a retry from the budget when it returns True.
+        """
+        if attempt >= self.rules.get(status, 1):
+            return False
+        with self._lock:
+            if self.retries >= self.min_budget + self.budget_ratio * self.requests:
+                self.exhausted += 1
+                return False
+            self.retries += 1
+        return True
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """Seconds to wait before attempt ``attempt + 1``."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass  # HTTP-date form: fall back to backoff
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling time window.
+
+    Args:
+        failure_ratio: Failed fraction of calls in the window that opens it
+        min_calls: Calls needed in the window before it can open
+        window: Seconds of outcomes considered
+        open_seconds: Time to stay open before letting a probe through
+        stop_event: Once set, ``wait`` gives up instead of waiting on
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_ratio: float = 0.5, min_calls: int = 20, window: float = 10.0,
+                 open_seconds: float = 5.0, stop_event: threading.Event = None):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.stop_event = stop_event or threading.Event()
+        self.state = self.CLOSED
+        self.opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._probe = None
+        self._reset_window(time.monotonic())
+
+    def _reset_window(self, now: float):
+        self._window_start = now
+        self._calls = 0
+        self._failures = 0
+
+    def allow(self):
+        """Return a ticket (truthy) if a call may be sent now, else False.
+
+        Pass the ticket back to ``record`` with the call's outcome; the
+        half-open probe gets a ticket of its own.
+        """
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state, self._probe = self.HALF_OPEN, None
+            if self.state == self.HALF_OPEN and self._probe is None:
+                self._probe = object()  # exactly one probe while half-open
+                return self._probe
+            self.rejected += 1
+        return False
+
+    def retry_in(self) -> float:
+        """Seconds until ``allow`` may let a call through again."""
+        if self.state == self.OPEN:
+            return max(self._opened_at + self.open_seconds - time.monotonic(), PROBE_POLL)
+        return PROBE_POLL if self.state == self.HALF_OPEN else 0.0
+
+    def wait(self):
+        """Block until a call may be sent.
+
+        Returns:
+            The ticket from ``allow`` once the call is allowed, False if
+            ``stop_event`` was set first
+        """
+        while not (ticket := self.allow()):
+            if self.stop_event.wait(self.retry_in()):
+                return False
+        return ticket
+
+    def record(self, success: bool, ticket=None):
+        """Record the outcome of a call that was allowed.
+
+        Args:
+            success: Whether the call succeeded
+            ticket: What ``allow`` or ``wait`` returned for the call. While
+                half-open only the probe's outcome changes the state; calls
+                admitted before the breaker opened are ignored.
+        """
+        if self.state == self.HALF_OPEN:
+            with self._lock:
+                if self.state != self.HALF_OPEN or ticket is None or ticket is not self._probe:
+                    return
+                if success:
+                    self.state = self.CLOSED
+                    self._reset_window(time.monotonic())
+                else:
+                    self._open()
+            return
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._reset_window(now)
+        self._calls += 1
+        if not success:
+            self._failures += 1
+            if self._calls >= self.min_calls and self._failures >= self.failure_ratio * self._calls:
+                with self._lock:
+                    if self.state == self.CLOSED:
+                        self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        print(f"⚡ Circuit breaker open for {self.open_seconds:.0f}s "
+              f"({self._failures}/{self._calls} calls failed)")
@@ -0,0 +1,230 @@
+"""Thread-pool replay driver."""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from my_project.batching import DEFAULT_LINGER, UNSUPPORTED_STATUSES, batch_body, batches, demux, failed_batch
+from my_project.concurrency import congested
+from my_project.framl import process_framl_response, transaction_id_of
+from my_project.metrics import record_call, record_error, watch_in_flight
+from my_project.pipeline import ACK, ALERT, PIPELINE, AckStage, split_by_transaction
+from my_project.sinks import record_empty
+from my_project.transport import Transport
+
+
+def process_single_row(payload: dict, token: str, transport: Transport, ack_run: int = 0) -> list:
+    """Send one normalized payload and return the output rows.
+
+    Args:
+        payload: Record from ``normalize_frame`` (or ``prepare_payload``),
+            or an ``EncodedPayload`` from a compiled payload store
+        token: API token
+        transport: Shared HTTP transport
+        ack_run: 1 to call fraud-ack instead of fraud-alert
+
+    Returns:
+        Flattened rule rows, a single ack row, or a single error row
+    """
+    started = time.perf_counter()
+    try:
+        if ack_run == 1:
+            # Call ACK API with the same payload
+            ack_response = transport.send_fraud_ack(payload, token)
+            record_call(time.perf_counter() - started, ack=True)
+            return [{
+                "transaction_id": transaction_id_of(payload),
+                "ack_status": ack_response
+            }]
+        response_json = transport.send_transaction(payload, token)
+        latency = time.perf_counter() - started
+        rows = process_framl_response(response_json)
+        record_call(latency, rules=len(rows))
+        return rows
+
+    except Exception as e:
+        record_error(time.perf_counter() - started)
+        return [{
+            "transaction_id": transaction_id_of(payload),
+            "error": str(e)
+        }]
+
+
+def process_batch(payloads: list, token: str, transport: Transport, ack_run: int = 0) -> list:
+    """Send payloads as one batch request and return their output rows.
+
+    Falls back to ``process_single_row`` per payload (for good) once the
+    server turns out to have no batch endpoint.
+
+    Args:
+        payloads: Records as for ``process_single_row``
+        token: API token
+        transport: Shared HTTP transport
+        ack_run: 1 to call fraud-ack instead of fraud-alert
+
+    Returns:
+        The rows ``process_single_row`` would return for each payload, in order
+    """
+    if transport.batch_supported:
+        try:
+            started = time.perf_counter()
+            results = transport.send_batch(batch_body(payloads), token, ack=ack_run == 1)
+            return demux(payloads, results, ack_run, time.perf_counter() - started)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in UNSUPPORTED_STATUSES:
+                return failed_batch(payloads, e, time.perf_counter() - started)
+            if transport.batch_supported:
+                transport.batch_supported = False
+                print(f"⚠️ Batch endpoint unavailable ({e.response.status_code}), sending one request per row")
+        except Exception as e:
+            return failed_batch(payloads, e, time.perf_counter() - started)
+    rows = []
+    for payload in payloads:
+        rows.extend(process_single_row(payload, token, transport, ack_run))
+    return rows
+
+
+def report_progress(done: int, total_calls: int, start_time: float, step: int = 1) -> float:
+    """Print progress every 100 calls and return the new interval start.
+
+    ``step`` is how many calls just finished (the size of a batch).
+    """
+    if done // 100 != (done - step) // 100 or done == total_calls:
+        remaining = total_calls - done if total_calls else "?"
+        elapsed = time.time() - start_time
+        print(f"\U0001F552 API calls done: {done} | Remaining: {remaining} | Time elapsed: {elapsed:.2f} sec")
+        return time.time()
+    return start_time
+
+
+def run_threaded(rows, token: str, transport: Transport, max_workers: int = 50,
+                 ack_run: int = 0, stop_event: threading.Event = None,
+                 total_calls: int = None, responses: list = None, queue_depth: int = None,
+                 controller=None, batch_size: int = 1, linger: float = DEFAULT_LINGER,
+                 ack_workers: int = None, ack_queue: int = None) -> list:
+    """Replay rows through a thread pool.
+
+    Rows are pulled lazily and at most ``queue_depth`` are queued or in
+    flight at once, so ``rows`` may be a generator over a file of any size.
+
+    Args:
+        rows: Iterable of normalized payload dicts
+        token: API token
+        transport: Shared HTTP transport; size its pool to ``max_workers``
+        max_workers: Number of worker threads
+        ack_run: 1 to call fraud-ack instead of fraud-alert, 2 (``PIPELINE``)
+            to call fraud-alert then fraud-ack for every row (see ``pipeline``)
+        stop_event: Set to stop early; pending rows are skipped
+        total_calls: Row count for progress output, if known
+        responses: List to append output rows to, so callers keep partial
+            results on interrupt
+        queue_depth: Bound on submitted-but-unfinished rows; defaults to
+            twice ``max_workers``
+        controller: ``AimdController`` setting the in-flight limit instead
+            of ``queue_depth``; it should not exceed ``max_workers``
+        batch_size: Send up to this many rows per request (see ``batching``);
+            ``queue_depth`` and the controller then count batches
+        linger: Seconds a partial batch waits for more rows
+        ack_workers: Ack-stage threads in pipeline mode; defaults to
+            ``max_workers`` (size the transport pool for both stages)
+        ack_queue: Bound on alerts waiting for their ack in pipeline mode
+
+    Returns:
+        Output rows in completion order
+    """
+    stop_event = stop_event or threading.Event()
+    responses = [] if responses is None else responses
+    queue_depth = queue_depth or 2 * max_workers
+    start_time = time.time()
+    done = 0
+
+    if batch_size > 1:
+        rows = batches(rows, batch_size, linger, stop_event)
+        send, calls_in = process_batch, len
+    else:
+        send, calls_in = process_single_row, lambda item: 1
+
+    stage = None
+    if ack_run == PIPELINE:
+        stage = AckStage(lambda payload: process_single_row(payload, token, transport, ACK), responses,
+                         ack_workers or max_workers, ack_queue, stop_event)
+
+    def wrapped_task(item):
+        if stop_event.is_set():
+            return [], calls_in(item), True
+        if stage is None:
+            rows = send(item, token, transport, ack_run)
+            record_empty(responses, item if batch_size > 1 else [item], rows)
+            return rows, calls_in(item), not congested(rows)
+        # Pipeline: the ack stage writes the joined rows
+        rows = send(item, token, transport, ALERT)
+        ok = not congested(rows)
+        if batch_size > 1:
+            for payload, alert_rows in zip(item, split_by_transaction(item, rows)):
+                stage.submit(payload, alert_rows)
+        else:
+            stage.submit(item, rows)
+        return [], calls_in(item), ok
+
+    submitted = {}
+
+    def collect(finished):
+        nonlocal done, start_time
+        for future in finished:
+            ok = False
+            calls = 1
+            try:
+                rows, calls, ok = future.result()
+                responses.extend(rows)
+            except Exception as e:
+                responses.append({
+                    "transaction_id": "UNKNOWN",
+                    "error": f"Unhandled exception: {str(e)}"
+                })
+            if controller is not None:
+                controller.observe(time.perf_counter() - submitted.pop(future), ok)
+            done += calls
+            start_time = report_progress(done, total_calls, start_time, calls)
+
+    pending = set()
+    source_error = None
+    watch_in_flight(lambda: len(pending))
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            iterator = iter(rows)
+            while True:
+                try:
+                    row_dict = next(iterator)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    source_error = e  # finish what is in flight, then fail the run
+                    break
+                if stop_event.is_set():
+                    break
+                future = executor.submit(wrapped_task, row_dict)
+                pending.add(future)
+                if controller is not None:
+                    submitted[future] = time.perf_counter()
+                    if len(pending) >= controller.limit:
+                        controller.saturated()
+                    # The limit may have shrunk: drain below it before the next submit
+                    while len(pending) >= controller.limit:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(finished)
+                elif len(pending) >= queue_depth:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+
+            while pending and not stop_event.is_set():
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+    finally:
+        if stage is not None:
+            stage.close()  # sends the acks still queued
+        watch_in_flight(None)
+    if source_error is not None:
+        raise source_error
+    return responses
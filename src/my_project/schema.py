@@ -0,0 +1,216 @@
+"""Fraud-alert payload schema and a compiled, column-wise validator.
+
+Rows the FRAML API would reject (bad dates, an ``intermediary`` that does
+not parse, non-numeric amounts, a missing ``transaction_id``) are caught
+before they cost a network round trip and a worker slot. ``compile_schema``
+turns ``PAYLOAD_SCHEMA`` into one vectorized check per column. A check
+tests a whole preprocessed frame (or streamed chunk) at once, and per-row
+reasons are built only for the rows that fail.
+
+Columns that ``pd.read_csv`` renamed because the header repeats a name
+(``sender_msisdn.1``, ``receiver_incorporation_date.1``) are folded back
+into their field. A row whose copies disagree is rejected, and the
+``.N`` columns never reach the payload.
+
+Rejected rows go to a CSV with the original cells and a ``reject_reason``
+column, so the source data can be fixed and replayed:
+
+    python -m my_project.cli --input sample.csv --rejects rejects.csv
+"""
+
+import ast
+import os
+import re
+from collections import Counter
+
+import pandas as pd
+
+from my_project.framl import NUMERICAL_FIELDS_TO_CHECK, STRING_FIELDS_TO_CHECK
+from my_project.normalize import parse_dates
+
+TYPES = ("string", "number", "datetime", "intermediary")
+REASON_COLUMN = "reject_reason"
+
+# field -> {"type": one of TYPES, "required": cell must be non-blank and not "NA"}
+PAYLOAD_SCHEMA = {
+    "transaction_id": {"type": "string", "required": True},
+    "txn_date_time": {"type": "datetime", "required": True},
+    "sender_hashcode": {"type": "string"},
+    "receiver_hashcode": {"type": "string"},
+    **{field: {"type": "string"} for field in STRING_FIELDS_TO_CHECK},
+    **{field: {"type": "number"} for field in NUMERICAL_FIELDS_TO_CHECK},
+    "sender_incorporation_date": {"type": "datetime"},
+    "receiver_incorporation_date": {"type": "datetime"},
+    "intermediary": {"type": "intermediary"},
+}
+
+_DUPLICATE = re.compile(r"^(?P<field>.+)\.(?P<copy>\d+)$")
+
+
+def _blank(series: pd.Series) -> pd.Series:
+    # Cells are already stripped strings (or numbers) after ``preprocess_frame``
+    return series.isna() | series.isin(("", "NA"))
+
+
+def _valid_intermediary(value: str) -> bool:
+    try:
+        parsed = ast.literal_eval(value)
+    except Exception:
+        return False
+    return isinstance(parsed, list) and all(isinstance(item, dict) for item in parsed)
+
+
+def _check_number(series: pd.Series, blank: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.Series(False, index=series.index)
+    return ~blank & pd.to_numeric(series, errors="coerce").isna()
+
+
+def _check_datetime(series: pd.Series, blank: pd.Series, field: str) -> pd.Series:
+    # Shares the per-column format cache with ``normalize_frame``, which parses this column next
+    return ~blank & parse_dates(series, field).isna()
+
+
+def _check_intermediary(series: pd.Series, blank: pd.Series) -> pd.Series:
+    values = series[~blank].astype(str)
+    valid = {value: _valid_intermediary(value) for value in values.unique()}
+    bad = pd.Series(False, index=series.index)
+    bad[values.index] = ~values.map(valid).astype(bool)
+    return bad
+
+
+_MESSAGES = {
+    "number": "not a number",
+    "datetime": "unparseable date",
+    "intermediary": "not a list of objects",
+}
+
+
+def _type_check(field: str, kind: str):
+    if kind == "number":
+        return _check_number
+    if kind == "datetime":
+        return lambda series, blank: _check_datetime(series, blank, field)
+    if kind == "intermediary":
+        return _check_intermediary
+    return None  # any string is fine
+
+
+def compile_schema(schema: dict = None, reject_path: str = None) -> "Validator":
+    """Compile a schema into a ``Validator``.
+
+    Args:
+        schema: ``{field: {"type": ..., "required": bool}}``; defaults to
+            ``PAYLOAD_SCHEMA``
+        reject_path: CSV the rejected rows are written to, or None to only
+            count them
+
+    Returns:
+        A ``Validator`` to run over every preprocessed frame or chunk
+    """
+    schema = PAYLOAD_SCHEMA if schema is None else schema
+    checks = []
+    for field, spec in schema.items():
+        kind = spec.get("type", "string")
+        if kind not in TYPES:
+            raise ValueError(f"unknown type {kind!r} for {field!r}, expected one of {TYPES}")
+        checks.append((field, bool(spec.get("required")), _type_check(field, kind), _MESSAGES.get(kind)))
+    return Validator(checks, reject_path)
+
+
+class Validator:
+    """Split frames into valid rows and rejects; built by ``compile_schema``.
+
+    Attributes:
+        checked: Rows seen so far
+        rejected: Rows rejected so far
+        reasons: Rejected rows per field
+    """
+
+    def __init__(self, checks: list, reject_path: str = None):
+        self.checks = checks
+        self.fields = {field for field, *_ in checks}
+        self.reject_path = reject_path
+        self.checked = 0
+        self.rejected = 0
+        self.reasons = Counter()
+        self._rejects_started = False
+
+    def _fold_duplicates(self, df: pd.DataFrame, reasons: dict) -> pd.DataFrame:
+        copies = {}
+        for column in df.columns:
+            match = _DUPLICATE.match(str(column))
+            if match and match["field"] in self.fields and column not in self.fields:
+                copies.setdefault(match["field"], []).append(column)
+        if not copies:
+            return df
+        df = df.copy()
+        for field, columns in copies.items():
+            for column in columns:
+                copy_blank = _blank(df[column])
+                if field not in df:
+                    df[field] = df[column]
+                    continue
+                base = df[field]
+                conflict = ~copy_blank & ~_blank(base) & (base.astype(str) != df[column].astype(str))
+                for index in conflict[conflict].index:
+                    reasons.setdefault(index, []).append(f"{field}: conflicting duplicate column {column}")
+                df[field] = base.mask(_blank(base) & ~copy_blank, df[column])
+        return df.drop(columns=[column for columns in copies.values() for column in columns])
+
+    def validate(self, df: pd.DataFrame):
+        """Check a preprocessed frame.
+
+        Args:
+            df: Frame from ``preprocess_frame`` / ``read_and_preprocess_csv``
+
+        Returns:
+            ``(valid, rejects)``: the passing rows (duplicate columns folded
+            in) and the failing rows as they came in, plus ``reject_reason``
+        """
+        reasons = {}
+        folded = self._fold_duplicates(df, reasons)
+        for field, required, check, message in self.checks:
+            if field not in folded:
+                if required:
+                    for index in folded.index:
+                        reasons.setdefault(index, []).append(f"{field}: missing column")
+                continue
+            if not required and check is None:
+                continue
+            series = folded[field]
+            blank = _blank(series)
+            if required:
+                for index in blank[blank].index:
+                    reasons.setdefault(index, []).append(f"{field}: required")
+            if check is not None:
+                bad = check(series, blank)
+                for index in bad[bad].index:
+                    reasons.setdefault(index, []).append(f"{field}: {message} {series[index]!r}")
+
+        self.checked += len(df)
+        if not reasons:
+            return folded, df.iloc[:0]
+        rejected = folded.index.isin(list(reasons))
+        rejects = df[rejected].copy()
+        rejects[REASON_COLUMN] = ["; ".join(reasons[index]) for index in rejects.index]
+        self.rejected += len(rejects)
+        for index_reasons in reasons.values():
+            self.reasons.update({reason.split(":", 1)[0] for reason in index_reasons})
+        return folded[~rejected], rejects
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Validate a frame, write its rejects to ``reject_path`` and return the valid rows."""
+        valid, rejects = self.validate(df)
+        if len(rejects) and self.reject_path:
+            # The first chunk of a run replaces an old reject file; later chunks append
+            header = not self._rejects_started or not os.path.exists(self.reject_path)
+            rejects.to_csv(self.reject_path, mode="a" if self._rejects_started else "w", header=header, index=False)
+            self._rejects_started = True
+        return valid
+
+    def summary(self) -> str:
+        """One-line report of the rejected rows and their most common causes."""
+        causes = ", ".join(f"{field} {count}" for field, count in self.reasons.most_common(5))
+        where = f" -> '{self.reject_path}'" if self.reject_path and self.rejected else ""
+        return f"rejected {self.rejected} of {self.checked} rows{where}" + (f" ({causes})" if causes else "")
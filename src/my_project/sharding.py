@@ -0,0 +1,252 @@
+"""Multi-process sharded replay.
+
+One interpreter tops out on JSON encoding and response flattening long
+before the server does. ``run_sharded`` compiles the input into a payload
+store once and partitions it by ``sender_hashcode``, so each customer's
+transactions stay in order on one shard, as velocity rules expect. It then
+starts one process per shard, each running ``cli.run`` with its own send
+pool over its shard of the store.
+
+Shards report their counters to the launcher every second, and the launcher
+prints the combined TPS. At the end it merges the per-shard result files
+into one output and adds the shards' counters and latency histograms to the
+launcher's ``metrics``, so a sharded run reads back like an in-process one.
+"""
+
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from my_project import cli, metrics
+from my_project.auth import DEFAULT_TTL, TokenManager
+from my_project.exporter import MetricsExporter, MetricsServer, ProcessStats
+from my_project.histogram import Histogram, format_summary
+from my_project.ingest import load_payloads
+from my_project.payload_store import PREFIX_PLACEHOLDER, PayloadStore, compile_store, partition
+from my_project.schema import compile_schema
+from my_project.sinks import format_for, merge_parts
+from my_project.transport import BASE_URL, TENANT_ID, Transport
+
+
+def shard_path(path: str, shard: int, shards: int) -> str:
+    """Return the per-shard name for ``path``: ``<stem>.shardK-of-N<ext>``."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.shard{shard}-of-{shards}{ext}"
+
+
+def _report(shard: int, results, stop: threading.Event):
+    process = ProcessStats()
+    while not stop.wait(1):
+        results.put(("progress", shard, metrics.sample(process)))
+
+
+def _shard_main(shard: int, options: dict, results):
+    # Process entry point: replay one shard, then send back its counters and latencies
+    stop = threading.Event()
+    threading.Thread(target=_report, args=(shard, results, stop), daemon=True).start()
+    try:
+        rows = cli.run(**options)
+    except BaseException:
+        results.put(("error", shard, traceback.format_exc()))
+        return
+    finally:
+        stop.set()
+    results.put(("done", shard, {"rows": rows, "totals": metrics.registry.totals(),
+                                 "latency": metrics.latencies.snapshot()}))
+
+
+def _warm_token(options: dict):
+    # Authenticate once up front so the shards all pick the token up from the cache
+    base_url = options.get("base_url", BASE_URL)
+    tenant_id = options.get("tenant_id", TENANT_ID)
+    transport = Transport(base_url, tenant_id, pool_size=1)
+    try:
+        TokenManager(transport.authenticate, ttl=options.get("token_ttl", DEFAULT_TTL),
+                     cache_path=options["token_cache"], cache_key=f"{base_url}|{tenant_id}").get()
+    finally:
+        transport.close()
+
+
+# Per-shard record fields that add up across shards
+_SUMMED = metrics.COUNTERS + ("in_flight", "cpu_percent", "rss_mb")
+
+
+def _log_progress(latest: dict, running: int, shards: int, last: dict, outputs: list) -> dict:
+    record = {"time": datetime.now().isoformat(timespec="milliseconds"), "tps": 0}
+    record.update(dict.fromkeys(_SUMMED, 0))
+    for shard_record in latest.values():
+        for name in _SUMMED:
+            record[name] = round(record[name] + (shard_record.get(name) or 0), 1)
+    now = time.time()
+    tps = (record["success"] - last["success"]) / (now - last["time"]) if now > last["time"] else 0.0
+    record["tps"] = round(tps)
+    record["shards_running"] = running
+    line = f"TPS: {tps:.0f} | ok {record['success']} err {record['error']}"
+    if record["retry"]:
+        line += f" retry {record['retry']}"
+    line += f" | in-flight {record['in_flight']} | cpu {record['cpu_percent']}% rss {record['rss_mb']}MB"
+    line += f" | shards running {running}/{shards}"
+    print(f"📈 Real-time {line}")
+    for output in outputs:
+        output(record)
+    return {"success": record["success"], "time": now}
+
+
+def _collect(processes: list, results, outputs: list = ()) -> tuple:
+    # Wait for every shard, printing and exporting the combined TPS once per second
+    latest, done, failed = {}, {}, {}
+    last = {"success": 0, "time": time.time()}
+    while len(done) + len(failed) < len(processes):
+        try:
+            kind, shard, payload = results.get(timeout=1)
+        except queue.Empty:
+            for shard, process in enumerate(processes):
+                if shard not in done and shard not in failed and process.exitcode not in (None, 0):
+                    failed[shard] = f"process exited with code {process.exitcode}"
+        except KeyboardInterrupt:
+            print("\n⛔ Interrupt received. Waiting for the shards to save their results...")
+            continue
+        else:
+            if kind == "progress":
+                latest[shard] = payload
+            elif kind == "done":
+                done[shard] = payload
+                latest[shard] = payload["totals"]  # finished: nothing in flight, no CPU
+            else:
+                failed[shard] = payload
+        if time.time() - last["time"] >= 1:
+            running = len(processes) - len(done) - len(failed)
+            last = _log_progress(latest, running, len(processes), last, outputs)
+    return done, failed
+
+
+def _concat(parts: list, path: str, append: bool = False):
+    # Join the shards' text files in shard order, removing each once copied
+    with open(path, "ab" if append else "wb") as out:
+        for part in parts:
+            if os.path.exists(part):
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+
+
+def run_sharded(input_csv: str, output_csv: str, shards: int, payload_store: str = None,
+                recompile: bool = False, chunksize: int = None, sort: bool = True, party_prefix: str = "",
+                output_format: str = None, function_values: str = "nested", resume: bool = False,
+                journal_path: str = None, metrics_log: str = metrics.TPS_LOG, metrics_port: int = None,
+                validate: bool = True, reject_path: str = None, formatted_payloads: str = None,
+                **options) -> int:
+    """Replay a CSV from ``shards`` processes partitioned by ``sender_hashcode``.
+
+    Args:
+        input_csv: Transactions to replay
+        output_csv: Merged output file; shards write ``<stem>.shardK-of-N<ext>``
+            first, which are removed once merged
+        shards: Number of worker processes
+        payload_store: Compiled payload store to partition (built from
+            ``input_csv`` if missing); a temporary one is used if None
+        recompile: Rebuild ``payload_store`` even if it exists
+        chunksize: Stream the input this many rows at a time while compiling
+        sort: Compile in ``txn_date_time`` order
+        party_prefix: Prefix for ``sender_hashcode`` / ``receiver_hashcode``,
+            applied when compiling
+        output_format: Output format; inferred from ``output_csv`` if None
+        function_values: ``functionValue`` layout for Parquet/Arrow output
+        resume: Resume every shard from its own journal and append to the
+            merged output
+        journal_path: Journal name to derive the per-shard journals from;
+            defaults to ``<shard output>.journal``
+        metrics_log: Where the combined per-second records are exported
+            (see ``exporter``); None to only print them
+        metrics_port: Serve the combined record on ``/metrics`` on this local port
+        validate: Check rows against ``schema.PAYLOAD_SCHEMA`` while compiling
+        reject_path: Where rejected rows go; defaults to ``<output>.rejects.csv``
+        formatted_payloads: CSV of the request envelopes sent; shards log
+            to ``<stem>.shardK-of-N<ext>``, which are concatenated into it
+        **options: Any other ``cli.run`` argument, applied to every shard
+            (``max_workers``, ``concurrency`` and ``rate`` are per shard)
+
+    Returns:
+        Number of rows merged into ``output_csv``
+    """
+    fmt = output_format or format_for(output_csv)
+    workdir = None
+    if payload_store is None:
+        workdir = tempfile.mkdtemp(prefix="framl-shards-")
+        payload_store = os.path.join(workdir, "payloads")
+    try:
+        if recompile or not PayloadStore.exists(payload_store):
+            validator = compile_schema(reject_path=reject_path or f"{output_csv}.rejects.csv") if validate else None
+            payloads, _ = load_payloads(input_csv, PREFIX_PLACEHOLDER, chunksize, sort, party_prefix, validator)
+            print(f"Compiled {compile_store(payloads, payload_store)} payloads into '{payload_store}'")
+            if validator is not None:
+                print(f"🧾 Schema check: {validator.summary()}")
+        indexes = partition(payload_store, shards)
+        if options.get("token_cache"):
+            _warm_token(options)
+
+        parts = [shard_path(output_csv, k, shards) for k in range(shards)]
+        payload_parts = [shard_path(formatted_payloads, k, shards) for k in range(shards)] if formatted_payloads else []
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = []
+        start_time = time.time()
+        for k in range(shards):
+            shard_options = dict(options, input_csv=input_csv, output_csv=parts[k], payload_store=payload_store,
+                                 payload_index=indexes[k], output_format=fmt, function_values=function_values,
+                                 resume=resume, monitor=False,
+                                 journal_path=shard_path(journal_path, k, shards) if journal_path else None,
+                                 formatted_payloads=payload_parts[k] if formatted_payloads else None)
+            process = context.Process(target=_shard_main, args=(k, shard_options, results), name=f"shard-{k}")
+            process.start()
+            processes.append(process)
+        exporter = MetricsExporter(metrics_log) if metrics_log else None
+        server = MetricsServer(metrics_port, counters=metrics.COUNTERS).start() if metrics_port is not None else None
+        outputs = []
+        if exporter is not None:
+            outputs.append(exporter.write)
+        if server is not None:
+            outputs.append(server.update)
+        try:
+            done, failed = _collect(processes, results, outputs)
+        finally:
+            for process in processes:
+                process.join()
+            if exporter is not None:
+                exporter.close()
+            if server is not None:
+                server.stop()
+        elapsed = time.time() - start_time
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    totals = dict.fromkeys(metrics.COUNTERS, 0)
+    latency = Histogram()
+    for outcome in done.values():
+        for name, value in outcome["totals"].items():
+            totals[name] += value
+        latency.merge(outcome["latency"])
+    metrics.merge(totals, latency)
+    rows = merge_parts(parts, output_csv, fmt, function_values, append=resume)
+    for part in parts:
+        if os.path.exists(part):
+            os.remove(part)
+    if formatted_payloads:
+        _concat(payload_parts, formatted_payloads, append=resume)
+    print(f"\n✅ Merged {rows} rows from {shards} shards into '{output_csv}'.")
+    print(f"📊 Combined TPS (whole-run average): {totals['success'] / elapsed if elapsed else 0.0:.2f} | "
+          f"ok {totals['success']} | errors {totals['error']} | acks {totals['ack']} | "
+          f"alert rules {totals['alert_rules']} | retries {totals['retry']}")
+    print(f"⏲️ Latency over {latency.count} calls: {format_summary(latency.summary())}")
+    print(f"⏱️ {shards} shards in {elapsed:.2f} sec")
+    if failed:
+        details = "\n".join(f"shard {shard}: {error}" for shard, error in sorted(failed.items()))
+        raise RuntimeError(f"{len(failed)} of {shards} shards failed:\n{details}")
+    return rows
@@ -0,0 +1,459 @@
+"""Streaming result sinks.
+
+Output rows are no longer held in memory until the end of a run. Drivers
+hand each transaction's rows to a sink (which behaves like the ``responses``
+list: ``extend`` and ``append``). A dedicated writer thread drains a bounded
+queue and appends them in batches to the output file, and ``fsync``s it at
+every checkpoint. Memory stays bounded by the queue, and a crash loses at
+most the rows since the last checkpoint.
+
+The format follows the output file's extension: ``.csv``, ``.jsonl`` (or
+``.ndjson``), ``.parquet`` and ``.arrows`` (Arrow IPC stream). Parquet and
+Arrow use the fixed, typed schema from ``columnar`` and need the optional
+``pyarrow`` dependency (``pip install my_project[parquet]``).
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from itertools import islice
+
+from my_project import columnar
+from my_project.framl import transaction_id_of
+from my_project.transport import format_payload
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+FORMATS = ("csv", "jsonl", "parquet", "arrow")
+
+_STOP = object()
+
+
+class _Completed(tuple):
+    """Transaction ids that finished without output rows, queued for the journal."""
+
+
+def record_empty(responses, payloads, rows):
+    """Tell a sink which payloads succeeded without any output rows.
+
+    A response with an empty ``ruleAlert`` flattens to no rows, so the sink
+    cannot journal its transaction from the rows alone. Plain lists (no
+    journal) are left alone.
+
+    Args:
+        responses: Where the rows went; a ``ResultSink`` or a list
+        payloads: The payloads just sent
+        rows: Their output rows (error rows included)
+    """
+    mark_done = getattr(responses, "mark_done", None)
+    if mark_done is None:
+        return
+    seen = {row.get("transaction_id") for row in rows}
+    mark_done([txn_id for txn_id in map(transaction_id_of, payloads) if txn_id not in seen])
+
+
+def format_for(path: str) -> str:
+    """Infer the sink format from a file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    if ext in (".arrow", ".arrows"):
+        return "arrow"
+    return "csv"
+
+
+class ResultSink:
+    """Append output rows to a file from a background writer thread.
+
+    Args:
+        path: Output file; it is truncated when the sink opens unless ``append``
+        batch_size: Rows written per batch
+        flush_interval: Seconds after which a partial batch is written anyway
+        checkpoint_interval: Seconds between ``fsync`` checkpoints
+        max_pending: Bound on queued, unwritten row groups; producers block
+            beyond it, which keeps memory flat when the disk falls behind
+        journal: ``Journal`` to record completed transaction ids in once
+            their rows are durable
+        append: Add to an existing file instead of truncating it
+    """
+
+    # Whether checkpoint() makes written rows durable (Parquet only does at close)
+    durable_checkpoints = True
+
+    def __init__(self, path: str, batch_size: int = 1000, flush_interval: float = 1.0,
+                 checkpoint_interval: float = 5.0, max_pending: int = 10_000,
+                 journal=None, append: bool = False):
+        self.path = path
+        self.journal = journal
+        self.append_mode = append
+        self._completed = {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.rows_written = 0
+        self.rows_checkpointed = 0
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._open()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ----------- producer side (any thread) -----------
+    def extend(self, rows):
+        """Queue the output rows of one transaction."""
+        self._check()
+        rows = list(rows)
+        if rows:
+            self._queue.put(rows)
+
+    def append(self, row: dict):
+        """Queue a single output row."""
+        self.extend([row])
+
+    def mark_done(self, transaction_ids):
+        """Journal transactions that succeeded without producing any output row."""
+        self._check()
+        if transaction_ids:
+            self._queue.put(_Completed(transaction_ids))
+
+    def __len__(self) -> int:
+        return self.rows_written
+
+    def close(self):
+        """Write everything still queued, checkpoint and close the file."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f"result sink for {self.path} failed") from self._error
+
+    # ----------- writer thread -----------
+    def _run(self):
+        batch = []
+        stopped = False
+        last_flush = last_checkpoint = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    stopped = True
+                    break
+                if isinstance(item, _Completed):
+                    if self.journal is not None:
+                        self._completed.update(dict.fromkeys(item))
+                elif item:
+                    batch.extend(item)
+                now = time.monotonic()
+                if batch and (len(batch) >= self.batch_size or now - last_flush >= self.flush_interval):
+                    self._flush(batch)
+                    batch = []
+                    last_flush = now
+                if now - last_checkpoint >= self.checkpoint_interval:
+                    self.checkpoint()
+                    last_checkpoint = now
+            if batch:
+                self._flush(batch)
+            self.checkpoint()
+            self._close()
+            if not self.durable_checkpoints:
+                self._record_completed()
+        except BaseException as e:
+            self._error = e
+            # Keep draining so producers blocked on a full queue are released
+            while not stopped:
+                stopped = self._queue.get() is _STOP
+
+    def _flush(self, batch: list):
+        self._write(batch)
+        self.rows_written += len(batch)
+        if self.journal is not None:
+            for row in batch:
+                if not row.get("error"):
+                    self._completed[row.get("transaction_id")] = None
+
+    def _record_completed(self):
+        if self.journal is not None and self._completed:
+            self.journal.record(self._completed)
+            self._completed = {}
+
+    def checkpoint(self):
+        """Make every row written so far durable, then journal their transactions."""
+        self._sync()
+        self.rows_checkpointed = self.rows_written
+        if self.durable_checkpoints:
+            self._record_completed()
+
+    # ----------- format hooks -----------
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, rows: list):
+        raise NotImplementedError
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonlSink(ResultSink):
+    """One JSON object per line."""
+
+    def _open(self):
+        self._file = open(self.path, "a" if self.append_mode else "w", encoding="utf-8")
+
+    def _write(self, rows: list):
+        self._file.write("".join(json.dumps(row, default=str) + "\n" for row in rows))
+
+
+class CsvSink(ResultSink):
+    """CSV with a header growing in first-seen column order, like ``pd.DataFrame(rows)``.
+
+    Rows only contain the columns seen so far, so a column first seen late in
+    the run lands after the header's last field. ``close`` rewrites the header
+    line in that case so the finished file is rectangular.
+    """
+
+    def _open(self):
+        self._columns = {}
+        self._header_columns = 0
+        if self.append_mode and os.path.exists(self.path):
+            with open(self.path, newline="", encoding="utf-8") as existing:
+                header = next(csv.reader(existing), [])
+            self._columns = {name: i for i, name in enumerate(header)}
+            self._header_columns = len(header)
+        self._file = open(self.path, "a" if self.append_mode else "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+
+    def _write(self, rows: list):
+        columns = self._columns
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns[key] = len(columns)
+        if not self._header_columns:
+            self._writer.writerow(columns)
+            self._header_columns = len(columns)
+        names = list(columns)
+        self._writer.writerows([row.get(name) for name in names] for row in rows)
+
+    def _close(self):
+        self._file.close()
+        if self._header_columns and len(self._columns) > self._header_columns:
+            self._rewrite_header()
+
+    def _rewrite_header(self):
+        tmp = f"{self.path}.tmp"
+        with open(self.path, newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.reader(src)
+            next(reader)
+            writer = csv.writer(dst)
+            writer.writerow(self._columns)
+            writer.writerows(reader)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, self.path)
+
+
+class _ColumnarSink(ResultSink):
+    """Base for Arrow-backed sinks using the fixed schema from ``columnar``."""
+
+    def __init__(self, path: str, layout: str = "nested", **kwargs):
+        self.layout = layout
+        super().__init__(path, **kwargs)
+
+    def _write(self, rows: list):
+        self._writer.write_table(columnar.to_table(rows, self.layout))
+
+
+class ParquetSink(_ColumnarSink):
+    """Parquet, zstd-compressed, one row group per batch.
+
+    Large batches make better row groups, and a Parquet file is only readable
+    once its footer is written at close, so batches default to 64k rows and
+    mid-run checkpoints are no-ops.
+    """
+
+    durable_checkpoints = False
+
+    def __init__(self, path: str, layout: str = "nested", batch_size: int = 65_536,
+                 flush_interval: float = 30.0, **kwargs):
+        super().__init__(path, layout, batch_size=batch_size, flush_interval=flush_interval, **kwargs)
+
+    def _open(self):
+        self._writer = pq.ParquetWriter(self.path, columnar.schema(self.layout), compression="zstd")
+
+    def _sync(self):
+        pass
+
+    def _close(self):
+        self._writer.close()
+
+
+class ArrowSink(_ColumnarSink):
+    """Arrow IPC stream (``.arrows``); every checkpointed batch is readable after a crash.
+
+    Read it back with ``pyarrow.ipc.open_stream``.
+    """
+
+    def _open(self):
+        schema = columnar.schema(self.layout)
+        self._file = open(self.path, "wb")
+        self._writer = pa.ipc.new_stream(self._file, schema)
+
+    def _close(self):
+        self._writer.close()
+        self._file.close()
+
+
+SINKS = {"csv": CsvSink, "jsonl": JsonlSink, "parquet": ParquetSink, "arrow": ArrowSink}
+
+
+class PayloadLog:
+    """Record every request envelope as it is dispatched (``formatted_payloads.csv``).
+
+    Each CSV row holds one ``tt_json`` envelope as a JSON document, as the
+    legacy pilot scripts wrote it, so a run can be checked against exactly
+    what was posted.
+
+    Args:
+        path: CSV file; it is truncated when the log opens unless ``append``
+        append: Add to an existing file instead of truncating it
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.written = 0
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+
+    def tap(self, payloads):
+        """Yield ``payloads`` unchanged, logging each one's envelope as it is taken."""
+        for payload in payloads:
+            body = getattr(payload, "body", None)  # payload_store.EncodedPayload
+            self._writer.writerow([body.decode() if body is not None
+                                   else json.dumps(format_payload(payload), default=str)])
+            self.written += 1
+            yield payload
+
+    def close(self):
+        """Flush and close the file."""
+        self._file.close()
+
+
+def open_sink(path: str, fmt: str = None, layout: str = "nested", **kwargs) -> ResultSink:
+    """Open the sink for ``path``.
+
+    Args:
+        path: Output file
+        fmt: One of ``FORMATS``; inferred from the extension if None
+        layout: ``functionValue`` layout for Parquet/Arrow (``"nested"`` or
+            ``"long"``, see ``columnar``); ignored for CSV and JSONL
+    """
+    fmt = fmt or format_for(path)
+    if fmt not in SINKS:
+        raise ValueError(f"unknown output format {fmt!r}, expected one of {FORMATS}")
+    if issubclass(SINKS[fmt], _ColumnarSink):
+        kwargs["layout"] = layout
+        if kwargs.pop("append", False) and os.path.exists(path):
+            # Parquet and Arrow streams cannot be appended to; continue in a part file
+            path = next_part(path)
+            print(f"📎 Appending to '{path}'")
+    return SINKS[fmt](path, **kwargs)
+
+
+def next_part(path: str) -> str:
+    """Return the first free ``<stem>.partN<ext>`` name next to ``path``."""
+    stem, ext = os.path.splitext(path)
+    n = 1
+    while os.path.exists(f"{stem}.part{n}{ext}"):
+        n += 1
+    return f"{stem}.part{n}{ext}"
+
+
+def _read_rows(path: str, fmt: str):
+    with open(path, newline="" if fmt == "csv" else None) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _read_batches(path: str, fmt: str):
+    if fmt == "parquet":
+        yield from pq.ParquetFile(path).iter_batches(batch_size=65_536)
+    else:
+        with pa.ipc.open_stream(path) as reader:
+            yield from reader
+
+
+def merge_parts(parts, path: str, fmt: str = None, layout: str = "nested", append: bool = False) -> int:
+    """Concatenate result files of the same format into ``path``.
+
+    CSV and JSONL rows are streamed through the matching sink, so CSV headers
+    are unioned in first-seen order. Parquet and Arrow record batches are
+    copied without re-encoding. Missing parts are skipped.
+
+    Args:
+        parts: Result files, e.g. one per shard
+        path: Merged output file
+        fmt: One of ``FORMATS``; inferred from ``path`` if None
+        layout: ``functionValue`` layout of Parquet/Arrow parts
+        append: Add to an existing ``path`` (Parquet/Arrow continue in a
+            part file, as ``open_sink`` does)
+
+    Returns:
+        Number of rows written
+    """
+    fmt = fmt or format_for(path)
+    parts = [part for part in parts if os.path.exists(part)]
+    if fmt not in ("parquet", "arrow"):
+        with open_sink(path, fmt, append=append) as sink:
+            for part in parts:
+                rows = _read_rows(part, fmt)
+                for chunk in iter(lambda: list(islice(rows, 10_000)), []):
+                    sink.extend(chunk)
+        return len(sink)
+
+    columnar._require_pyarrow()
+    if append and os.path.exists(path):
+        path = next_part(path)
+    schema = columnar.schema(layout)
+    rows = 0
+    with open(path, "wb") as f:
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(f, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(f, schema)
+        with writer:
+            for part in parts:
+                for batch in _read_batches(part, fmt):
+                    writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+                    rows += batch.num_rows
+    return rows
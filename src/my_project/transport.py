@@ -0,0 +1,218 @@
+"""Pooled HTTP transport for the FRAML realtime API.
+
+A single ``Transport`` is shared by every worker thread. It keeps one
+``requests.Session`` whose connection pool is sized to the worker count, so
+connections are reused (keep-alive) instead of paying a TCP+TLS handshake
+per transaction.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from my_project import metrics
+from my_project.auth import TokenManager
+from my_project.retry import CircuitOpenError, failed
+
+BASE_URL = "https://caas-pilot-tdss.tookitaki.ai"
+AUTH_ENDPOINT = "/api/v1/users/auth"
+TXN_ENDPOINT = "/api/v1/realtime/5/fraud-alert"
+FRAUD_ACK_ENDPOINT = "/api/v1/realtime/5/fraud-ack"
+TENANT_ID = "5"
+BATCH_SUFFIX = "/batch"
+
+AUTH_BASIC = "Basic dG9va2l0YWtpOnRvb2tpdGFraQ=="
+
+
+def request_body(payload) -> dict:
+    # Pre-encoded payloads (payload_store.EncodedPayload) and batch bodies are posted as-is
+    if isinstance(payload, bytes):
+        return {"data": payload}
+    body = getattr(payload, "body", None)
+    if body is not None:
+        return {"data": body}
+    return {"json": format_payload(payload)}
+
+
+def format_payload(payload: dict) -> dict:
+    """Wrap a normalized row in the ``tt_json`` envelope expected by the API.
+
+    Args:
+        payload: Normalized transaction fields
+
+    Returns:
+        Request body for the fraud-alert and fraud-ack endpoints
+    """
+    return {"payload": payload, "format": "tt_json", "version": "1"}
+
+
+class Transport:
+    """Keep-alive HTTP client shared by all send workers.
+
+    Args:
+        base_url: Scheme and host of the FRAML deployment
+        tenant_id: Tenant passed to the auth endpoint
+        pool_size: Maximum number of pooled connections; match it to the
+            number of concurrent workers
+        timeout: Per-request timeout in seconds, or None to wait forever
+        retry: ``RetryPolicy`` for failed sends, or None to never retry
+        breaker: ``CircuitBreaker`` that holds sends back while the server
+            is failing, or None
+    """
+
+    def __init__(self, base_url: str = BASE_URL, tenant_id: str = TENANT_ID,
+                 pool_size: int = 50, timeout=None, retry=None, breaker=None):
+        self.base_url = base_url
+        self.tenant_id = tenant_id
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.txn_url = f"{base_url}{TXN_ENDPOINT}"
+        self.ack_url = f"{base_url}{FRAUD_ACK_ENDPOINT}"
+        self.retry = retry
+        self.breaker = breaker
+        self.batch_supported = True
+        self.session = self._build_session()
+        self._headers = {}
+        self._headers_lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        # pool_block keeps the number of sockets bounded by pool_size even if
+        # more threads than expected share the transport.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                              pool_block=True)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    def headers_for(self, token: str) -> dict:
+        """Return the (cached) request headers for a token.
+
+        Args:
+            token: API token from ``get_token``
+
+        Returns:
+            Header dict; callers must not mutate it
+        """
+        headers = self._headers.get(token)
+        if headers is None:
+            with self._headers_lock:
+                headers = self._headers.setdefault(token, {
+                    "Authorization": f"Token {token}",
+                    "Content-Type": "application/json",
+                })
+        return headers
+
+    def authenticate(self) -> dict:
+        """Authenticate against the tenant and return the auth response body."""
+        headers = {
+            "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
+            "Authorization": AUTH_BASIC,
+            "Content-Type": "application/json;charset=UTF-8",
+            "Origin": self.base_url,
+            "Referer": f"{self.base_url}/",
+            "User-Agent": "Mozilla/5.0",
+        }
+        params = {"tenantId": self.tenant_id}
+        response = self.session.post(f"{self.base_url}{AUTH_ENDPOINT}", headers=headers,
+                                     json={}, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def get_token(self) -> str:
+        """Authenticate against the tenant and return the API token."""
+        return self.authenticate().get("token")
+
+    def _send(self, url: str, payload, tokens, value) -> requests.Response:
+        response = self.session.post(url, headers=self.headers_for(value),
+                                     timeout=self.timeout, **request_body(payload))
+        if response.status_code == 401 and tokens is not None:
+            # Token expired under us: refresh once for all workers, retry once
+            value = tokens.invalidate(value)
+            response = self.session.post(url, headers=self.headers_for(value),
+                                         timeout=self.timeout, **request_body(payload))
+        response.raise_for_status()
+        return response
+
+    def _post(self, url: str, payload, token) -> requests.Response:
+        tokens = token if isinstance(token, TokenManager) else None
+        if self.retry is not None:
+            self.retry.started()
+        attempt = 1
+        while True:
+            ticket = self.breaker.wait() if self.breaker is not None else None
+            if ticket is False:
+                raise CircuitOpenError(f"circuit breaker open, not sending to {url}")
+            value = tokens.get() if tokens is not None else token  # may have been refreshed during backoff
+            try:
+                response = self._send(url, payload, tokens, value)
+            except requests.HTTPError as e:
+                error, status, retry_after = e, e.response.status_code, e.response.headers.get("Retry-After")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, status, retry_after = e, None, None
+            except BaseException:
+                if self.breaker is not None:
+                    self.breaker.record(False, ticket)  # releases a half-open probe that failed unexpectedly
+                raise
+            else:
+                if self.breaker is not None:
+                    self.breaker.record(True, ticket)
+                return response
+            if self.breaker is not None:
+                self.breaker.record(not failed(status), ticket)
+            if self.retry is None or not self.retry.should_retry(status, attempt):
+                raise error
+            metrics.record_retry()
+            time.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    def send_transaction(self, payload: dict, token: str) -> dict:
+        """Post a transaction to the fraud-alert endpoint.
+
+        Args:
+            payload: Normalized transaction fields, or a pre-encoded
+                ``EncodedPayload``
+            token: API token, or a ``TokenManager`` to refresh and retry
+                once on 401 (other failures follow ``retry``)
+
+        Returns:
+            Decoded JSON response
+        """
+        response = self._post(self.txn_url, payload, token)
+        return response.json()
+
+    def send_fraud_ack(self, payload: dict, token: str) -> str:
+        """Post a transaction to the fraud-ack endpoint.
+
+        Args:
+            payload: Normalized transaction fields, or a pre-encoded
+                ``EncodedPayload``
+            token: API token, or a ``TokenManager`` to refresh and retry
+                once on 401 (other failures follow ``retry``)
+
+        Returns:
+            Response body, e.g. ``"request_fraud_transaction_pilot"``
+        """
+        response = self._post(self.ack_url, payload, token)
+        return response.text.strip()
+
+    def send_batch(self, body: bytes, token, ack: bool = False) -> list:
+        """Post a batch to the ``/batch`` variant of fraud-alert or fraud-ack.
+
+        Args:
+            body: Request body from ``batching.batch_body``
+            token: API token or ``TokenManager``, as for ``send_transaction``
+            ack: Post to fraud-ack instead of fraud-alert
+
+        Returns:
+            Decoded response, one entry per payload
+        """
+        url = (self.ack_url if ack else self.txn_url) + BATCH_SUFFIX
+        return self._post(url, body, token).json()
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
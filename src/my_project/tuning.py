@@ -0,0 +1,238 @@
+"""Offline tuning harness: find the worker count, pool size and driver that pay off.
+
+``tune`` replays a fixed slice of the input against a local
+``MockFramlServer`` with the given server-side latency. It runs every
+combination of the grid several times: worker count, connection-pool size,
+batch size and driver. The drivers are ``thread``, ``async``, and
+``sharded``, which is the thread driver across ``shards`` processes. The
+median of the repeats goes into the report. The report is printed as a
+throughput and latency curve per driver, followed by a recommended
+configuration, which is also written as a run profile:
+
+    python -m my_project.tuning --input sample.csv --rows 2000 --latency lognormal:40,0.4 \\
+        --workers 8,32,64,128 --pool-size auto --batch-size 1,20 --drivers thread,async,sharded \\
+        --profile-out recommended.toml
+    my_project --profile recommended.toml --input full.csv --base-url https://...
+
+Nothing leaves the machine: every run targets the mock on localhost.
+``sharded`` wall times include starting the worker processes, so give it a
+slice large enough that start-up is small next to the replay.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+
+import pandas as pd
+
+from my_project.mock_server import MockFramlServer
+from my_project.profiles import expand_sweep, format_report, measure, write_report
+
+DRIVERS = ("thread", "async", "sharded")
+DEFAULT_SHARDS = min(os.cpu_count() or 1, 4)
+_CURVE_WIDTH = 40
+
+
+def make_slice(input_csv: str, rows: int, path: str) -> int:
+    """Write the first ``rows`` rows of ``input_csv`` to ``path``.
+
+    A shorter input is repeated, with ``_<copy>`` appended to the repeated
+    transaction ids so each row is still a distinct transaction.
+
+    Returns:
+        Rows written
+    """
+    df = pd.read_csv(input_csv, dtype=str, keep_default_na=False)
+    if rows > len(df):
+        copies = []
+        for copy in range(-(-rows // len(df))):
+            chunk = df.copy()
+            if copy:
+                chunk["transaction_id"] = chunk["transaction_id"] + f"_{copy}"
+            copies.append(chunk)
+        df = pd.concat(copies, ignore_index=True)
+    df = df.head(rows)
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def _run_options(config: dict, shards: int) -> dict:
+    # One "workers" value drives max_workers (thread) and concurrency (async)
+    options = dict(config)
+    workers = options.pop("workers")
+    driver = options.pop("driver")
+    options.update(max_workers=workers, concurrency=workers, driver="async" if driver == "async" else "thread",
+                   shards=shards if driver == "sharded" else 1)
+    return options
+
+
+def _median(values):
+    values = [value for value in values if value is not None]
+    return round(statistics.median(values), 3) if values else None
+
+
+def tune(input_csv: str, rows: int = 1000, workers=(8, 32, 64), pool_sizes=(None,), batch_sizes=(1,),
+         drivers=("thread", "async"), repeats: int = 3, latency="20", shards: int = DEFAULT_SHARDS,
+         workdir: str = None, report_path: str = None, **server_options) -> list:
+    """Replay a slice of ``input_csv`` against the mock for every grid point.
+
+    Args:
+        input_csv: Transactions to take the slice from
+        rows: Slice size (the input is repeated if shorter)
+        workers: Worker counts; threads per process for ``thread`` and
+            ``sharded``, in-flight requests for ``async``
+        pool_sizes: Connection-pool sizes; None sizes the pool to the workers
+        batch_sizes: Transactions per request (1 disables batching)
+        drivers: Any of ``DRIVERS``
+        repeats: Runs per grid point; the report keeps the medians
+        latency: Mock server-side latency, in ms or as a distribution
+            (see ``mock_server.LatencyModel``)
+        shards: Processes for the ``sharded`` driver
+        workdir: Directory for the slice and outputs; a temporary one is
+            used and removed if None
+        report_path: CSV to write the report to, or None
+        **server_options: More ``MockFramlServer`` arguments, e.g. ``errors``
+
+    Returns:
+        One report row per grid point: the grid values, then the median
+        calls, errors, TPS and latency percentiles of its runs
+    """
+    unknown = set(drivers) - set(DRIVERS)
+    if unknown:
+        raise ValueError(f"unknown drivers {sorted(unknown)}, expected some of {DRIVERS}")
+    grid = {"driver": list(drivers), "workers": list(workers), "pool_size": list(pool_sizes),
+            "batch_size": list(batch_sizes)}
+    temporary = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="framl-tune-")
+    server_options = dict({"rules": "realistic", "trigger_rate": 0.05, "seed": 7}, **server_options)
+    report = []
+    try:
+        slice_csv = os.path.join(workdir, "slice.csv")
+        make_slice(input_csv, rows, slice_csv)
+        configs = expand_sweep({}, grid)
+        with MockFramlServer(latency=latency, **server_options) as server:
+            base = dict(input_csv=slice_csv, base_url=server.url, token_cache=None, monitor=False,
+                        metrics_log=None, validate=False)
+            for index, config in enumerate(configs):
+                print(f"\n🧪 Tuning {index + 1}/{len(configs)}: " + ", ".join(f"{k}={v}" for k, v in config.items()))
+                runs = []
+                for repeat in range(repeats):
+                    options = dict(base, **_run_options(config, shards), pre_fix=f"tune{index}r{repeat}",
+                                   output_csv=os.path.join(workdir, f"out{index}.csv"), resume=False)
+                    runs.append(measure(options))
+                row = dict(config, shards=shards if config["driver"] == "sharded" else 1)
+                for field in ("calls", "errors", "error_rate", "rows", "elapsed_s", "tps", "p50_ms", "p90_ms", "p99_ms"):
+                    row[field] = _median(run.get(field) for run in runs)
+                report.append(row)
+    finally:
+        if temporary:
+            shutil.rmtree(workdir, ignore_errors=True)
+    if report_path:
+        write_report(report, report_path)
+    return report
+
+
+def format_curve(report: list) -> str:
+    """Render TPS and p99 against worker count, one block per driver, batch and pool size."""
+    best = max((row["tps"] or 0 for row in report), default=0) or 1
+    groups = {}
+    for row in report:
+        groups.setdefault((row["driver"], row["batch_size"], row["pool_size"]), []).append(row)
+    lines = ["📈 Throughput / latency curve"]
+    for (driver, batch_size, pool_size), rows in groups.items():
+        lines.append(f"{driver} (batch {batch_size}, pool {pool_size or 'auto'})")
+        for row in sorted(rows, key=lambda r: r["workers"]):
+            bar = "█" * max(1, round(_CURVE_WIDTH * (row["tps"] or 0) / best))
+            lines.append(f"  {row['workers']:>5} workers {row['tps'] or 0:>10.1f} TPS  "
+                         f"p99 {row['p99_ms'] if row['p99_ms'] is not None else '-':>8} ms  {bar}")
+    return "\n".join(lines)
+
+
+def recommend(report: list, tolerance: float = 0.05, max_error_rate: float = 0.01, p99_budget_ms: float = None):
+    """Pick the cheapest configuration within ``tolerance`` of the best TPS.
+
+    Configurations over ``max_error_rate`` or ``p99_budget_ms`` are left
+    out, as are those with no error rate or p99 to check. Among the
+    rest, anything reaching ``(1 - tolerance)`` of the best TPS
+    qualifies. The one using the fewest connections in total (workers x
+    processes, then pool size) wins, since extra workers past the knee
+    only add load and latency.
+
+    Returns:
+        The chosen report row, or None if nothing met the limits
+    """
+    candidates = [row for row in report if row.get("tps")
+                  and row.get("error_rate") is not None and row["error_rate"] <= max_error_rate
+                  and row.get("p99_ms") is not None and (p99_budget_ms is None or row["p99_ms"] <= p99_budget_ms)]
+    if not candidates:
+        return None
+    best = max(row["tps"] for row in candidates)
+    good = [row for row in candidates if row["tps"] >= (1 - tolerance) * best]
+    return min(good, key=lambda row: (row["workers"] * row["shards"], row["pool_size"] or row["workers"],
+                                      -row["tps"]))
+
+
+def profile_text(row: dict) -> str:
+    """Render a recommended configuration as a run profile for ``--profile``."""
+    driver = "async" if row["driver"] == "async" else "thread"
+    lines = [f"# Recommended by my_project.tuning: {row['tps']} TPS, p99 {row['p99_ms']} ms on the mock",
+             "[concurrency]", f'driver = "{driver}"',
+             f"{'concurrency' if driver == 'async' else 'max_workers'} = {row['workers']}",
+             f"shards = {row['shards']}"]
+    if row["pool_size"]:
+        lines += ["", "[pooling]", f"pool_size = {row['pool_size']}"]
+    lines += ["", "[batching]", f"batch_size = {row['batch_size']}"]
+    return "\n".join(lines) + "\n"
+
+
+def _ints(text: str) -> list:
+    return [None if value == "auto" else int(value) for value in text.split(",")]
+
+
+def main(argv=None):
+    """Run the tuning grid from the command line."""
+    parser = argparse.ArgumentParser(prog="my_project.tuning",
+                                     description="Find the best replay configuration against a local mock.")
+    parser.add_argument("--input", default="sample.csv", help="CSV to take the replay slice from")
+    parser.add_argument("--rows", type=int, default=1000, help="slice size (the input is repeated if shorter)")
+    parser.add_argument("--workers", type=_ints, default=[8, 32, 64], help="comma-separated worker counts")
+    parser.add_argument("--pool-size", type=_ints, default=[None],
+                        help='comma-separated pool sizes, "auto" to match the workers')
+    parser.add_argument("--batch-size", type=_ints, default=[1], help="comma-separated batch sizes")
+    parser.add_argument("--drivers", type=lambda text: text.split(","), default=["thread", "async"],
+                        help=f"comma-separated, from {', '.join(DRIVERS)}")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS, help="processes for the sharded driver")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per configuration (medians are reported)")
+    parser.add_argument("--latency", default="20", help='mock latency in ms or a distribution, e.g. "lognormal:20,0.5"')
+    parser.add_argument("--errors", help='mock failure rates, e.g. "503:0.01"')
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="leave out configurations above this")
+    parser.add_argument("--p99-budget", type=float, help="leave out configurations with p99 above this many ms")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="recommend the cheapest configuration within this fraction of the best TPS")
+    parser.add_argument("--report", default="tuning_report.csv", help="CSV report of every configuration")
+    parser.add_argument("--profile-out", help="write the recommendation as a run profile (TOML)")
+    args = parser.parse_args(argv)
+
+    report = tune(args.input, args.rows, args.workers, args.pool_size, args.batch_size, args.drivers,
+                  args.repeats, args.latency, args.shards, report_path=args.report, errors=args.errors)
+    print()
+    print(format_report(report, ["driver", "workers", "pool_size", "batch_size"]))
+    print()
+    print(format_curve(report))
+    best = recommend(report, args.tolerance, args.max_error_rate, args.p99_budget)
+    if best is None:
+        print("\n⚠️ No configuration met the error-rate and latency limits")
+        return None
+    print("\n🏁 Recommended configuration:")
+    print(profile_text(best))
+    if args.profile_out:
+        with open(args.profile_out, "w") as f:
+            f.write(profile_text(best))
+        print(f"Wrote '{args.profile_out}'")
+    return best
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Tests for async_engine module."""
+
+import pytest
+
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.runner import run_threaded
+from my_project.transport import Transport
+
+pytest.importorskip("aiohttp")
+
+from my_project.async_engine import run_async  # noqa: E402
+
+ROWS = [{"transaction_id": f"t{i}", "txn_date_time": "2025-07-01T00:10:00Z"} for i in range(50)]
+
+
+def test_async_matches_threaded():
+    """Test that both drivers produce the same output rows."""
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=4)
+        threaded = run_threaded(ROWS, MOCK_TOKEN, transport, max_workers=4)
+        transport.close()
+        asynced = run_async(ROWS, MOCK_TOKEN, server.url, concurrency=16)
+    key = lambda row: row["transaction_id"]  # noqa: E731
+    assert sorted(asynced, key=key) == sorted(threaded, key=key)
+    assert len(asynced) == len(ROWS)
+
+
+def test_async_errors_become_rows():
+    """Test that a failing request yields an error row."""
+    with MockFramlServer() as server:
+        rows = run_async(ROWS[:3], "bad-token", server.url, concurrency=2)
+    assert all("error" in row for row in rows)
+    assert len(rows) == 3
@@ -0,0 +1,58 @@
+"""Tests for auth module."""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from my_project.auth import TokenManager
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.transport import Transport
+
+
+def test_token_is_cached():
+    """Test that get only authenticates once while the token is valid."""
+    calls = []
+    tokens = TokenManager(lambda: calls.append(1) or {"token": "abc"}, ttl=60)
+    assert tokens.get() == "abc"
+    assert tokens.get() == "abc"
+    assert len(calls) == 1
+
+
+def test_server_expiry_and_background_refresh():
+    """Test that expires_in is honoured and the token is refreshed before it runs out."""
+    counter = iter(range(100))
+    tokens = TokenManager(lambda: {"token": f"t{next(counter)}", "expires_in": 0.4},
+                          refresh_margin=0.2).start()
+    try:
+        assert tokens.get() == "t0"
+        time.sleep(0.5)
+        assert tokens.refreshes >= 2
+        assert tokens.get() != "t0"
+    finally:
+        tokens.stop()
+
+
+def test_token_persists_across_managers(tmp_path):
+    """Test that a second manager reuses the token from the cache file."""
+    cache = tmp_path / "tokens.json"
+    TokenManager(lambda: {"token": "abc"}, ttl=600, cache_path=str(cache), cache_key="k").get()
+    assert json.loads(cache.read_text())["k"]["token"] == "abc"
+    tokens = TokenManager(lambda: {"token": "fresh"}, ttl=600, cache_path=str(cache), cache_key="k")
+    assert tokens.get() == "abc"
+    assert tokens.refreshes == 0
+
+
+def test_unauthorized_refreshes_once():
+    """Test that concurrent 401s on a rotated token trigger a single re-authentication."""
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=8)
+        tokens = TokenManager(transport.authenticate, ttl=600)
+        assert tokens.get() == MOCK_TOKEN
+        server.rotate_token()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda i: transport.send_transaction({"transaction_id": str(i)}, tokens),
+                                        range(50)))
+        assert len(results) == 50
+        assert server.auth_calls == 2
+        assert tokens.get() == server.token
+        transport.close()
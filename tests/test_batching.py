@@ -0,0 +1,130 @@
+"""Tests for batching module."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from my_project.batching import abatches, batch_body, batches
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.payload_store import EncodedPayload, encode_payload
+from my_project.runner import run_threaded
+from my_project.transport import Transport
+
+ROWS = [{"transaction_id": f"t{i}", "sender_amount": float(i)} for i in range(25)]
+
+
+def _replay(server, rows, **options):
+    transport = Transport(server.url, pool_size=4)
+    responses = run_threaded(rows, MOCK_TOKEN, transport, max_workers=4, **options)
+    transport.close()
+    return sorted(responses, key=lambda row: row["transaction_id"]), transport
+
+
+def test_batch_body_splices_encoded_payloads():
+    """Test that dicts are encoded and pre-encoded bodies are spliced in as-is."""
+    encoded = EncodedPayload(encode_payload({"transaction_id": "b"}), "b")
+    body = json.loads(batch_body([{"transaction_id": "a"}, encoded]))
+    assert [item["payload"]["transaction_id"] for item in body] == ["a", "b"]
+    assert body[0]["format"] == "tt_json"
+
+
+def test_batches_fill_or_linger():
+    """Test that batches fill up on a fast source and flush after linger on a slow one."""
+    assert [len(batch) for batch in batches(range(7), 3)] == [3, 3, 1]
+
+    def slow():
+        for i in range(4):
+            time.sleep(0.05)
+            yield i
+
+    assert [len(batch) for batch in batches(slow(), 3, linger=0.01)] == [1, 1, 1, 1]
+
+    async def collect(rows, linger):
+        return [batch async for batch in abatches(rows, 3, linger)]
+
+    async def aslow():
+        for i in range(4):
+            await asyncio.sleep(0.05)
+            yield i
+
+    assert asyncio.run(collect(range(7), 0.01)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert asyncio.run(collect(aslow(), 0.01)) == [[0], [1], [2], [3]]
+    assert asyncio.run(collect(aslow(), None)) == [[0, 1, 2], [3]]
+
+
+def test_batches_raise_source_errors():
+    """Test that a failing source ends the batches with its error, after the rows read before it."""
+    def broken():
+        yield from range(4)
+        raise ValueError("bad row")
+
+    seen = []
+    with pytest.raises(ValueError, match="bad row"):
+        for batch in batches(broken(), 3):
+            seen.append(batch)
+    assert seen == [[0, 1, 2], [3]]
+
+
+@pytest.mark.parametrize("driver", ["thread", "async"])
+def test_source_error_fails_batched_run(driver):
+    """Test that a source failing mid-run fails the run after sending the rows read before it."""
+    def broken():
+        yield from ROWS[:7]
+        raise ValueError("bad row")
+
+    if driver == "async":
+        pytest.importorskip("aiohttp")
+        from my_project.async_engine import run_async
+    responses = []
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=4)
+        with pytest.raises(ValueError, match="bad row"):
+            if driver == "async":
+                run_async(broken(), MOCK_TOKEN, server.url, concurrency=4, responses=responses,
+                          batch_size=5, linger=0.01)
+            else:
+                run_threaded(broken(), MOCK_TOKEN, transport, max_workers=4, responses=responses, batch_size=5)
+        transport.close()
+    assert sorted(row["transaction_id"] for row in responses) == sorted(row["transaction_id"] for row in ROWS[:7])
+
+
+def test_batched_replay_matches_single_requests():
+    """Test that batched output equals per-row output with a fraction of the requests."""
+    with MockFramlServer() as server:
+        single, _ = _replay(server, ROWS)
+        requests = server.requests
+        batched, _ = _replay(server, ROWS, batch_size=10)
+        assert server.requests - requests == 3
+        assert server.batch_items == 25
+        acks, _ = _replay(server, ROWS, batch_size=10, ack_run=1)
+    assert batched == single
+    assert {row["ack_status"] for row in acks} == {"request_fraud_transaction_pilot"}
+
+
+def test_item_errors_and_fallback():
+    """Test per-item failures in a batch response and the fallback without a batch endpoint."""
+    with MockFramlServer(errors={503: 1.0}) as server:
+        rows, _ = _replay(server, ROWS[:5], batch_size=5)
+    assert [row["error"] for row in rows] == ["503 injected failure"] * 5
+
+    with MockFramlServer(batch=False) as server:
+        rows, transport = _replay(server, ROWS[:5], batch_size=5)
+        assert server.batch_items == 0
+    assert not transport.batch_supported
+    assert [row["transaction_id"] for row in rows] == [f"t{i}" for i in range(5)]
+    assert all("error" not in row for row in rows)
+
+
+def test_async_batched_replay():
+    """Test the async driver in batch mode, including its fallback."""
+    pytest.importorskip("aiohttp")
+    from my_project.async_engine import run_async
+
+    for batch in (True, False):
+        with MockFramlServer(batch=batch) as server:
+            rows = run_async(ROWS, MOCK_TOKEN, server.url, concurrency=4, batch_size=10, linger=0.01)
+            assert server.batch_items == (25 if batch else 0)
+        assert sorted(row["transaction_id"] for row in rows) == sorted(row["transaction_id"] for row in ROWS)
+        assert all("error" not in row for row in rows)
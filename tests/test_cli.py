@@ -0,0 +1,67 @@
+"""Tests for cli module."""
+
+import csv
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from my_project.cli import main
+from my_project.mock_server import MockFramlServer
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+
+
+def test_main_replays_sample(tmp_path, monkeypatch):
+    """Test an end-to-end thread-driver run against the mock server."""
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "out.csv"
+    with MockFramlServer() as server:
+        main(["--input", str(SAMPLE_CSV), "--output", str(output), "--base-url", server.url,
+              "--max-workers", "2", "--prefix", "t", "--no-token-cache"])
+    df = pd.read_csv(output)
+    assert len(df) == 5
+    assert df["transaction_id"].str.startswith("tTxn").all()
+
+
+def test_resume_skips_completed(tmp_path, monkeypatch):
+    """Test that --resume only sends transactions missing from the journal."""
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "out.csv"
+    args = ["--input", str(SAMPLE_CSV), "--output", str(output), "--max-workers", "2", "--no-token-cache"]
+    with MockFramlServer() as server:
+        main(args + ["--base-url", server.url])
+        first = server.requests
+        main(args + ["--base-url", server.url, "--resume"])
+        assert server.requests - first == 1  # only the auth call
+    assert len(pd.read_csv(output)) == 5
+
+
+@pytest.mark.parametrize("extra", [[], ["--batch-size", "5"], ["--driver", "async"]])
+def test_resume_skips_transactions_without_rules(tmp_path, monkeypatch, extra):
+    """Test that a transaction whose alert has no rules is journalled though it writes no rows."""
+    if "async" in extra:
+        pytest.importorskip("aiohttp")
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "out.csv"
+    args = ["--input", str(SAMPLE_CSV), "--output", str(output), "--max-workers", "2", "--no-token-cache"] + extra
+    with MockFramlServer(rules="empty") as server:
+        main(args + ["--base-url", server.url])
+        first = server.requests
+        main(args + ["--base-url", server.url, "--resume"])
+        assert server.requests - first == 1  # only the auth call
+
+
+@pytest.mark.parametrize("extra", [[], ["--payload-store", "store"]])
+def test_formatted_payloads(tmp_path, monkeypatch, extra):
+    """Test that --formatted-payloads records one tt_json envelope per transaction sent."""
+    monkeypatch.chdir(tmp_path)
+    with MockFramlServer() as server:
+        main(["--input", str(SAMPLE_CSV), "--output", "out.csv", "--base-url", server.url, "--max-workers", "2",
+              "--prefix", "t", "--no-token-cache", "--formatted-payloads", "sent.csv"] + extra)
+    with open(tmp_path / "sent.csv", newline="") as f:
+        envelopes = [json.loads(row[0]) for row in csv.reader(f)]
+    assert len(envelopes) == 5
+    assert all(e["format"] == "tt_json" and e["version"] == "1" for e in envelopes)
+    assert {e["payload"]["transaction_id"] for e in envelopes} == set(pd.read_csv("out.csv")["transaction_id"])
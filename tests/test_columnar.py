@@ -0,0 +1,43 @@
+"""Tests for columnar module."""
+
+import pytest
+
+from my_project.columnar import function_values, schema, to_table
+from my_project.framl import process_framl_response
+from my_project.mock_server import build_alert
+
+pa = pytest.importorskip("pyarrow")
+
+TXN = {"transaction_id": "t1", "txn_date_time": "2025-07-01T00:10:00Z", "sender_amount": 12.5}
+
+
+def test_function_values_unflatten():
+    """Test that "(type)"/"(value)" columns fold back into typed entries."""
+    row = process_framl_response(build_alert(TXN))[0]
+    assert function_values(row) == [
+        {"name": "Sum of Transactions", "type": "number", "value": 0.0, "text": "0.0"},
+        {"name": "Count of Transactions", "type": "number", "value": 0.0, "text": "0.0"},
+    ]
+
+
+def test_nested_table_is_typed():
+    """Test the nested layout keeps one row per rule with typed core columns."""
+    table = to_table(process_framl_response(build_alert(TXN)))
+    assert table.schema == schema("nested")
+    assert table.num_rows == 1
+    assert table.column("sender_amount").to_pylist() == [12.5]
+    assert table.column("txn_date_time").type == pa.timestamp("s", tz="UTC")
+    assert pa.types.is_dictionary(table.column("ruleId").type)
+    assert [f["name"] for f in table.column("functionValue").to_pylist()[0]] == [
+        "Sum of Transactions", "Count of Transactions"]
+
+
+def test_long_table_expands_function_values():
+    """Test the long layout has one row per function value and keeps ack/error rows."""
+    rows = process_framl_response(build_alert(TXN)) + [{"transaction_id": "t2", "error": "boom"}]
+    table = to_table(rows, "long")
+    assert table.schema == schema("long")
+    assert table.column("transaction_id").to_pylist() == ["t1", "t1", "t2"]
+    assert table.column("function_value").to_pylist() == [0.0, 0.0, None]
+    with pytest.raises(ValueError):
+        schema("wide")
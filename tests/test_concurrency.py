@@ -0,0 +1,75 @@
+"""Tests for concurrency module."""
+
+from my_project.concurrency import AimdController, congested
+from my_project.mock_server import MockFramlServer
+from my_project.runner import run_threaded
+from my_project.transport import Transport
+
+
+def _interval(controller, latency, ok=True, saturated=True, calls=20):
+    if saturated:
+        controller.saturated()
+    for _ in range(calls):
+        controller.observe(latency, ok)
+    return controller.update()
+
+
+def test_additive_increase_when_saturated():
+    """Test that a saturated, healthy interval adds one to the limit."""
+    controller = AimdController(max_limit=12, initial=10, interval=3600)
+    assert _interval(controller, 0.01).reason == "increase"
+    assert _interval(controller, 0.01).limit == 12
+    assert _interval(controller, 0.01).reason == "hold"  # at max_limit
+    assert _interval(AimdController(max_limit=50, interval=3600), 0.01, saturated=False).reason == "hold"
+
+
+def test_multiplicative_decrease_on_congestion():
+    """Test that congestion errors or p99 above target halve the limit."""
+    controller = AimdController(max_limit=100, initial=40, interval=3600)
+    _interval(controller, 0.010)  # baseline p99 = 10 ms, target 20 ms
+    assert controller.target == 0.02
+    decision = _interval(controller, 0.050)
+    assert (decision.reason, decision.limit) == ("latency", 20)
+    decision = _interval(controller, 0.010, ok=False)
+    assert (decision.reason, decision.limit) == ("errors", 10)
+    fixed = AimdController(max_limit=100, initial=8, latency_target=0.001, min_limit=4, interval=3600)
+    assert _interval(fixed, 0.01).limit == 4
+    assert _interval(fixed, 0.01).limit == 4
+
+
+def test_only_throttling_and_server_errors_are_congestion():
+    """Test which failed calls count against the limit."""
+    assert congested([{"transaction_id": "t", "error": "503 Server Error: Service Unavailable for url: x"}])
+    assert congested([{"transaction_id": "t", "error": "429, message='Too Many Requests', url='x'"}])
+    assert congested([{"error": "502 injected failure"}, {"error": "502 injected failure"}])
+    assert not congested([{"transaction_id": "t", "error": "400 Client Error: Bad Request for url: x"}])
+    assert not congested([{"transaction_id": "t", "error": "circuit breaker open, not sending to x"}])
+    assert not congested([{"transaction_id": "t", "error": "Expecting value: line 1 column 1 (char 0)"}])
+    assert not congested([{"error": "503 injected failure"}, {"transaction_id": "t", "ruleId": "r"}])
+    assert not congested([])
+
+
+def test_thread_driver_follows_limit():
+    """Test that run_threaded never exceeds the controller's limit and lets it grow."""
+    controller = AimdController(max_limit=8, initial=2, interval=0.05, latency_target=1.0)
+    with MockFramlServer(latency=0.005) as server:
+        transport = Transport(server.url, pool_size=8)
+        rows = [{"transaction_id": str(i)} for i in range(300)]
+        responses = run_threaded(rows, "mock-token", transport, max_workers=8, controller=controller)
+        transport.close()
+    assert len(responses) == 300
+    assert all("error" not in row for row in responses)
+    assert controller.summary()["decisions"].get("increase", 0) >= 1
+    assert controller.limit > 2
+
+
+def test_client_errors_do_not_shrink_limit():
+    """Test that a run failing with 4xx keeps growing the limit instead of backing off."""
+    controller = AimdController(max_limit=8, initial=2, interval=0.05, latency_target=1.0)
+    with MockFramlServer(latency=0.005, errors={400: 1.0}) as server:
+        transport = Transport(server.url, pool_size=8)
+        rows = [{"transaction_id": str(i)} for i in range(300)]
+        responses = run_threaded(rows, "mock-token", transport, max_workers=8, controller=controller)
+        transport.close()
+    assert all("400" in row["error"] for row in responses)
+    assert "errors" not in controller.summary()["decisions"] and controller.limit > 2
@@ -0,0 +1,37 @@
+"""Tests for datetimes module."""
+
+import pandas as pd
+
+from my_project.datetimes import DatetimeParser, sniff_format
+
+
+def test_sniff_format_picks_dominant():
+    """Test that the most common format in the sample wins."""
+    values = pd.Series(["7/1/2025 12:10 AM"] * 5 + ["2025-07-01T00:10:00Z"])
+    assert sniff_format(values) == "%m/%d/%Y %I:%M %p"
+
+
+def test_parse_mixed_column_with_residue():
+    """Test dominant-format parsing plus residue fallbacks and blanks."""
+    parser = DatetimeParser()
+    series = pd.Series(["2025-07-01T00:10:00.000Z", "2025-07-01T01:10:00.000Z", "01/07/2025 02:00:00",
+                        "", "NA", "July 1 2025 3pm", "garbage"] + ["2025-07-02T00:00:00.000Z"] * 4)
+    parsed = parser.parse(series, "txn_date_time")
+    assert list(parsed[:3]) == [pd.Timestamp("2025-07-01 00:10"), pd.Timestamp("2025-07-01 01:10"),
+                                pd.Timestamp("2025-07-01 02:00")]
+    assert parsed[3:5].isna().all()
+    assert parsed[5] == pd.Timestamp("2025-07-01 15:00")
+    assert pd.isna(parsed[6])
+    assert parser.cache == {"txn_date_time": "%Y-%m-%dT%H:%M:%S.%fZ"}
+
+
+def test_cache_is_reused_and_refreshed():
+    """Test that the cached format is reused, and dropped once it stops fitting."""
+    parser = DatetimeParser(infer=False)
+    parser.parse(pd.Series(["2025-07-01 00:10:00"]), "d")
+    assert parser.cache["d"] == "%Y-%m-%d %H:%M:%S"
+    parsed = parser.parse(pd.Series(["7/1/2025 12:10 AM", "7/2/2025 12:10 AM"]), "d")
+    assert parsed.notna().all()
+    assert "d" not in parser.cache
+    parser.parse(pd.Series(["7/1/2025 12:10 AM"]), "d")
+    assert parser.cache["d"] == "%m/%d/%Y %I:%M %p"
@@ -0,0 +1,67 @@
+"""Tests for exporter module."""
+
+import csv
+import json
+import threading
+
+import requests
+
+from my_project import metrics
+from my_project.exporter import MetricsExporter, MetricsServer, ProcessStats, render_prometheus
+
+RECORD = {"time": "2025-07-01T00:00:00.000", "tps": 120, "in_flight": 8, "success": 500, "error": 2,
+          "p99_ms": 35.5, "cpu_percent": 40.0, "rss_mb": 80.5, "limit": "32 (increase)"}
+
+
+def test_exporter_formats(tmp_path):
+    """Test JSONL, CSV (header written once across runs) and text output."""
+    for name in ("m.jsonl", "m.csv", "m.txt"):
+        for _ in range(2):
+            with MetricsExporter(str(tmp_path / name)) as exporter:
+                exporter.write(RECORD)
+                exporter.write(dict(RECORD, tps=130))
+    lines = (tmp_path / "m.jsonl").read_text().splitlines()
+    assert [json.loads(line)["tps"] for line in lines] == [120, 130, 120, 130]
+    with open(tmp_path / "m.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["tps"] for row in rows] == ["120", "130", "120", "130"]
+    assert (tmp_path / "m.txt").read_text().startswith("2025-07-01T00:00:00.000 - time 2025")
+
+
+def test_prometheus_endpoint():
+    """Test the text exposition and the local /metrics endpoint."""
+    text = render_prometheus(RECORD, counters=metrics.COUNTERS)
+    assert "# TYPE framl_success_total counter\nframl_success_total 500" in text
+    assert "framl_p99_ms 35.5" in text and "limit" not in text and "time" not in text
+    server = MetricsServer(0, counters=metrics.COUNTERS).start()
+    try:
+        server.update(RECORD)
+        response = requests.get(server.url, timeout=5)
+        assert response.status_code == 200
+        assert "framl_in_flight 8" in response.text
+    finally:
+        server.stop()
+
+
+def test_process_stats():
+    """Test that CPU and RSS are reported without psutil."""
+    stats = ProcessStats().sample()
+    assert stats["cpu_percent"] >= 0
+    assert stats["rss_mb"] is None or stats["rss_mb"] > 0
+
+
+def test_monitor_exports_records(tmp_path):
+    """Test that the monitor writes structured records with in-flight and latency fields."""
+    metrics.reset()
+    metrics.record_call(0.01)
+    metrics.watch_in_flight(lambda: 3)
+    path = tmp_path / "tps.jsonl"
+    stop = threading.Event()
+    thread = metrics.start_tps_monitoring(stop, str(path))
+    stop.set()
+    thread.join(timeout=5)
+    metrics.watch_in_flight(None)
+    record = json.loads(path.read_text().splitlines()[0])
+    assert record["in_flight"] == 3
+    assert record["success"] == 1 and record["calls"] == 1
+    assert {"tps", "error", "p50_ms", "p99_ms", "cpu_percent", "rss_mb"} <= set(record)
@@ -0,0 +1,50 @@
+"""Tests for flatten module."""
+
+import pytest
+
+from my_project.flatten import TXN_FIELDS, flatten_response
+from my_project.mock_server import build_alert, load_rules
+
+TXN = {"transaction_id": "t1", "txn_date_time": "2025-07-01T00:10:00Z", "sender_hashcode": "S_1",
+       "sender_amount": 12.5}
+
+
+def reference_flatten(json_response: dict) -> list:
+    # The original one-dict-literal-per-rule implementation
+    txn = json_response["alert"]["txn"]
+    rows = []
+    for rule in json_response["alert"]["ruleAlert"]:
+        row = {field: txn.get(field) for field in TXN_FIELDS}
+        row.update({field: rule.get(field) for field in
+                    ("ruleId", "ruleName", "typologyId", "typologyName", "ruleTriggered", "messageType")})
+        for k, v in rule.get("functionValue", {}).items():
+            if isinstance(v, dict):
+                row[f"{k} (type)"] = v.get("type")
+                row[f"{k} (value)"] = v.get("field")
+            else:
+                row[f"{k} (value)"] = v
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def alert():
+    rules = load_rules("realistic")
+    rules[0]["functionValue"] = {"Plain": 3}  # non-dict entry
+    return build_alert(TXN, rules)
+
+
+def test_flatten_matches_reference(alert):
+    """Test that the fast path produces the same rows and column order."""
+    rows = flatten_response(alert)
+    expected = reference_flatten(alert)
+    assert rows == expected
+    assert [list(row) for row in rows] == [list(row) for row in expected]
+    assert rows[0]["Plain (value)"] == 3 and "Plain (type)" not in rows[0]
+
+
+def test_column_names_are_interned(alert):
+    """Test that function-value column names are shared between rows."""
+    first, second = flatten_response(alert)[4], flatten_response(alert)[4]
+    assert "Sum of Transactions (value)" in first
+    assert all(a is b for a, b in zip(first, second))
@@ -0,0 +1,50 @@
+"""Tests for framl module."""
+
+from my_project.framl import _last_format, prepare_payload, process_framl_response
+
+
+def test_prepare_payload_defaults():
+    """Test NA/0.0 fill, prefixing and date handling."""
+    payload = prepare_payload({"transaction_id": "t1", "txn_date_time": "7/1/2025 12:10 AM",
+                               "sender_hashcode": "S_1", "receiver_hashcode": "",
+                               "sender_amount": ""}, pre_fix="p")
+    assert payload["transaction_id"] == "pTxnt1"
+    assert payload["sender_hashcode"] == "S_1"
+    assert payload["receiver_hashcode"] == "NA"
+    assert payload["sender_amount"] == 0.0
+    assert payload["txn_type"] == "NA"
+    assert payload["txn_date_time"] == "2025-07-01T00:10:00Z"
+    assert payload["sender_incorporation_date"] == "2025-06-24T00:10:00Z"
+    assert payload["intermediary"] == [{"hashcode": ""}]
+
+
+def test_date_format_cache_is_per_column():
+    """Test that columns in different formats each keep their own cached format."""
+    for _ in range(2):
+        payload = prepare_payload({"transaction_id": "t1", "txn_date_time": "2025-07-01 00:10:00",
+                                   "sender_incorporation_date": "7/1/2025 12:10 AM",
+                                   "receiver_incorporation_date": "2025-07-01T00:10:00Z"})
+        assert payload["txn_date_time"] == payload["sender_incorporation_date"] == "2025-07-01T00:10:00Z"
+        assert payload["receiver_incorporation_date"] == "2025-07-01T00:10:00Z"
+    assert _last_format["txn_date_time"] == "%Y-%m-%d %H:%M:%S"
+    assert _last_format["sender_incorporation_date"] == "%m/%d/%Y %I:%M %p"
+
+
+def test_prepare_payload_parses_intermediary():
+    """Test that intermediary strings are evaluated."""
+    payload = prepare_payload({"transaction_id": "t1", "intermediary": "[{'hashcode': 'h'}]"})
+    assert payload["intermediary"] == [{"hashcode": "h"}]
+
+
+def test_process_framl_response():
+    """Test one row per rule with flattened functionValue columns."""
+    response = {"alert": {"txn": {"transaction_id": "t1"}, "ruleAlert": [
+        {"ruleId": "r1", "functionValue": {"Sum": {"type": "number", "field": 1.0}, "Raw": 3}},
+        {"ruleId": "r2"},
+    ]}}
+    rows = process_framl_response(response)
+    assert [row["ruleId"] for row in rows] == ["r1", "r2"]
+    assert rows[0]["transaction_id"] == "t1"
+    assert rows[0]["Sum (type)"] == "number"
+    assert rows[0]["Sum (value)"] == 1.0
+    assert rows[0]["Raw (value)"] == 3
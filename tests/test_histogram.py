@@ -0,0 +1,52 @@
+"""Tests for histogram module."""
+
+import threading
+
+import pytest
+
+from my_project.histogram import BUCKETS, Histogram, LatencyRecorder, _highest_equivalent, _index
+
+
+def test_bucket_precision():
+    """Test that every value maps to a bucket within 1% of it."""
+    for value in [0, 1, 255, 256, 257, 1000, 12345, 999_999, 3_600_000_000]:
+        index = _index(value)
+        assert index < BUCKETS
+        top = _highest_equivalent(index)
+        assert value <= top <= value * 1.01 + 1
+
+
+def test_percentiles():
+    """Test percentiles of a uniform 1..1000 ms distribution."""
+    histogram = Histogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["p50_ms"] == pytest.approx(500, rel=0.01)
+    assert summary["p99_ms"] == pytest.approx(990, rel=0.01)
+    assert summary["p99.9_ms"] == pytest.approx(999, rel=0.01)
+    assert summary["max_ms"] == 1000
+
+
+def test_merge_and_interval():
+    """Test that per-thread histograms merge and intervals only see new samples."""
+    recorder = LatencyRecorder()
+
+    def work(ms):
+        for _ in range(100):
+            recorder.record(ms / 1000)
+
+    threads = [threading.Thread(target=work, args=(ms,)) for ms in (1, 2, 3, 4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert recorder.interval().count == 400
+    recorder.record(0.5)
+    interval = recorder.interval()
+    assert interval.count == 1
+    assert interval.summary()["max_ms"] == pytest.approx(500, rel=0.01)
+    total = recorder.snapshot().summary()
+    assert total["count"] == 401
+    assert total["p50_ms"] == pytest.approx(3, rel=0.01)
@@ -0,0 +1,48 @@
+"""Tests for ingest module."""
+
+import random
+
+import pandas as pd
+import pytest
+
+from my_project.ingest import count_rows, iter_preprocessed_rows, read_and_preprocess_csv
+
+
+@pytest.fixture
+def shuffled_csv(tmp_path):
+    """A CSV whose rows are out of txn_date_time order, with a few blank dates."""
+    stamps = pd.date_range("2025-07-01", periods=200, freq="37min")
+    rows = [{"transaction_id": f"t{i}", "txn_date_time": ts.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+             "sender_first_name": f" name{i} ", "sender_amount": i}
+            for i, ts in enumerate(stamps)]
+    rows[5]["txn_date_time"] = ""
+    rows[17]["txn_date_time"] = ""
+    random.Random(7).shuffle(rows)
+    path = tmp_path / "input.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_external_sort_matches_in_memory(shuffled_csv):
+    """Test that the chunked merge sort yields the same rows as the in-memory path."""
+    expected = read_and_preprocess_csv(shuffled_csv).to_dict("records")
+    streamed = list(iter_preprocessed_rows(shuffled_csv, chunksize=16, sort=True))
+    assert [r["transaction_id"] for r in streamed] == [r["transaction_id"] for r in expected]
+    assert streamed == expected
+    assert [r["txn_date_time"] for r in streamed[-2:]] == ["", ""]
+
+
+def test_unsorted_stream_keeps_file_order(shuffled_csv):
+    """Test that sort=False yields preprocessed rows in file order."""
+    raw = pd.read_csv(shuffled_csv)
+    streamed = list(iter_preprocessed_rows(shuffled_csv, chunksize=30))
+    assert [r["transaction_id"] for r in streamed] == list(raw["transaction_id"])
+    assert streamed[0]["sender_first_name"] == raw["sender_first_name"][0].strip()
+
+
+def test_count_rows(shuffled_csv, tmp_path):
+    """Test row counting with and without a trailing newline."""
+    assert count_rows(shuffled_csv) == 200
+    no_newline = tmp_path / "no_newline.csv"
+    no_newline.write_bytes(b"a,b\n1,2\n3,4")
+    assert count_rows(no_newline) == 2
@@ -0,0 +1,43 @@
+"""Tests for journal module."""
+
+from my_project.journal import Journal
+
+
+def test_record_and_resume(tmp_path):
+    """Test that ids journalled in one run are skipped by the next."""
+    path = str(tmp_path / "run.journal")
+    journal = Journal(path)
+    journal.record(["t1", "t2"])
+    journal.close()
+
+    resumed = Journal(path, resume=True)
+    assert len(resumed) == 2 and "t1" in resumed and "t3" not in resumed
+    rows = [{"transaction_id": f"t{i}"} for i in range(1, 5)]
+    assert [row["transaction_id"] for row in resumed.skip_done(rows)] == ["t3", "t4"]
+    assert resumed.skipped == 2
+    resumed.record(["t3"])
+    resumed.close()
+    assert "t3" in Journal(path, resume=True)
+
+
+def test_resume_without_index_and_torn_line(tmp_path):
+    """Test recovery from a crash: no index and a half-written last line."""
+    path = tmp_path / "run.journal"
+    journal = Journal(str(path))
+    journal.record(["t1"])
+    journal.compact()
+    journal.record(["t2"])  # written after the index
+    with open(path, "ab") as f:
+        f.write(b"t3-torn")
+    resumed = Journal(str(path), resume=True)
+    assert "t1" in resumed and "t2" in resumed and "t3-torn" not in resumed
+    resumed.record(["t4"])
+    assert path.read_text().splitlines() == ["t1", "t2", "t4"]
+
+
+def test_fresh_run_clears_journal(tmp_path):
+    """Test that a run without resume starts an empty journal."""
+    path = str(tmp_path / "run.journal")
+    Journal(path).record(["t1"])
+    assert len(Journal(path, resume=True)) == 1
+    assert len(Journal(path)) == 0
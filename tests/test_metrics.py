@@ -0,0 +1,50 @@
+"""Tests for metrics module."""
+
+import threading
+import types
+
+from my_project import metrics
+from my_project.metrics import ALERT_RULES, ERROR, SUCCESS, MetricsRegistry
+
+
+def test_counters_sum_across_threads():
+    """Test that per-thread shards add up to the run totals."""
+    registry = MetricsRegistry()
+
+    def work():
+        for _ in range(1000):
+            registry.increment(SUCCESS)
+            registry.increment(ALERT_RULES, 3)
+        registry.increment(ERROR)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.totals() == {"success": 8000, "error": 8, "ack": 0, "alert_rules": 24000, "retry": 0}
+
+
+def test_rate_uses_complete_seconds(monkeypatch):
+    """Test the last-second rate, ring wrap-around and the whole-run average."""
+    clock = [1000.5]
+    monkeypatch.setattr(metrics, "time", types.SimpleNamespace(time=lambda: clock[0]))
+    registry = MetricsRegistry(ring_seconds=4)
+    for _ in range(5):
+        registry.increment(SUCCESS)
+    assert registry.rate(SUCCESS) == 0  # the current second is not complete yet
+    clock[0] = 1001.5
+    assert registry.rate(SUCCESS) == 5
+    clock[0] = 1004.5  # same ring slot as second 1000, now stale
+    registry.increment(SUCCESS)
+    clock[0] = 1005.5
+    assert registry.rate(SUCCESS) == 1
+    assert registry.average_rate(SUCCESS) == 6 / 5
+
+
+def test_reset_clears_counts():
+    """Test that reset drops earlier counts."""
+    registry = MetricsRegistry()
+    registry.increment(SUCCESS)
+    registry.reset()
+    assert registry.totals()["success"] == 0
@@ -0,0 +1,57 @@
+"""Tests for mock_server module."""
+
+import pytest
+import requests
+
+from my_project.framl import process_framl_response
+from my_project.mock_server import MOCK_TOKEN, LatencyModel, MockFramlServer, load_rules, parse_errors
+from my_project.transport import Transport
+
+
+def test_latency_specs():
+    """Test parsing and sampling of latency distributions."""
+    assert LatencyModel.parse(0.25).sample() == 0.25
+    assert LatencyModel.parse("5").sample() == 0.005
+    uniform = LatencyModel.parse("uniform:2-10", seed=1)
+    assert all(0.002 <= uniform.sample() <= 0.010 for _ in range(200))
+    lognormal = LatencyModel.parse("lognormal:20,0.5", seed=1)
+    samples = sorted(lognormal.sample() for _ in range(2001))
+    assert samples[1000] == pytest.approx(0.020, rel=0.1)  # median
+    assert all(LatencyModel.parse("normal:1,5", seed=1).sample() >= 0 for _ in range(200))
+    assert LatencyModel.parse("exponential:10", seed=1).sample() > 0
+    with pytest.raises(ValueError):
+        LatencyModel.parse("bimodal:1")
+
+
+def test_parse_errors():
+    """Test the error-injection spec."""
+    assert parse_errors("503:0.01,reset:0.5") == {503: 0.01, "reset": 0.5}
+    assert parse_errors(None) == {}
+
+
+def test_realistic_alerts_flatten_like_production():
+    """Test that the realistic ruleset returns the 30 rules of a pilot response."""
+    with MockFramlServer(rules="realistic", trigger_rate=1.0, seed=3) as server:
+        transport = Transport(server.url, pool_size=1)
+        response = transport.send_transaction({"transaction_id": "t1"}, MOCK_TOKEN)
+        transport.close()
+    rows = process_framl_response(response)
+    assert len(rows) == len(load_rules("realistic")) == 30
+    assert sum(row["ruleTriggered"] is True for row in rows) >= 1
+    assert all(row["transaction_id"] == "t1" for row in rows)
+    assert "Sum of Transactions (value)" in rows[4]
+
+
+def test_random_errors_and_resets():
+    """Test probabilistic status errors and dropped connections."""
+    with MockFramlServer(errors={503: 1.0}) as server:
+        transport = Transport(server.url, pool_size=1)
+        with pytest.raises(requests.HTTPError):
+            transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+        transport.close()
+    with MockFramlServer(errors="reset:1") as server:
+        transport = Transport(server.url, pool_size=1)
+        with pytest.raises(requests.ConnectionError):
+            transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+        assert server.injected >= 1
+        transport.close()
@@ -0,0 +1,44 @@
+"""Tests for normalize module."""
+
+from pathlib import Path
+
+import pandas as pd
+
+from my_project.framl import prepare_payload
+from my_project.ingest import preprocess_frame, read_and_preprocess_csv
+from my_project.normalize import normalize_frame, parse_dates
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+
+
+def assert_matches_row_path(df, pre_fix="p", party_prefix=""):
+    expected = [prepare_payload(row, pre_fix, party_prefix) for row in df.to_dict("records")]
+    assert normalize_frame(df, pre_fix, party_prefix).to_dict("records") == expected
+
+
+def test_sample_matches_row_path():
+    """Test that batch normalization equals prepare_payload on sample.csv."""
+    assert_matches_row_path(read_and_preprocess_csv(SAMPLE_CSV))
+    assert_matches_row_path(read_and_preprocess_csv(SAMPLE_CSV), party_prefix="r6_")
+
+
+def test_edge_cases_match_row_path():
+    """Test blanks, bad dates, NA hashcodes and intermediary strings."""
+    df = preprocess_frame(pd.DataFrame({
+        "transaction_id": ["t1", "", "NA", "t4"],
+        "txn_date_time": ["7/1/2025 12:10 AM", "bad", "", "2025-07-01 00:10:00"],
+        "sender_hashcode": ["S1", "", "NA", None],
+        "sender_amount": [1.5, None, 2.0, None],
+        "sender_incorporation_date": ["2024-01-01T00:00:00Z", "nope", "", ""],
+        "intermediary": ["[{'hashcode': 'h'}]", "", "NA", "[broken"],
+        "txn_type": ["x", " ", "", "y"],
+    }))
+    assert_matches_row_path(df)
+    assert_matches_row_path(df, party_prefix="p_")
+
+
+def test_parse_dates_mixed_formats():
+    """Test per-format fallback and NaT for unparseable cells."""
+    parsed = parse_dates(pd.Series(["2025-07-01T00:10:00.000Z", "7/1/2025 1:05 PM", "NA", "x"]))
+    assert list(parsed[:2]) == [pd.Timestamp("2025-07-01 00:10"), pd.Timestamp("2025-07-01 13:05")]
+    assert parsed[2:].isna().all()
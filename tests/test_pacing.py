@@ -0,0 +1,58 @@
+"""Tests for pacing module."""
+
+import itertools
+import time
+
+import pytest
+
+from my_project.pacing import Pacer, RateStep, parse_rate_schedule, schedule_offsets
+
+
+def test_parse_rate_schedule():
+    """Test constant, stepped and ramped schedule specs."""
+    assert parse_rate_schedule("200") == [RateStep(200.0, 200.0, None)]
+    assert parse_rate_schedule("100:30, 100-500:60,500") == [
+        RateStep(100.0, 100.0, 30.0), RateStep(100.0, 500.0, 60.0), RateStep(500.0, 500.0, None)]
+    with pytest.raises(ValueError):
+        parse_rate_schedule("100,200:5")
+    with pytest.raises(ValueError):
+        parse_rate_schedule("0")
+
+
+def test_schedule_offsets():
+    """Test that stepped schedules emit the right number of sends per step."""
+    offsets = list(schedule_offsets(parse_rate_schedule("10:1,20:1")))
+    assert len(offsets) == 30
+    assert offsets[10] == pytest.approx(1.0)
+    ramp = list(schedule_offsets(parse_rate_schedule("10-30:1")))
+    assert 15 <= len(ramp) <= 25
+    unbounded = list(itertools.islice(schedule_offsets(parse_rate_schedule("100")), 5))
+    assert unbounded == pytest.approx([0.0, 0.01, 0.02, 0.03, 0.04])
+
+
+def test_pace_holds_rate():
+    """Test that rows are released on schedule independent of the consumer."""
+    pacer = Pacer.from_spec("200")
+    start = time.perf_counter()
+    assert list(pacer.pace(range(50))) == list(range(50))
+    assert time.perf_counter() - start == pytest.approx(49 / 200, abs=0.05)
+    assert pacer.stats.keeping_up
+    assert pacer.stats.summary()["target_tps"] == pytest.approx(200, rel=0.05)
+
+
+def test_pace_releases_gil_while_waiting(monkeypatch):
+    """Test that the last stretch before a due time sleeps in slices rather than spinning."""
+    sleeps = []
+    real_sleep = time.sleep
+    monkeypatch.setattr("my_project.pacing.time.sleep", lambda seconds: sleeps.append(seconds) or real_sleep(seconds))
+    assert list(Pacer([0.0, 0.001, 0.002]).pace("abc")) == ["a", "b", "c"]
+    assert sleeps and all(seconds == 0 for seconds in sleeps)
+
+
+def test_slow_consumer_is_reported_late():
+    """Test that a consumer slower than the schedule shows up as lag."""
+    pacer = Pacer.from_spec("1000")
+    for _ in pacer.pace(range(20)):
+        time.sleep(0.01)
+    assert not pacer.stats.keeping_up
+    assert pacer.stats.max_lag > 0.1
@@ -0,0 +1,70 @@
+"""Tests for payload_store module."""
+
+import json
+from pathlib import Path
+
+from my_project.ingest import load_payloads
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.payload_store import PREFIX_PLACEHOLDER, PayloadStore, compile_store, partition, shard_of
+from my_project.runner import process_single_row
+from my_project.transport import Transport, format_payload
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+
+
+def compile_sample(tmp_path):
+    payloads, _ = load_payloads(SAMPLE_CSV, PREFIX_PLACEHOLDER)
+    path = str(tmp_path / "sample.store")
+    assert compile_store(payloads, path) == 5
+    return path
+
+
+def test_patched_records_match_fresh_encoding(tmp_path):
+    """Test that splicing a prefix equals normalizing with that prefix."""
+    path = compile_sample(tmp_path)
+    for pre_fix in ["run1", 'we"ird\\']:
+        expected, _ = load_payloads(SAMPLE_CSV, pre_fix)
+        with PayloadStore(path) as store:
+            records = list(store.iter_payloads(pre_fix))
+            assert [json.loads(r.body) for r in records] == [format_payload(p) for p in expected]
+            assert [r.transaction_id for r in records] == [p["transaction_id"] for p in expected]
+            assert store.get(3, pre_fix) == records[3]
+            assert list(store.iter_payloads(pre_fix, start=2)) == records[2:]
+
+
+def test_records_without_prefix(tmp_path):
+    """Test that records with no prefixed transaction_id are stored unpatched."""
+    path = str(tmp_path / "na.store")
+    compile_store([{"transaction_id": "NA"}], path)
+    with PayloadStore(path) as store:
+        record = store.get(0, "run1")
+    assert json.loads(record.body)["payload"] == {"transaction_id": "NA"}
+    assert record.transaction_id == "NA"
+
+
+def test_partition_by_sender(tmp_path):
+    """Test that shard indexes cover every record once, grouped by sender and in order."""
+    path = str(tmp_path / "senders.store")
+    payloads = [{"transaction_id": f"{PREFIX_PLACEHOLDER}Txn{i}", "sender_hashcode": f"S{i % 7}"} for i in range(100)]
+    compile_store(payloads, path)
+    seen = []
+    for shard, index_path in enumerate(partition(path, 3)):
+        with PayloadStore(path, index_path) as store:
+            records = [json.loads(r.body)["payload"] for r in store.iter_payloads("p")]
+        assert all(shard_of(r["sender_hashcode"], 3) == shard for r in records)
+        ids = [int(r["transaction_id"][len("pTxn"):]) for r in records]
+        assert ids == sorted(ids)
+        seen += ids
+    assert sorted(seen) == list(range(100))
+
+
+def test_send_encoded_payload(tmp_path):
+    """Test posting pre-encoded bodies through the transport."""
+    path = compile_sample(tmp_path)
+    with MockFramlServer() as server, PayloadStore(path) as store:
+        transport = Transport(server.url, pool_size=1)
+        rows = process_single_row(store.get(0, "r1"), MOCK_TOKEN, transport)
+        ack = process_single_row(store.get(0, "r1"), MOCK_TOKEN, transport, ack_run=1)
+        transport.close()
+    assert rows[0]["transaction_id"].startswith("r1Txn")
+    assert ack[0]["transaction_id"] == rows[0]["transaction_id"]
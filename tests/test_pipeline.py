@@ -0,0 +1,94 @@
+"""Tests for pipeline module."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from my_project.cli import main
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.pipeline import PIPELINE, join_ack, split_by_transaction
+from my_project.runner import run_threaded
+from my_project.transport import Transport
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+ROWS = [{"transaction_id": f"t{i}"} for i in range(20)]
+
+
+def test_join_ack():
+    """Test that ack status lands on every alert row and ack failures mark them as errors."""
+    alert = [{"transaction_id": "t", "ruleId": "a"}, {"transaction_id": "t", "ruleId": "b"}]
+    joined = join_ack(alert, [{"transaction_id": "t", "ack_status": "ok"}])
+    assert [row["ack_status"] for row in joined] == ["ok", "ok"]
+    assert "ack_status" not in alert[0]
+    failed = join_ack(alert, [{"transaction_id": "t", "error": "503"}])
+    assert [row["error"] for row in failed] == ["ack failed: 503"] * 2
+    assert split_by_transaction([{"transaction_id": "x"}, {"transaction_id": "t"}], alert) == [[], alert]
+    assert join_ack([], [{"transaction_id": "t", "ack_status": "ok"}]) == [{"transaction_id": "t", "ack_status": "ok"}]
+
+
+@pytest.mark.parametrize("batch_size", [1, 5])
+def test_threaded_pipeline_joins_alert_and_ack(batch_size):
+    """Test one joined result per transaction from a single pass."""
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=4)
+        rows = run_threaded(ROWS, MOCK_TOKEN, transport, max_workers=2, ack_run=PIPELINE,
+                            batch_size=batch_size, ack_workers=2, ack_queue=1)
+        transport.close()
+    assert sorted(row["transaction_id"] for row in rows) == sorted(row["transaction_id"] for row in ROWS)
+    assert {row["ack_status"] for row in rows} == {"request_fraud_transaction_pilot"}
+    assert all(row["ruleId"] for row in rows)
+
+
+def test_failed_alert_skips_ack():
+    """Test that an alert error is written as-is without calling fraud-ack."""
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=2)
+        server.fail_next(400, 1)
+        rows = run_threaded(ROWS[:1], MOCK_TOKEN, transport, max_workers=1, ack_run=PIPELINE)
+        transport.close()
+        assert server.requests == 1
+    assert "400" in rows[0]["error"] and "ack_status" not in rows[0]
+
+
+def test_async_pipeline():
+    """Test the async driver's ack stage."""
+    pytest.importorskip("aiohttp")
+    from my_project.async_engine import run_async
+
+    with MockFramlServer() as server:
+        rows = run_async(ROWS, MOCK_TOKEN, server.url, concurrency=4, ack_run=PIPELINE, ack_concurrency=2)
+        assert server.requests == 2 * len(ROWS)
+    assert {row["ack_status"] for row in rows} == {"request_fraud_transaction_pilot"}
+    assert len(rows) == len(ROWS)
+
+
+def test_cli_pipeline(tmp_path, monkeypatch):
+    """Test --pipeline end to end: one pass, alert columns plus ack_status."""
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "out.csv"
+    with MockFramlServer() as server:
+        main(["--input", str(SAMPLE_CSV), "--output", str(output), "--base-url", server.url,
+              "--max-workers", "2", "--pipeline", "--ack-workers", "2", "--no-token-cache"])
+        assert server.requests == 1 + 2 * 5  # auth, then alert and ack per transaction
+    df = pd.read_csv(output)
+    assert len(df) == 5
+    assert (df["ack_status"] == "request_fraud_transaction_pilot").all()
+    assert df["ruleId"].notna().all()
+
+
+@pytest.mark.parametrize("driver,batch_size", [("thread", 1), ("thread", 5), ("async", 1)])
+def test_pipeline_alert_without_rules(driver, batch_size):
+    """Test that an alert with no rule alerts still yields one joined row with its ack."""
+    with MockFramlServer(rules="empty") as server:
+        if driver == "async":
+            pytest.importorskip("aiohttp")
+            from my_project.async_engine import run_async
+            rows = run_async(ROWS, MOCK_TOKEN, server.url, concurrency=4, ack_run=PIPELINE, batch_size=batch_size)
+        else:
+            transport = Transport(server.url, pool_size=4)
+            rows = run_threaded(ROWS, MOCK_TOKEN, transport, max_workers=2, ack_run=PIPELINE, batch_size=batch_size)
+            transport.close()
+    assert sorted(row["transaction_id"] for row in rows) == sorted(row["transaction_id"] for row in ROWS)
+    assert {row["ack_status"] for row in rows} == {"request_fraud_transaction_pilot"}
+    assert not any(row.get("error") for row in rows)
@@ -0,0 +1,74 @@
+"""Tests for profiles module."""
+
+import csv
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from my_project.cli import main
+from my_project.mock_server import MockFramlServer
+from my_project.profiles import expand_sweep, load_profile
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+
+PROFILE = """
+input = "in.csv"
+prefix = "p1"
+ack_run = "pipeline"
+token_cache = false
+
+[concurrency]
+max_workers = 3
+
+[sweep]
+batch_size = [1, 5]
+max_workers = [2, 4]
+"""
+
+
+def test_load_profile(tmp_path):
+    """Test group tables, CLI spellings, ack_run names and sweep expansion."""
+    path = tmp_path / "run.toml"
+    path.write_text(PROFILE)
+    options, sweep = load_profile(str(path))
+    assert options == {"input_csv": "in.csv", "pre_fix": "p1", "ack_run": 2, "token_cache": None,
+                       "max_workers": 3}
+    configs = expand_sweep(options, sweep)
+    assert [(c["batch_size"], c["max_workers"]) for c in configs] == [(1, 2), (1, 4), (5, 2), (5, 4)]
+    path.write_text("max_wrokers = 3\n")
+    with pytest.raises(ValueError, match="max_wrokers"):
+        load_profile(str(path))
+
+
+def test_load_yaml_profile(tmp_path):
+    """Test that YAML profiles read the same as TOML ones."""
+    pytest.importorskip("yaml")
+    path = tmp_path / "run.yaml"
+    path.write_text("input: in.csv\nconcurrency:\n  max_workers: 3\nsweep:\n  batch_size: [1, 5]\n")
+    assert load_profile(str(path)) == ({"input_csv": "in.csv", "max_workers": 3}, {"batch_size": [1, 5]})
+
+
+def test_cli_flags_override_profile(tmp_path, monkeypatch):
+    """Test that a profile drives the run and explicit flags win over it."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "run.toml").write_text(f'input = "{SAMPLE_CSV}"\noutput = "out.csv"\nprefix = "fromprofile"\n'
+                                       "max_workers = 2\ntoken_cache = false\n")
+    with MockFramlServer() as server:
+        main(["--profile", "run.toml", "--base-url", server.url, "--prefix", "fromcli"])
+    df = pd.read_csv(tmp_path / "out.csv")
+    assert len(df) == 5 and df["transaction_id"].str.startswith("fromcliTxn").all()
+
+
+def test_sweep_report(tmp_path, monkeypatch):
+    """Test a command-line sweep: one output per configuration and a ranked report."""
+    monkeypatch.chdir(tmp_path)
+    with MockFramlServer() as server:
+        main(["--input", str(SAMPLE_CSV), "--output", "out.csv", "--base-url", server.url, "--no-token-cache",
+              "--prefix", "sw", "--sweep", "max_workers=1,2", "--sweep", "batch_size=1,5", "--report", "r.csv"])
+    with open(tmp_path / "r.csv", newline="") as f:
+        report = list(csv.DictReader(f))
+    assert [(row["max_workers"], row["batch_size"]) for row in report] == [("1", "1"), ("1", "5"), ("2", "1"), ("2", "5")]
+    assert all(row["calls"] == "5" and float(row["tps"]) > 0 and row["p99_ms"] for row in report)
+    out = pd.read_csv(tmp_path / "out.sweep3.csv")
+    assert out["transaction_id"].str.startswith("sw_s3Txn").all()
@@ -0,0 +1,53 @@
+"""Tests for replay module."""
+
+import time
+
+import pytest
+
+from my_project.payload_store import encode_payload
+from my_project.replay import TimestampPacer, timestamp_pairs, txn_time_of
+
+
+def _row(ts):
+    return {"transaction_id": ts, "txn_date_time": ts}
+
+
+def test_txn_time_of():
+    """Test timestamp extraction from dicts and encoded payloads."""
+    assert txn_time_of(_row("1970-01-01T00:01:00Z")) == 60
+    assert txn_time_of(_row("NA")) is None
+    assert txn_time_of({}) is None
+
+    class Encoded:
+        body = encode_payload(_row("1970-01-01T00:00:05Z"))
+
+    assert txn_time_of(Encoded()) == 5
+
+
+def test_offsets_follow_timestamps_with_speedup():
+    """Test that gaps are kept, divided by speed, and capped by max_gap."""
+    rows = [_row("2025-07-01T00:00:00Z"), _row("2025-07-01T00:00:10Z"), _row("NA"),
+            _row("2025-07-01T00:01:10Z")]
+    assert [o for o, _ in timestamp_pairs(rows, speed=10)] == [0.0, 1.0, 1.0, 7.0]
+    assert [o for o, _ in timestamp_pairs(rows, speed=10, max_gap=20)] == [0.0, 1.0, 1.0, 3.0]
+    with pytest.raises(ValueError):
+        list(timestamp_pairs(rows, speed=0))
+
+
+def test_heap_reorders_within_window():
+    """Test that out-of-order rows inside the window are released in time order."""
+    rows = [_row("2025-07-01T00:00:02Z"), _row("2025-07-01T00:00:00Z"), _row("2025-07-01T00:00:01Z")]
+    released = [row["txn_date_time"][-3:-1] for _, row in timestamp_pairs(rows, window=8)]
+    assert released == ["00", "01", "02"]
+
+
+def test_timestamp_pacer_reproduces_bursts():
+    """Test that a burst in the source is sent together after the original gap."""
+    rows = [_row("2025-07-01T00:00:00Z")] + [_row("2025-07-01T00:00:01Z")] * 5
+    pacer = TimestampPacer(speed=10)
+    sent = []
+    for _ in pacer.pace(rows):
+        sent.append(time.perf_counter())
+    assert sent[1] - sent[0] == pytest.approx(0.1, abs=0.02)
+    assert sent[-1] - sent[1] < 0.01
+    assert pacer.stats.keeping_up
@@ -0,0 +1,184 @@
+"""Tests for retry module."""
+
+import asyncio
+import time
+
+import pytest
+import requests
+
+from my_project import metrics
+from my_project.auth import TokenManager
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, failed
+from my_project.transport import Transport
+
+
+def test_failed_statuses():
+    """Test which statuses count as server failures."""
+    assert failed(None) and failed(429) and failed(503)
+    assert not failed(200) and not failed(400) and not failed(404)
+
+
+def test_rules_limit_attempts_per_status():
+    """Test per-status maximum attempts."""
+    policy = RetryPolicy({503: 3, 429: 1})
+    policy.started()
+    assert policy.should_retry(503, 1)
+    assert policy.should_retry(503, 2)
+    assert not policy.should_retry(503, 3)
+    assert not policy.should_retry(429, 1)
+    assert not policy.should_retry(400, 1)
+
+
+def test_budget_caps_retries():
+    """Test that retries stop once the budget is spent."""
+    policy = RetryPolicy({503: 10}, budget_ratio=0.1, min_budget=2)
+    for _ in range(10):
+        policy.started()
+    allowed = sum(policy.should_retry(503, 1) for _ in range(10))
+    assert allowed == 3  # 2 + 10% of 10 requests
+    assert policy.exhausted == 7
+
+
+def test_delay_jitter_and_retry_after():
+    """Test full-jitter backoff bounds and Retry-After handling."""
+    policy = RetryPolicy(base_delay=0.1, max_delay=1.0)
+    assert all(0 <= policy.delay(3) <= 0.4 for _ in range(100))
+    assert all(policy.delay(10) <= 1.0 for _ in range(100))
+    assert policy.delay(1, "0.5") == 0.5
+    assert policy.delay(1, "30") == 1.0
+    assert policy.delay(1, "Wed, 21 Oct 2015 07:28:00 GMT") <= 0.1
+
+
+def test_breaker_opens_and_probes(monkeypatch):
+    """Test closed -> open -> half-open -> closed transitions."""
+    now = [0.0]
+    monkeypatch.setattr("my_project.retry.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_ratio=0.5, min_calls=4, open_seconds=5)
+    for ok in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(ok)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    now[0] = 6.0
+    probe = breaker.allow()  # the single half-open probe
+    assert probe
+    assert not breaker.allow()
+    breaker.record(False, probe)
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] = 12.0
+    probe = breaker.allow()
+    breaker.record(True, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opened == 2 and breaker.rejected == 2
+
+
+def test_breaker_ignores_stale_outcomes_while_half_open(monkeypatch):
+    """Test that only the probe's outcome, not a call admitted while closed, leaves half-open."""
+    now = [0.0]
+    monkeypatch.setattr("my_project.retry.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(min_calls=1, open_seconds=5)
+    stale = breaker.allow()
+    breaker.record(False, breaker.allow())
+    now[0] = 6.0
+    probe = breaker.allow()
+    breaker.record(True, stale)
+    breaker.record(False, stale)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record(True, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_transport_retries_and_counts():
+    """Test that the transport retries injected 503s and counts retries separately."""
+    metrics.reset()
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=1, retry=RetryPolicy({503: 3}, base_delay=0.001))
+        server.fail_next(503, 2)
+        response = transport.send_transaction({"transaction_id": "t1"}, MOCK_TOKEN)
+        assert response["alert"]["txn"]["transaction_id"] == "t1"
+        assert server.requests == 3
+        server.fail_next(503, 3)
+        with pytest.raises(requests.HTTPError):
+            transport.send_transaction({"transaction_id": "t2"}, MOCK_TOKEN)
+        transport.close()
+    assert metrics.registry.totals()["retry"] == 4
+
+
+def test_transport_circuit_breaker_holds_sends():
+    """Test that an open breaker delays sends until its probe instead of failing them."""
+    with MockFramlServer() as server:
+        breaker = CircuitBreaker(min_calls=2, open_seconds=0.3)
+        transport = Transport(server.url, pool_size=1, breaker=breaker)
+        server.fail_next(500, 2)
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+        start = time.monotonic()
+        transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+        assert time.monotonic() - start >= 0.25
+        assert server.requests == 3 and breaker.state == CircuitBreaker.CLOSED
+        breaker.record(False)
+        breaker.record(False)
+        breaker.stop_event.set()
+        with pytest.raises(CircuitOpenError):
+            transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+        assert server.requests == 3
+        transport.close()
+
+
+def test_unexpected_probe_error_reopens_breaker(monkeypatch):
+    """Test that a half-open probe failing with an unexpected error still reopens the breaker."""
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.01)
+    breaker.record(False)
+    transport = Transport("http://127.0.0.1:9", pool_size=1, breaker=breaker)
+    monkeypatch.setattr(transport, "_send", lambda *args: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 2
+    transport.close()
+
+
+def test_retry_uses_refreshed_token():
+    """Test that each attempt reads the current token rather than the one from the first attempt."""
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=1, retry=RetryPolicy({503: 2}))
+        tokens = TokenManager(transport.authenticate, ttl=600)
+        tokens.get()
+        transport.retry.delay = lambda *args: server.rotate_token() or tokens.refresh() and 0
+        server.fail_next(503, 1)
+        transport.send_transaction({"transaction_id": "t"}, tokens)
+        assert server.requests == 4  # auth, 503, re-auth, then the retry with no 401
+        transport.close()
+
+
+def test_async_transport_circuit_breaker_holds_sends():
+    """Test that the async transport waits out an open breaker instead of failing the send."""
+    pytest.importorskip("aiohttp")
+    from my_project.async_engine import AsyncTransport
+
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.2)
+    breaker.record(False)
+
+    async def send(url):
+        async with AsyncTransport(url, 2, breaker=breaker) as transport:
+            return await transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+
+    with MockFramlServer() as server:
+        assert asyncio.run(send(server.url)) == "request_fraud_transaction_pilot"
+        assert server.requests == 1 and breaker.state == CircuitBreaker.CLOSED
+
+
+def test_async_transport_retries():
+    """Test retry on 429 with Retry-After in the async transport."""
+    pytest.importorskip("aiohttp")
+    from my_project.async_engine import AsyncTransport
+
+    async def send(url):
+        async with AsyncTransport(url, 2, retry=RetryPolicy({429: 2})) as transport:
+            return await transport.send_fraud_ack({"transaction_id": "t"}, MOCK_TOKEN)
+
+    with MockFramlServer() as server:
+        server.fail_next(429, 1, retry_after=0.01)
+        assert asyncio.run(send(server.url)) == "request_fraud_transaction_pilot"
+        assert server.requests == 2
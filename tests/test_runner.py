@@ -0,0 +1,41 @@
+"""Tests for runner module."""
+
+from my_project import metrics
+from my_project.mock_server import MOCK_TOKEN, MockFramlServer
+from my_project.runner import process_single_row, run_threaded
+from my_project.transport import Transport
+
+
+def test_run_threaded_bounds_queue():
+    """Test that rows are pulled lazily, never more than queue_depth ahead."""
+    with MockFramlServer(latency=0.002) as server:
+        transport = Transport(server.url, pool_size=2)
+        pulled = 0
+        max_ahead = 0
+        responses = []
+
+        def rows():
+            nonlocal pulled, max_ahead
+            for i in range(60):
+                pulled += 1
+                max_ahead = max(max_ahead, pulled - server.requests)
+                yield {"transaction_id": f"t{i}"}
+
+        run_threaded(rows(), MOCK_TOKEN, transport, max_workers=2, responses=responses, queue_depth=4)
+        transport.close()
+    assert len(responses) == 60
+    assert max_ahead <= 4 + 2
+
+
+def test_failed_calls_record_latency():
+    """Test that failed calls go into the latency histogram alongside successes."""
+    metrics.reset()
+    with MockFramlServer(latency=0.02) as server:
+        transport = Transport(server.url, pool_size=1)
+        server.fail_next(503, 1)
+        rows = process_single_row({"transaction_id": "t1"}, MOCK_TOKEN, transport)
+        transport.close()
+    assert "error" in rows[0]
+    summary = metrics.latency_summary()
+    assert metrics.registry.totals()["error"] == 1
+    assert summary["count"] == 1 and summary["max_ms"] >= 15
@@ -0,0 +1,65 @@
+"""Tests for schema module."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from my_project.ingest import load_payloads, preprocess_frame, read_and_preprocess_csv
+from my_project.schema import REASON_COLUMN, compile_schema
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+
+BAD_CSV = """transaction_id,txn_date_time,sender_amount,intermediary,sender_msisdn,sender_msisdn
+ok1,2025-07-01T00:10:00Z,10,,m0,
+ok2,2025-07-01T00:20:00Z,,"[{'hashcode': 'h'}]",,m1
+,2025-07-01T00:30:00Z,10,,,
+bad_date,31/31/2025,10,,,
+bad_amount,2025-07-01T00:50:00Z,ten,,,
+bad_intermediary,2025-07-01T01:00:00Z,10,[broken,,
+conflict,2025-07-01T01:10:00Z,10,,m2,m3
+"""
+
+
+@pytest.fixture
+def bad_csv(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text(BAD_CSV)
+    return path
+
+
+def test_sample_is_valid():
+    """Test that every sample.csv row passes."""
+    df = read_and_preprocess_csv(SAMPLE_CSV)
+    valid, rejects = compile_schema().validate(df)
+    assert len(valid) == len(df) and rejects.empty
+
+
+def test_rejects_with_reasons(bad_csv):
+    """Test each kind of malformed row and the folding of duplicate header columns."""
+    validator = compile_schema()
+    valid, rejects = validator.validate(preprocess_frame(pd.read_csv(bad_csv)))
+    assert list(valid["transaction_id"]) == ["ok1", "ok2"]
+    assert list(valid["sender_msisdn"]) == ["m0", "m1"]
+    assert "sender_msisdn.1" not in valid
+    reasons = dict(zip(rejects["transaction_id"], rejects[REASON_COLUMN]))
+    assert reasons == {
+        "": "transaction_id: required",
+        "bad_date": "txn_date_time: unparseable date '31/31/2025'",
+        "bad_amount": "sender_amount: not a number 'ten'",
+        "bad_intermediary": "intermediary: not a list of objects '[broken'",
+        "conflict": "sender_msisdn: conflicting duplicate column sender_msisdn.1",
+    }
+    assert (validator.checked, validator.rejected) == (7, 5)
+
+
+@pytest.mark.parametrize("chunksize", [None, 3])
+def test_load_payloads_writes_rejects(bad_csv, tmp_path, chunksize):
+    """Test that rejected rows never become payloads and land in the reject file."""
+    reject_path = tmp_path / "rejects.csv"
+    validator = compile_schema(reject_path=str(reject_path))
+    payloads, _ = load_payloads(bad_csv, "p", chunksize, validator=validator)
+    assert [payload["transaction_id"] for payload in payloads] == ["pTxnok1", "pTxnok2"]
+    rejects = pd.read_csv(reject_path, keep_default_na=False)
+    assert len(rejects) == 5 and (rejects[REASON_COLUMN] != "").all()
+    assert "rejected 5 of 7 rows" in validator.summary()
@@ -0,0 +1,37 @@
+"""Tests for sharding module."""
+
+from pathlib import Path
+
+import pandas as pd
+
+from my_project import metrics
+from my_project.cli import main
+from my_project.mock_server import MockFramlServer
+from my_project.sharding import shard_path
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+
+
+def test_shard_path():
+    """Test per-shard file names."""
+    assert shard_path("out/results.csv", 1, 4) == "out/results.shard1-of-4.csv"
+
+
+def test_sharded_run_merges_outputs(tmp_path, monkeypatch):
+    """Test a two-process run against the mock server, then a resume that sends nothing."""
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "out.csv"
+    args = ["--input", str(SAMPLE_CSV), "--output", str(output), "--shards", "2",
+            "--max-workers", "2", "--prefix", "t", "--no-token-cache", "--formatted-payloads", "sent.csv"]
+    metrics.reset()
+    with MockFramlServer() as server:
+        main(args + ["--base-url", server.url])
+        assert server.requests == 5 + 2  # one auth per shard
+        assert metrics.registry.totals()["success"] == metrics.latency_summary()["count"] == 5
+        main(args + ["--base-url", server.url, "--resume"])
+        assert server.requests == 7 + 2
+    df = pd.read_csv(output)
+    assert len(df) == df["transaction_id"].nunique() == 5
+    assert df["transaction_id"].str.startswith("tTxn").all()
+    assert not list(tmp_path.glob("out.shard*.csv")) and not list(tmp_path.glob("sent.shard*.csv"))
+    assert len((tmp_path / "sent.csv").read_text().splitlines()) == 5
@@ -0,0 +1,88 @@
+"""Tests for sinks module."""
+
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from my_project.sinks import CsvSink, format_for, merge_parts, open_sink
+
+
+def test_format_for():
+    """Test format inference from the output extension."""
+    assert format_for("out.csv") == "csv"
+    assert format_for("out.JSONL") == "jsonl"
+    assert format_for("out.parquet") == "parquet"
+    assert format_for("out.arrows") == "arrow"
+
+
+def test_csv_sink_matches_dataframe(tmp_path):
+    """Test that streamed CSV equals pd.DataFrame(rows).to_csv, including late columns."""
+    rows = [{"transaction_id": "t1", "ruleId": "r1", "Sum (value)": 1.5},
+            {"transaction_id": "t2", "error": "boom"},
+            {"transaction_id": "t3", "ruleId": "r2", "Count (value)": 2}]
+    path = tmp_path / "out.csv"
+    with CsvSink(str(path), batch_size=1) as sink:
+        for row in rows:
+            sink.append(row)
+    expected = tmp_path / "expected.csv"
+    pd.DataFrame(rows).to_csv(expected, index=False)
+    pd.testing.assert_frame_equal(pd.read_csv(path), pd.read_csv(expected))
+    assert sink.rows_written == sink.rows_checkpointed == 3
+
+
+def test_jsonl_sink_from_many_threads(tmp_path):
+    """Test concurrent producers through a small bounded queue."""
+    path = tmp_path / "out.jsonl"
+    sink = open_sink(str(path), max_pending=4, batch_size=7)
+
+    def produce(t):
+        for i in range(100):
+            sink.extend([{"transaction_id": f"{t}-{i}", "rule": 1}, {"transaction_id": f"{t}-{i}", "rule": 2}])
+
+    threads = [threading.Thread(target=produce, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == len(sink) == 800
+
+
+def test_columnar_sinks_round_trip(tmp_path):
+    """Test Parquet and Arrow stream output with the fixed schema."""
+    pa = pytest.importorskip("pyarrow")
+    rows = [{"transaction_id": "t1", "ruleId": "r1", "Sum (type)": "number", "Sum (value)": 1.5}]
+    with open_sink(str(tmp_path / "out.parquet")) as sink:
+        sink.extend(rows)
+    df = pd.read_parquet(tmp_path / "out.parquet")
+    assert df.loc[0, "transaction_id"] == "t1"
+    assert df.loc[0, "functionValue"][0]["value"] == 1.5
+    with open_sink(str(tmp_path / "out.arrows"), layout="long") as sink:
+        sink.extend(rows)
+        sink.extend([{"transaction_id": "t2", "error": "boom"}])
+    table = pa.ipc.open_stream(str(tmp_path / "out.arrows")).read_all()
+    assert table.column("function_name").to_pylist() == ["Sum", None]
+
+
+def test_merge_parts(tmp_path):
+    """Test merging CSV parts with different columns, and Parquet parts."""
+    parts = [str(tmp_path / "a.csv"), str(tmp_path / "b.csv"), str(tmp_path / "missing.csv")]
+    with open_sink(parts[0]) as sink:
+        sink.extend([{"transaction_id": "t1", "ruleId": "r1"}])
+    with open_sink(parts[1]) as sink:
+        sink.extend([{"transaction_id": "t2", "error": "boom"}])
+    assert merge_parts(parts, str(tmp_path / "out.csv")) == 2
+    df = pd.read_csv(tmp_path / "out.csv")
+    assert list(df.columns) == ["transaction_id", "ruleId", "error"]
+    assert list(df["transaction_id"]) == ["t1", "t2"]
+
+    pytest.importorskip("pyarrow")
+    parts = [str(tmp_path / f"{i}.parquet") for i in range(2)]
+    for i, part in enumerate(parts):
+        with open_sink(part) as sink:
+            sink.extend([{"transaction_id": f"t{i}", "ruleId": f"r{i}"}])
+    assert merge_parts(parts, str(tmp_path / "out.parquet")) == 2
+    assert list(pd.read_parquet(tmp_path / "out.parquet")["ruleId"]) == ["r0", "r1"]
@@ -0,0 +1,42 @@
+"""Tests for transport module."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from my_project.mock_server import ACK_BODY, MOCK_TOKEN, MockFramlServer
+from my_project.transport import Transport, format_payload
+
+
+def test_format_payload():
+    """Test the tt_json envelope."""
+    assert format_payload({"a": 1}) == {"payload": {"a": 1}, "format": "tt_json", "version": "1"}
+
+
+def test_send_round_trip():
+    """Test token, fraud-alert and fraud-ack against the mock server."""
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=2)
+        token = transport.get_token()
+        assert token == MOCK_TOKEN
+        response = transport.send_transaction({"transaction_id": "t1"}, token)
+        assert response["alert"]["txn"]["transaction_id"] == "t1"
+        assert transport.send_fraud_ack({"transaction_id": "t1"}, token) == ACK_BODY
+        transport.close()
+
+
+def test_connections_are_reused():
+    """Test that concurrent sends stay within the configured pool."""
+    with MockFramlServer() as server:
+        transport = Transport(server.url, pool_size=4)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: transport.send_transaction({"transaction_id": str(i)}, MOCK_TOKEN),
+                              range(100)))
+        assert server.requests == 100
+        assert server.connections <= 4
+        transport.close()
+
+
+def test_headers_are_cached():
+    """Test that header dicts are built once per token."""
+    transport = Transport("http://localhost")
+    assert transport.headers_for("abc") is transport.headers_for("abc")
+    assert transport.headers_for("abc")["Authorization"] == "Token abc"
@@ -0,0 +1,53 @@
+"""Tests for tuning module."""
+
+from pathlib import Path
+
+import pandas as pd
+
+from my_project.profiles import load_profile
+from my_project.tuning import main, make_slice, recommend, tune
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "src" / "my_project" / "sample.csv"
+
+
+def test_make_slice_repeats_short_input(tmp_path):
+    """Test that a short input is tiled with distinct transaction ids."""
+    path = tmp_path / "slice.csv"
+    assert make_slice(SAMPLE_CSV, 12, path) == 12
+    ids = pd.read_csv(path)["transaction_id"]
+    assert ids.is_unique and ids.iloc[5].endswith("_1")
+
+
+def test_recommend_prefers_cheapest_near_best():
+    """Test limits and the cheapest-within-tolerance rule."""
+    report = [
+        {"driver": "thread", "workers": 64, "shards": 1, "pool_size": None, "tps": 1000, "error_rate": 0.0, "p99_ms": 90},
+        {"driver": "thread", "workers": 16, "shards": 1, "pool_size": None, "tps": 970, "error_rate": 0.0, "p99_ms": 40},
+        {"driver": "thread", "workers": 8, "shards": 1, "pool_size": None, "tps": 600, "error_rate": 0.0, "p99_ms": 30},
+        {"driver": "async", "workers": 128, "shards": 1, "pool_size": None, "tps": 1500, "error_rate": 0.2, "p99_ms": 20},
+    ]
+    assert recommend(report)["workers"] == 16
+    assert recommend(report, p99_budget_ms=35)["workers"] == 8
+    assert recommend(report, max_error_rate=0.5)["driver"] == "async"
+    assert recommend(report, p99_budget_ms=1) is None
+    unmeasured = {"driver": "sharded", "workers": 1, "shards": 2, "pool_size": None, "tps": 5000,
+                  "error_rate": None, "p99_ms": None}
+    assert recommend(report + [unmeasured])["workers"] == 16
+
+
+def test_tuning_run_offline(tmp_path):
+    """Test a small grid end to end against the mock, with the report and profile written."""
+    report_path, profile_path = tmp_path / "report.csv", tmp_path / "best.toml"
+    best = main(["--input", str(SAMPLE_CSV), "--rows", "40", "--workers", "1,4", "--drivers", "thread,async",
+                 "--batch-size", "1,10", "--repeats", "1", "--latency", "5",
+                 "--report", str(report_path), "--profile-out", str(profile_path)])
+    report = pd.read_csv(report_path)
+    assert len(report) == 8 and (report["calls"] == 40).all() and (report["tps"] > 0).all()
+    options, sweep = load_profile(str(profile_path))
+    assert options["batch_size"] == best["batch_size"] and not sweep
+
+
+def test_sharded_runs_report_errors_and_latency():
+    """Test that sharded grid points carry the shards' calls, error rate and p99."""
+    report = tune(str(SAMPLE_CSV), rows=20, workers=(2,), drivers=("sharded",), repeats=1, latency="1", shards=2)
+    assert report[0]["calls"] == 20 and report[0]["error_rate"] == 0 and report[0]["p99_ms"] is not None